@@ -11,6 +11,7 @@ from apps.events.models import (
 )
 from apps.events.services import MeasurementEventManager
 from apps.measurements.models import CumulativeMeasurement, InstantMeasurement
+from apps.measurements.signals import measurements_created
 from apps.transductors.models import StatusHistory
 
 logger = logging.getLogger("apps")
@@ -21,22 +22,37 @@ def handle_instant_trigger(sender, instance, created, **kwargs):
     if not created:
         return
     logger.debug("Instant measurement created")
+    perform_instant_triggers([instance])
+
+
+@receiver(measurements_created, sender=InstantMeasurement)
+def handle_instant_bulk_trigger(sender, instances, **kwargs):
+    logger.debug(f"Instant measurements created in bulk: {len(instances)}")
+    perform_instant_triggers(instances)
+
+
+def perform_instant_triggers(instances):
+    """
+    Evaluates the active triggers over a batch of instant measurements. The active triggers are
+    loaded once for the whole batch.
+    """
     active_triggers = InstantMeasurementTrigger.objects.filter(is_active=True)
     if not active_triggers.exists():
         logger.debug("No active triggers found for Instant measurement")
         return
 
-    field_names = active_triggers.values_list("field_name", flat=True).distinct()
-    for field_name in field_names:
-        field_triggers = active_triggers.filter(field_name=field_name)
+    field_names = list(active_triggers.values_list("field_name", flat=True).distinct())
+    field_triggers = {field_name: active_triggers.filter(field_name=field_name) for field_name in field_names}
 
-        field_value = getattr(instance, field_name, None)
-        if field_value is None:
-            logger.debug(f"No value for field '{field_name}' - skipping triggers")
-            continue
+    for instance in instances:
+        for field_name, triggers in field_triggers.items():
+            field_value = getattr(instance, field_name, None)
+            if field_value is None:
+                logger.debug(f"No value for field '{field_name}' - skipping triggers")
+                continue
 
-        event_manager = MeasurementEventManager(instance, field_name)
-        event_manager.perform_triggers(field_triggers)
+            event_manager = MeasurementEventManager(instance, field_name)
+            event_manager.perform_triggers(triggers)
 
 
 @receiver(post_save, sender=CumulativeMeasurement)
@@ -45,24 +61,39 @@ def handle_cumulative_trigger(sender, instance, created, **kwargs):
         return
 
     logger.debug("Cumulative measurement created")
+    perform_cumulative_triggers([instance])
+
+
+@receiver(measurements_created, sender=CumulativeMeasurement)
+def handle_cumulative_bulk_trigger(sender, instances, **kwargs):
+    logger.debug(f"Cumulative measurements created in bulk: {len(instances)}")
+    perform_cumulative_triggers(instances)
+
+
+def perform_cumulative_triggers(instances):
+    """
+    Evaluates the active triggers over a batch of cumulative measurements. The active triggers are
+    loaded once for the whole batch.
+    """
     active_triggers = CumulativeMeasurementTrigger.objects.filter(is_active=True)
     if not active_triggers.exists():
         logger.debug("No active triggers found for Cumulative measurement")
         return
 
-    field_names = active_triggers.values_list("field_name", flat=True).distinct()
-    for field_name in field_names:
-        field_triggers = active_triggers.filter(field_name=field_name)
+    field_names = list(active_triggers.values_list("field_name", flat=True).distinct())
+    field_triggers = {field_name: active_triggers.filter(field_name=field_name) for field_name in field_names}
 
-        field_value = getattr(instance, field_name, None)
-        if field_value is None:
-            logger.debug(f"No value for field '{field_name}' - skipping triggers")
-            continue
+    for instance in instances:
+        for field_name, triggers in field_triggers.items():
+            field_value = getattr(instance, field_name, None)
+            if field_value is None:
+                logger.debug(f"No value for field '{field_name}' - skipping triggers")
+                continue
 
-        logger.debug(f"Processing triggers for {field_name} for {instance.transductor.ip_address}")
+            logger.debug(f"Processing triggers for {field_name} for {instance.transductor.ip_address}")
 
-        event_manager = MeasurementEventManager(instance, field_name)
-        event_manager.perform_triggers(field_triggers)
+            event_manager = MeasurementEventManager(instance, field_name)
+            event_manager.perform_triggers(triggers)
 
 
 @receiver(post_save, sender=StatusHistory)
@@ -7,6 +7,8 @@ class MeasurementsConfig(AppConfig):
     verbose_name = "Measurements module"
 
     def ready(self):
+        import apps.measurements.services.response_cache  # noqa
+
         from apps.events.models import (
             CumulativeMeasurementTrigger,
             InstantMeasurementTrigger,
@@ -0,0 +1,13 @@
+from django.db import models
+
+
+class RealField(models.FloatField):
+    """
+    Single precision (float4, ~7 significant digits) FloatField: half the storage of a double
+    and a third of a numeric(8, 2) value.
+    """
+
+    description = "Single precision floating point number"
+
+    def db_type(self, connection):
+        return "real"
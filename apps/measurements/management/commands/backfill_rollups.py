@@ -0,0 +1,68 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.measurements.models import CumulativeMeasurement
+from apps.measurements.services.rollups import DAILY, HOURLY, CumulativeRollup
+from apps.transductors.models import Transductor
+from apps.utils.helpers import log_execution_time
+
+logger = logging.getLogger("tasks")
+
+
+class Command(BaseCommand):
+    help = "Builds (or rebuilds) the hourly and daily rollups of the cumulative measurements."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--start_date", type=str, default=None, help="YYYY-MM-DD (default: first measurement)")
+        parser.add_argument("--end_date", type=str, default=None, help="YYYY-MM-DD (default: last measurement)")
+        parser.add_argument("--transductor", type=int, default=None, help="Only this transductor id.")
+
+    @log_execution_time(logger, level=logging.INFO)
+    def handle(self, *args, **options) -> None:
+        logger.info("   Backfill cumulative rollups - Starting...")
+
+        transductors = Transductor.objects.all()
+        if options["transductor"] is not None:
+            transductors = transductors.filter(id=options["transductor"])
+        transductor_ids = list(transductors.values_list("id", flat=True))
+        if not transductor_ids:
+            logger.warning("No transductors to backfill.")
+            return
+
+        start_date, end_date = self.get_period(transductor_ids, options["start_date"], options["end_date"])
+        if start_date is None:
+            logger.warning("No cumulative measurements to backfill.")
+            return
+
+        hourly = CumulativeRollup(HOURLY)
+        daily = CumulativeRollup(DAILY)
+
+        # one day per statement keeps the aggregations small; daily rows are built from the hourly ones
+        day = daily.floor_bucket(start_date)
+        while day <= end_date:
+            next_day = daily.next_bucket(day)
+            hours = hourly.refresh(transductor_ids, day, next_day - timedelta(microseconds=1))
+            days = daily.refresh(transductor_ids, day, day)
+            logger.debug(f"{day.date()}: {hours} hourly and {days} daily rollups")
+            day = next_day
+
+        logger.info(f"Rollups rebuilt from {start_date.date()} to {end_date.date()}")
+
+    def get_period(self, transductor_ids, start_date, end_date):
+        period = CumulativeMeasurement.objects.filter(transductor__in=transductor_ids).aggregate(
+            first=Min("collection_date"),
+            last=Max("collection_date"),
+        )
+        start = self.parse_date(start_date) if start_date else period["first"]
+        end = self.parse_date(end_date) if end_date else period["last"]
+        return start, end
+
+    def parse_date(self, value):
+        try:
+            return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d"))
+        except ValueError:
+            raise CommandError(f"Invalid date: {value} (expected YYYY-MM-DD)")
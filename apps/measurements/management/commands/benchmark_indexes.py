@@ -0,0 +1,141 @@
+import json
+import logging
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from apps.measurements.models import (
+    CUMULATIVE_INDEXED_FIELDS,
+    INSTANT_INDEXED_FIELDS,
+    CumulativeMeasurement,
+    InstantMeasurement,
+)
+from apps.transductors.models import Transductor
+from apps.utils.helpers import log_execution_time
+
+logger = logging.getLogger("tasks")
+
+# planner settings used to compare the access paths of the same query
+STRATEGIES = {
+    "default": [],
+    "btree": ["SET LOCAL enable_bitmapscan = off"],
+    "bitmap": ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_indexonlyscan = off"],
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the measurement indexes: insert throughput and range scans of the graph and report queries."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--transductor", type=int, default=None, help="Transductor of the graph query.")
+        parser.add_argument("--days", type=int, default=30, help="Period of the range scans.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--insert_rows", type=int, default=5000, help="Rows inserted (rolled back).")
+        parser.add_argument(
+            "--plain_btree",
+            action="store_true",
+            help="Also time the insert with the previous plain btree (built over the whole table, rolled back).",
+        )
+
+    @log_execution_time(logger, level=logging.INFO)
+    def handle(self, *args, **options) -> None:
+        logger.info("   Index benchmark - Starting...")
+        transductor = self.get_transductor(options["transductor"])
+        end_date = timezone.now()
+        start_date = end_date - timedelta(days=options["days"])
+
+        variants = ["current", "no_index"] + (["plain_btree"] if options["plain_btree"] else [])
+        for model in (InstantMeasurement, CumulativeMeasurement):
+            for variant in variants:
+                self.benchmark_insert(model, transductor, options["insert_rows"], variant)
+
+        queries = {
+            "graph (instant)": InstantMeasurement.objects.filter(
+                transductor=transductor,
+                collection_date__range=(start_date, end_date),
+            ).values("collection_date", *INSTANT_INDEXED_FIELDS),
+            "report (cumulative)": CumulativeMeasurement.objects.filter(
+                collection_date__range=(start_date, end_date),
+            )
+            .values("transductor")
+            .annotate(**{field: Sum(field) for field in CUMULATIVE_INDEXED_FIELDS})
+            .order_by(),
+            "range without transductor (instant)": InstantMeasurement.objects.filter(
+                Q(collection_date__range=(end_date - timedelta(days=1), end_date))
+            ).values("transductor", "collection_date"),
+        }
+        for name, queryset in queries.items():
+            for strategy in STRATEGIES:
+                self.benchmark_query(name, queryset, strategy, options["repeat"])
+
+    def get_transductor(self, transductor_id):
+        queryset = Transductor.objects.all()
+        if transductor_id is not None:
+            queryset = queryset.filter(id=transductor_id)
+
+        transductor = queryset.order_by("id").first()
+        if transductor is None:
+            raise CommandError("No transductor to benchmark.")
+        return transductor
+
+    def benchmark_insert(self, model, transductor, rows, variant):
+        """
+        Bulk inserts `rows` rows (one per minute in the future, as the collection does) inside a
+        transaction that is rolled back: the time includes the maintenance of every index. The
+        variants drop the BRIN and covering indexes in the same transaction ("no_index") and
+        create the previous plain (transductor, collection_date) btree ("plain_btree"), so the
+        difference with "current" is the maintenance cost of the new indexes. The dropped indexes
+        lock the table until the rollback.
+        """
+        start = timezone.now() + timedelta(days=1)
+        instances = [model(transductor=transductor, collection_date=start + timedelta(minutes=i)) for i in range(rows)]
+
+        with transaction.atomic():
+            self.prepare_indexes(model, variant)
+            start_time = time.perf_counter()
+            model.objects.bulk_create(instances, batch_size=1000)
+            elapsed = time.perf_counter() - start_time
+            transaction.set_rollback(True)
+
+        logger.info(
+            f"insert {model._meta.model_name} [{variant}]: {rows / elapsed:,.0f} rows/s ({elapsed * 1000:.1f} ms)"
+        )
+
+    def prepare_indexes(self, model, variant):
+        if variant == "current":
+            return
+
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        with connection.cursor() as cursor:
+            for index in model._meta.indexes:
+                cursor.execute(f"DROP INDEX {quote(index.name)}")
+            if variant == "plain_btree":
+                cursor.execute(f"CREATE INDEX benchmark_plain_btree_idx ON {table} (transductor_id, collection_date)")
+
+    def benchmark_query(self, name, queryset, strategy, repeat):
+        timings = []
+        plan = None
+        for _ in range(repeat):
+            with transaction.atomic(), connection.cursor() as cursor:
+                for statement in STRATEGIES[strategy]:
+                    cursor.execute(statement)
+                plan = json.loads(queryset.explain(format="json", analyze=True, buffers=True))[0]
+                timings.append(plan["Execution Time"])
+
+        indexes = sorted(self.get_indexes(plan["Plan"]))
+        logger.info(
+            f"{name} [{strategy}]: median {statistics.median(timings):.2f} ms, "
+            f"min {min(timings):.2f} ms - {plan['Plan']['Node Type']} using {', '.join(indexes) or 'no index'}"
+        )
+
+    def get_indexes(self, node):
+        indexes = {node["Index Name"]} if "Index Name" in node else set()
+        for child in node.get("Plans", []):
+            indexes |= self.get_indexes(child)
+        return indexes
@@ -0,0 +1,51 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.measurements.models import InstantMeasurement
+from apps.measurements.services import copy_to_compact
+from apps.utils.helpers import log_execution_time
+
+logger = logging.getLogger("tasks")
+
+
+class Command(BaseCommand):
+    help = "Copies the instant measurements to the compact (float4) table, one day at a time."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--start_date", type=str, default=None, help="YYYY-MM-DD (default: first measurement)")
+        parser.add_argument("--end_date", type=str, default=None, help="YYYY-MM-DD, inclusive (default: now)")
+
+    @log_execution_time(logger, level=logging.INFO)
+    def handle(self, *args, **options) -> None:
+        logger.info("   Copy compact instant measurements - Starting...")
+
+        if options["start_date"]:
+            day = self.parse_date(options["start_date"])
+        else:
+            first = InstantMeasurement.objects.aggregate(first=Min("collection_date"))["first"]
+            if first is None:
+                logger.warning("No instant measurements to copy.")
+                return
+            day = timezone.localtime(first).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        end_date = self.parse_date(options["end_date"]) + timedelta(days=1) if options["end_date"] else timezone.now()
+
+        total = 0
+        while day < end_date:
+            next_day = min(day + timedelta(days=1), end_date)
+            copied = copy_to_compact(day, next_day)
+            logger.debug(f"{day.date()}: {copied} rows copied")
+            total += copied
+            day = next_day
+
+        logger.info(f"{total} instant measurements copied to the compact table.")
+
+    def parse_date(self, value):
+        try:
+            return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d"))
+        except ValueError:
+            raise CommandError(f"Invalid date: {value} (expected YYYY-MM-DD)")
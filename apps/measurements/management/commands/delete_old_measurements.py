@@ -1,18 +1,40 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
+import logging
 
-from apps.measurements.models import CumulativeMeasurement, InstantMeasurement
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.measurements.services import RetentionEngine, get_policies
+from apps.utils.helpers import log_execution_time
+
+logger = logging.getLogger("tasks")
 
 
 class Command(BaseCommand):
-    help = "Deletes all measurements older than 30 days"
+    help = "Deletes the measurements older than the retention of each table (settings.MEASUREMENT_RETENTION_DAYS)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--policy", type=str, nargs="*", default=None, help="Only these policies (names).")
+        parser.add_argument("--chunk_size", type=int, default=10000, help="Ids deleted per statement.")
+        parser.add_argument("--pause", type=float, default=0.1, help="Seconds to wait between chunks.")
+        parser.add_argument("--dry_run", action="store_true", help="Only log what would be deleted.")
+
+    @log_execution_time(logger, level=logging.INFO)
+    def handle(self, *args, **options) -> None:
+        logger.info("   Measurements retention - Starting...")
 
-    def handle(self, *args, **options):
-        thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
+        policies = get_policies()
+        if options["policy"]:
+            unknown = set(options["policy"]) - {policy.name for policy in policies}
+            if unknown:
+                raise CommandError(f"Unknown policies: {', '.join(sorted(unknown))}")
+            policies = [policy for policy in policies if policy.name in options["policy"]]
 
-        try:
-            InstantMeasurement.objects.filter(slave_collection_date__lt=thirty_days_ago).delete()
-            CumulativeMeasurement.objects.filter(collection_date__lt=thirty_days_ago).delete()
-            self.stdout.write(self.style.SUCCESS("Measurements older than 30 days have been successfully deleted."))
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Failed to delete measurements: {str(e)}"))
+        engine = RetentionEngine(
+            chunk_size=options["chunk_size"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+        )
+        for policy in policies:
+            try:
+                engine.apply(policy)
+            except Exception as e:
+                logger.error(f"Retention {policy.name} failed: {e}")
@@ -0,0 +1,37 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.measurements.services import PARTITIONED_MODELS, PartitionManager
+from apps.utils.helpers import log_execution_time
+
+logger = logging.getLogger("tasks")
+
+
+class Command(BaseCommand):
+    help = "Creates the upcoming monthly partitions of the measurement tables and detaches old ones."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--months_ahead", type=int, default=3)
+        parser.add_argument(
+            "--retention_months",
+            type=int,
+            default=None,
+            help="Detach partitions older than this number of months (disabled by default).",
+        )
+        parser.add_argument("--drop", action="store_true", help="Drop the detached partitions.")
+
+    @log_execution_time(logger, level=logging.INFO)
+    def handle(self, *args, **options) -> None:
+        logger.info("   Measurement partitions - Starting...")
+
+        for model in PARTITIONED_MODELS:
+            manager = PartitionManager(model)
+
+            created = manager.create_upcoming(options["months_ahead"])
+            logger.info(f"{manager.table}: {len(created)} partitions created")
+
+            if options["retention_months"] is not None:
+                detached = manager.detach_older_than(options["retention_months"], drop=options["drop"])
+                action = "dropped" if options["drop"] else "detached"
+                logger.info(f"{manager.table}: {len(detached)} partitions {action}")
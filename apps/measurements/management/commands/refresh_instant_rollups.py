@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from apps.measurements.services import InstantRollupBuilder
+from apps.measurements.services.instant_rollups import REFRESH_LOOKBACK
+from apps.utils.helpers import log_execution_time
+
+logger = logging.getLogger("tasks")
+
+
+class Command(BaseCommand):
+    help = "Refreshes the 5 minutes, hourly and daily rollups of the instant measurements."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--lookback_minutes",
+            type=int,
+            default=int(REFRESH_LOOKBACK.total_seconds() // 60),
+            help="Refresh the buckets of the last minutes (default run, every 5 minutes).",
+        )
+        parser.add_argument("--start_date", type=str, default=None, help="Backfill from YYYY-MM-DD.")
+        parser.add_argument("--end_date", type=str, default=None, help="Backfill until YYYY-MM-DD (default: today).")
+
+    @log_execution_time(logger, level=logging.INFO)
+    def handle(self, *args, **options) -> None:
+        logger.info("   Instant rollups - Starting...")
+        builder = InstantRollupBuilder()
+        now = timezone.now()
+
+        if options["start_date"] is None:
+            refreshed = builder.refresh(now - timedelta(minutes=options["lookback_minutes"]), now)
+            logger.info(f"Rollups refreshed: {self.format_refreshed(refreshed)}")
+            return
+
+        # backfill one day per statement, keeps the transactions and the aggregations small
+        day = self.parse_date(options["start_date"])
+        end_date = self.parse_date(options["end_date"]) + timedelta(days=1) if options["end_date"] else now
+        while day < end_date:
+            next_day = min(day + timedelta(days=1), end_date)
+            refreshed = builder.refresh(day, next_day)
+            logger.debug(f"{day.date()}: {self.format_refreshed(refreshed)}")
+            day = next_day
+
+        logger.info(f"Rollups rebuilt from {options['start_date']} to {end_date.date()}")
+
+    def parse_date(self, value):
+        try:
+            return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d"))
+        except ValueError:
+            raise CommandError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+    def format_refreshed(self, refreshed):
+        return ", ".join(f"{resolution.label}: {rows}" for resolution, rows in refreshed.items())
@@ -1,19 +1,26 @@
 from datetime import timedelta
 
 from django.db import models
-from django.db.models import Avg, Count, F, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models import Avg, Count, F, Func, Max, Min, OuterRef, Subquery, Sum, Value, Window
 from django.db.models.expressions import ExpressionWrapper
-from django.db.models.fields import DateTimeField
+from django.db.models.fields import DateTimeField, DurationField
 from django.db.models.functions import (
     Concat,
     ExtractHour,
     ExtractMinute,
+    Least,
     Round,
+    RowNumber,
     TruncDay,
     TruncHour,
 )
 
 
+class DateBin(Func):
+    function = "date_bin"
+    output_field = DateTimeField()
+
+
 class CumulativeMeasurementsQuerySet(models.QuerySet):
     """
     This class defines custom Queryset to aggregate data from CumulativeMeasurements.
@@ -110,3 +117,50 @@ class CumulativeMeasurementsManager(models.Manager):
 
     def quarter_hourly_avg(self, agg_field):
         return self.get_queryset().quarter_hourly_avg(agg_field)
+
+
+class InstantMeasurementsQuerySet(models.QuerySet):
+    def m4(self, fields, start_date, end_date, n_buckets):
+        """
+        M4 in SQL: only the first, last, min and max rows of each field in each of `n_buckets`
+        equal time buckets of [start_date, end_date] are returned, ordered by date.
+        """
+        width = max((end_date - start_date) / n_buckets, timedelta(seconds=1))
+        return self.m4_grid(fields, width, start_date)
+
+    def m4_grid(self, fields, width, origin):
+        """
+        M4 over the buckets of `width` aligned to `origin` (date_bin): the result of a bucket with
+        all its rows does not depend on the queried period.
+
+        Every choice is a row_number() over the bucket; the rows ranked first in any of them are
+        kept with a single filter on their least rank (one window pass, no raw rows fetched).
+        """
+        bucket = DateBin(
+            Value(width, output_field=DurationField()),
+            F("collection_date"),
+            Value(origin, output_field=DateTimeField()),
+        )
+
+        orderings = [F("collection_date").asc(), F("collection_date").desc()]
+        for field in fields:
+            orderings.extend([F(field).asc(nulls_last=True), F(field).desc(nulls_last=True)])
+        ranks = [Window(RowNumber(), partition_by=[bucket], order_by=[ordering]) for ordering in orderings]
+
+        return (
+            self.annotate(m4_rank=Least(*ranks))
+            .filter(m4_rank=1)
+            .values("collection_date", *fields)
+            .order_by("collection_date")
+        )
+
+
+class InstantMeasurementsManager(models.Manager):
+    def get_queryset(self):
+        return InstantMeasurementsQuerySet(self.model, using=self._db)
+
+    def m4(self, fields, start_date, end_date, n_buckets):
+        return self.get_queryset().m4(fields, start_date, end_date, n_buckets)
+
+    def m4_grid(self, fields, width, origin):
+        return self.get_queryset().m4_grid(fields, width, origin)
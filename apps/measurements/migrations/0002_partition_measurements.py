@@ -0,0 +1,114 @@
+# Converts the measurement tables into tables partitioned by month on collection_date.
+# Upcoming partitions are created by the `manage_partitions` command (cronjob).
+
+import django.utils.timezone
+from django.db import migrations, models
+
+TABLES = [
+    ("measurements_instantmeasurement", "inst_transductor_date_idx"),
+    ("measurements_cumulativemeasurement", "cumu_transductor_date_idx"),
+]
+
+
+def partition_table_sql(table, index):
+    """
+    The table is rebuilt as `PARTITION BY RANGE (collection_date)`: the primary key must include
+    the partition key, so it becomes (id, collection_date) in the database only (Django keeps
+    using `id`). The identity sequence of the old table is renamed (and dropped with it) so the
+    new `{table}_id_seq` can be created. Monthly partitions (UTC) are created for the existing data plus a DEFAULT one.
+    """
+    return f"""
+        ALTER TABLE {table} RENAME TO {table}_old;
+        ALTER TABLE {table}_old RENAME CONSTRAINT {table}_pkey TO {table}_old_pkey;
+        ALTER INDEX {index} RENAME TO {index}_old;
+        ALTER SEQUENCE {table}_id_seq RENAME TO {table}_old_id_seq;
+        UPDATE {table}_old SET collection_date = now() WHERE collection_date IS NULL;
+
+        CREATE TABLE {table} (LIKE {table}_old INCLUDING DEFAULTS) PARTITION BY RANGE (collection_date);
+        CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id;
+        SELECT setval('{table}_id_seq', COALESCE((SELECT MAX(id) FROM {table}_old), 0) + 1, false);
+        ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq');
+        ALTER TABLE {table} ALTER COLUMN collection_date SET NOT NULL;
+        ALTER TABLE {table} ADD PRIMARY KEY (id, collection_date);
+        ALTER TABLE {table} ADD CONSTRAINT {table}_transductor_id_fk
+            FOREIGN KEY (transductor_id) REFERENCES transductors_transductor (id) DEFERRABLE INITIALLY DEFERRED;
+        CREATE INDEX {index} ON {table} (transductor_id, collection_date);
+
+        CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+
+        DO $$
+        DECLARE
+            month timestamptz;
+        BEGIN
+            FOR month IN
+                SELECT series AT TIME ZONE 'UTC'
+                FROM generate_series(
+                    (
+                        SELECT date_trunc('month', COALESCE(MIN(collection_date), now()) AT TIME ZONE 'UTC')
+                        FROM {table}_old
+                    ),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month',
+                    interval '1 month'
+                ) AS series
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(month AT TIME ZONE 'UTC', 'YYYYMM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+        END $$;
+
+        INSERT INTO {table} SELECT * FROM {table}_old;
+        DROP TABLE {table}_old;
+    """
+
+
+def unpartition_table_sql(table, index):
+    return f"""
+        ALTER TABLE {table} RENAME TO {table}_partitioned;
+        ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey;
+        ALTER INDEX {index} RENAME TO {index}_partitioned;
+        ALTER SEQUENCE {table}_id_seq RENAME TO {table}_partitioned_id_seq;
+
+        CREATE TABLE {table} (LIKE {table}_partitioned);
+        ALTER TABLE {table} ALTER COLUMN collection_date DROP NOT NULL;
+        INSERT INTO {table} SELECT * FROM {table}_partitioned;
+        ALTER TABLE {table} ADD PRIMARY KEY (id);
+        ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+        SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false);
+        ALTER TABLE {table} ADD CONSTRAINT {table}_transductor_id_fk
+            FOREIGN KEY (transductor_id) REFERENCES transductors_transductor (id) DEFERRABLE INITIALLY DEFERRED;
+        CREATE INDEX {index} ON {table} (transductor_id, collection_date);
+        CREATE INDEX {table}_transductor_id ON {table} (transductor_id);
+
+        DROP TABLE {table}_partitioned CASCADE;
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("measurements", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=partition_table_sql(table, index),
+            reverse_sql=unpartition_table_sql(table, index),
+        )
+        for table, index in TABLES
+    ] + [
+        # collection_date is part of the primary key (NOT NULL), already changed by the SQL above
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name=model_name,
+                    name="collection_date",
+                    field=models.DateTimeField(default=django.utils.timezone.now),
+                )
+                for model_name in ["instantmeasurement", "cumulativemeasurement"]
+            ],
+        ),
+    ]
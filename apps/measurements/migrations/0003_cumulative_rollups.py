@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rollup_fields():
+    return [
+        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+        ('active_consumption', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+        ('active_generated', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+        ('reactive_inductive', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+        ('reactive_capacitive', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+        ('measurements', models.PositiveIntegerField(default=0)),
+        ('first_collection_date', models.DateTimeField()),
+        ('last_collection_date', models.DateTimeField()),
+        ('is_peak', models.BooleanField(default=False)),
+        ('bucket', models.DateTimeField()),
+        ('updated', models.DateTimeField(auto_now=True)),
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0002_partition_measurements'),
+        ('transductors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyCumulativeMeasurement',
+            fields=rollup_fields() + [
+                ('transductor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='hourly_cumulative_measurements', to='transductors.transductor')),
+            ],
+            options={
+                'verbose_name': 'Hourly cumulative measurement',
+                'verbose_name_plural': 'Hourly Cumulative Measurements',
+                'ordering': ['-bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('transductor', 'bucket', 'is_peak'), name='hourly_cumu_unique_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCumulativeMeasurement',
+            fields=rollup_fields() + [
+                ('transductor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='daily_cumulative_measurements', to='transductors.transductor')),
+            ],
+            options={
+                'verbose_name': 'Daily cumulative measurement',
+                'verbose_name_plural': 'Daily Cumulative Measurements',
+                'ordering': ['-bucket'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('transductor', 'bucket', 'is_peak'), name='daily_cumu_unique_bucket')],
+            },
+        ),
+    ]
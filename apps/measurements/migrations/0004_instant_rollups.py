@@ -0,0 +1,34 @@
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0003_cumulative_rollups'),
+        ('transductors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantMeasurementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField(choices=[(300, '5 minutes'), (3600, 'Hourly'), (86400, 'Daily')])),
+                ('bucket', models.DateTimeField()),
+                ('measurements', models.PositiveIntegerField(default=0)),
+                ('avg_values', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), size=None)),
+                ('min_values', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), size=None)),
+                ('max_values', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), size=None)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('transductor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='instant_rollups', to='transductors.transductor')),
+            ],
+            options={
+                'verbose_name': 'Instant measurement rollup',
+                'verbose_name_plural': 'Instant Measurement Rollups',
+                'ordering': ['-bucket'],
+                'constraints': [models.UniqueConstraint(fields=('transductor', 'resolution', 'bucket'), name='instant_rollup_unique_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Compact (float4) copy of the instant measurements, partitioned by month like the other
+# measurement tables (see 0002_partition_measurements). The monthly partitions are created by the
+# `manage_partitions` command.
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+import apps.measurements.fields
+
+TABLE = "measurements_compactinstantmeasurement"
+
+CREATE_SQL = f"""
+    CREATE TABLE {TABLE} (
+        id bigint NOT NULL,
+        frequency_a real NULL,
+        frequency_b real NULL,
+        frequency_c real NULL,
+        frequency_iec real NULL,
+        voltage_a real NULL,
+        voltage_b real NULL,
+        voltage_c real NULL,
+        current_a real NULL,
+        current_b real NULL,
+        current_c real NULL,
+        active_power_a real NULL,
+        active_power_b real NULL,
+        active_power_c real NULL,
+        total_active_power real NULL,
+        reactive_power_a real NULL,
+        reactive_power_b real NULL,
+        reactive_power_c real NULL,
+        total_reactive_power real NULL,
+        apparent_power_a real NULL,
+        apparent_power_b real NULL,
+        apparent_power_c real NULL,
+        total_apparent_power real NULL,
+        power_factor_a real NULL,
+        power_factor_b real NULL,
+        power_factor_c real NULL,
+        total_power_factor real NULL,
+        dht_voltage_a real NULL,
+        dht_voltage_b real NULL,
+        dht_voltage_c real NULL,
+        dht_current_a real NULL,
+        dht_current_b real NULL,
+        dht_current_c real NULL,
+        collection_date timestamp with time zone NOT NULL,
+        transductor_id bigint NOT NULL
+    ) PARTITION BY RANGE (collection_date);
+    CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id;
+    ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq');
+    ALTER TABLE {TABLE} ADD PRIMARY KEY (id, collection_date);
+    ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_transductor_id_fk
+        FOREIGN KEY (transductor_id) REFERENCES transductors_transductor (id) DEFERRABLE INITIALLY DEFERRED;
+    CREATE INDEX compact_transductor_date_idx ON {TABLE} (transductor_id, collection_date);
+    CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0004_instant_rollups'),
+        ('transductors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=CREATE_SQL, reverse_sql=f"DROP TABLE {TABLE} CASCADE;"),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='CompactInstantMeasurement',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('frequency_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('frequency_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('frequency_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('frequency_iec', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('voltage_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('voltage_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('voltage_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('current_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('current_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('current_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('active_power_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('active_power_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('active_power_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('total_active_power', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('reactive_power_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('reactive_power_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('reactive_power_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('total_reactive_power', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('apparent_power_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('apparent_power_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('apparent_power_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('total_apparent_power', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('power_factor_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('power_factor_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('power_factor_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('total_power_factor', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('dht_voltage_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('dht_voltage_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('dht_voltage_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('dht_current_a', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('dht_current_b', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('dht_current_c', apps.measurements.fields.RealField(blank=True, null=True)),
+                        ('collection_date', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('transductor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='compact_instant_measurements', to='transductors.transductor')),
+                    ],
+                    options={
+                        'verbose_name': 'Compact instantaneous measurement',
+                        'verbose_name_plural': 'Compact Instantaneous Measurements',
+                        'ordering': ['-collection_date'],
+                        'indexes': [models.Index(fields=['transductor', 'collection_date'], name='compact_transductor_date_idx')],
+                    },
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# The (transductor, collection_date) btree indexes become covering indexes (INCLUDE the graphed
+# fields) and BRIN indexes are added on collection_date. Both are created on the partitioned
+# tables, PostgreSQL creates them on every partition.
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0005_compact_instant_measurements'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='instantmeasurement',
+            name='inst_transductor_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cumulativemeasurement',
+            name='cumu_transductor_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='instantmeasurement',
+            index=models.Index(fields=['transductor', 'collection_date'], include=('voltage_a', 'voltage_b', 'voltage_c', 'current_a', 'current_b', 'current_c', 'total_active_power', 'total_reactive_power', 'total_power_factor'), name='inst_transductor_date_cov_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='instantmeasurement',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['collection_date'], name='inst_date_brin_idx', pages_per_range=32),
+        ),
+        migrations.AddIndex(
+            model_name='cumulativemeasurement',
+            index=models.Index(fields=['transductor', 'collection_date'], include=('active_consumption', 'active_generated', 'reactive_inductive', 'reactive_capacitive'), name='cumu_transductor_date_cov_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cumulativemeasurement',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['collection_date'], name='cumu_date_brin_idx', pages_per_range=32),
+        ),
+    ]
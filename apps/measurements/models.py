@@ -1,14 +1,33 @@
 import logging
 
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from apps.measurements.managers import CumulativeMeasurementsManager
+from apps.measurements.fields import RealField
+from apps.measurements.managers import CumulativeMeasurementsManager, InstantMeasurementsManager
 from apps.transductors.models import Transductor
 
 logger = logging.getLogger("apps.measurements")
 
+# Fields stored in the covering (transductor, collection_date) indexes: the common graph and report
+# queries are answered with index-only scans. Rows are appended in collection_date order, so the
+# date ranges without transductor use small BRIN indexes.
+INSTANT_INDEXED_FIELDS = [
+    "voltage_a",
+    "voltage_b",
+    "voltage_c",
+    "current_a",
+    "current_b",
+    "current_c",
+    "total_active_power",
+    "total_reactive_power",
+    "total_power_factor",
+]
+CUMULATIVE_INDEXED_FIELDS = ["active_consumption", "active_generated", "reactive_inductive", "reactive_capacitive"]
+
 
 class InstantMeasurement(models.Model):
     frequency_a = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
@@ -43,13 +62,15 @@ class InstantMeasurement(models.Model):
     dht_current_a = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     dht_current_b = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     dht_current_c = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
-    collection_date = models.DateTimeField(null=True, blank=True)
+    collection_date = models.DateTimeField(default=timezone.now)  # partition key (monthly)
     transductor = models.ForeignKey(
         Transductor,
         related_name="instant_measurements",
         on_delete=models.PROTECT,
     )
 
+    objects = InstantMeasurementsManager()
+
     class Meta:
         verbose_name = _("Instantaneous measurement")
         verbose_name_plural = _("Instantaneous Measurements")
@@ -57,8 +78,10 @@ class InstantMeasurement(models.Model):
         indexes = [
             models.Index(
                 fields=["transductor", "collection_date"],
-                name="inst_transductor_date_idx",
+                include=INSTANT_INDEXED_FIELDS,
+                name="inst_transductor_date_cov_idx",
             ),
+            BrinIndex(fields=["collection_date"], pages_per_range=32, name="inst_date_brin_idx"),
         ]
 
     def __str__(self):
@@ -97,7 +120,7 @@ class CumulativeMeasurement(models.Model):
     reactive_inductive = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     reactive_capacitive = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     is_calculated = models.BooleanField(default=False)
-    collection_date = models.DateTimeField(null=True, blank=True)
+    collection_date = models.DateTimeField(default=timezone.now)  # partition key (monthly)
     transductor = models.ForeignKey(
         Transductor,
         related_name="cumulative_measurements",
@@ -113,8 +136,10 @@ class CumulativeMeasurement(models.Model):
         indexes = [
             models.Index(
                 fields=["transductor", "collection_date"],
-                name="cumu_transductor_date_idx",
+                include=CUMULATIVE_INDEXED_FIELDS,
+                name="cumu_transductor_date_cov_idx",
             ),
+            BrinIndex(fields=["collection_date"], pages_per_range=32, name="cumu_date_brin_idx"),
         ]
 
     def __str__(self):
@@ -124,3 +149,163 @@ class CumulativeMeasurement(models.Model):
         if self.collection_date is None:
             self.collection_date = timezone.now()
         super().save(*args, **kwargs)
+
+
+class CumulativeRollup(models.Model):
+    """
+    Sums of the cumulative measurements of a transductor in a time bucket (local time, by
+    `collection_date`), split in peak and off-peak rows with the same rule of the report.
+    Maintained incrementally by the cumulative ingestion (see services.rollups).
+    """
+
+    active_consumption = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True)
+    active_generated = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True)
+    reactive_inductive = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True)
+    reactive_capacitive = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True)
+    measurements = models.PositiveIntegerField(default=0)
+    first_collection_date = models.DateTimeField()
+    last_collection_date = models.DateTimeField()
+    is_peak = models.BooleanField(default=False)
+    bucket = models.DateTimeField()
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        ordering = ["-bucket"]
+
+    def __str__(self):
+        return f"{self.transductor_id} - {self.bucket} ({'peak' if self.is_peak else 'off-peak'})"
+
+
+class HourlyCumulativeMeasurement(CumulativeRollup):
+    transductor = models.ForeignKey(
+        Transductor,
+        related_name="hourly_cumulative_measurements",
+        on_delete=models.PROTECT,
+    )
+
+    class Meta(CumulativeRollup.Meta):
+        verbose_name = _("Hourly cumulative measurement")
+        verbose_name_plural = _("Hourly Cumulative Measurements")
+        constraints = [
+            models.UniqueConstraint(fields=["transductor", "bucket", "is_peak"], name="hourly_cumu_unique_bucket"),
+        ]
+
+
+class DailyCumulativeMeasurement(CumulativeRollup):
+    transductor = models.ForeignKey(
+        Transductor,
+        related_name="daily_cumulative_measurements",
+        on_delete=models.PROTECT,
+    )
+
+    class Meta(CumulativeRollup.Meta):
+        verbose_name = _("Daily cumulative measurement")
+        verbose_name_plural = _("Daily Cumulative Measurements")
+        constraints = [
+            models.UniqueConstraint(fields=["transductor", "bucket", "is_peak"], name="daily_cumu_unique_bucket"),
+        ]
+
+
+class InstantMeasurementRollup(models.Model):
+    """
+    Average, minimum and maximum of every instant field of a transductor in a time bucket.
+    The arrays follow the order of `services.instant_rollups.INSTANT_ROLLUP_FIELDS` (the
+    model field order); rebuild the rollups when the instant fields change.
+    """
+
+    class Resolution(models.IntegerChoices):
+        FIVE_MINUTES = 300, _("5 minutes")
+        HOURLY = 3600, _("Hourly")
+        DAILY = 86400, _("Daily")
+
+    resolution = models.PositiveIntegerField(choices=Resolution.choices)
+    bucket = models.DateTimeField()
+    measurements = models.PositiveIntegerField(default=0)
+    avg_values = ArrayField(models.FloatField(null=True))
+    min_values = ArrayField(models.FloatField(null=True))
+    max_values = ArrayField(models.FloatField(null=True))
+    updated = models.DateTimeField(auto_now=True)
+    transductor = models.ForeignKey(
+        Transductor,
+        related_name="instant_rollups",
+        on_delete=models.PROTECT,
+    )
+
+    class Meta:
+        verbose_name = _("Instant measurement rollup")
+        verbose_name_plural = _("Instant Measurement Rollups")
+        ordering = ["-bucket"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["transductor", "resolution", "bucket"],
+                name="instant_rollup_unique_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.transductor_id} - {self.bucket} ({self.get_resolution_display()})"
+
+
+class CompactInstantMeasurement(models.Model):
+    """
+    Compact copy of InstantMeasurement: the same fields stored as float4 instead of numeric,
+    read straight into NumPy arrays (services.compact_storage) without Decimal conversions.
+    Written along with InstantMeasurement when settings.INSTANT_STORAGE_MODE is "dual" and
+    instead of it when "compact"; the existing rows are copied with `copy_compact_measurements`.
+    """
+
+    frequency_a = RealField(blank=True, null=True)
+    frequency_b = RealField(blank=True, null=True)
+    frequency_c = RealField(blank=True, null=True)
+    frequency_iec = RealField(blank=True, null=True)
+    voltage_a = RealField(blank=True, null=True)
+    voltage_b = RealField(blank=True, null=True)
+    voltage_c = RealField(blank=True, null=True)
+    current_a = RealField(blank=True, null=True)
+    current_b = RealField(blank=True, null=True)
+    current_c = RealField(blank=True, null=True)
+    active_power_a = RealField(blank=True, null=True)
+    active_power_b = RealField(blank=True, null=True)
+    active_power_c = RealField(blank=True, null=True)
+    total_active_power = RealField(blank=True, null=True)
+    reactive_power_a = RealField(blank=True, null=True)
+    reactive_power_b = RealField(blank=True, null=True)
+    reactive_power_c = RealField(blank=True, null=True)
+    total_reactive_power = RealField(blank=True, null=True)
+    apparent_power_a = RealField(blank=True, null=True)
+    apparent_power_b = RealField(blank=True, null=True)
+    apparent_power_c = RealField(blank=True, null=True)
+    total_apparent_power = RealField(blank=True, null=True)
+    power_factor_a = RealField(blank=True, null=True)
+    power_factor_b = RealField(blank=True, null=True)
+    power_factor_c = RealField(blank=True, null=True)
+    total_power_factor = RealField(blank=True, null=True)
+    dht_voltage_a = RealField(blank=True, null=True)
+    dht_voltage_b = RealField(blank=True, null=True)
+    dht_voltage_c = RealField(blank=True, null=True)
+    dht_current_a = RealField(blank=True, null=True)
+    dht_current_b = RealField(blank=True, null=True)
+    dht_current_c = RealField(blank=True, null=True)
+    collection_date = models.DateTimeField(default=timezone.now)  # partition key (monthly)
+    transductor = models.ForeignKey(
+        Transductor,
+        related_name="compact_instant_measurements",
+        on_delete=models.PROTECT,
+    )
+
+    objects = InstantMeasurementsManager()
+
+    class Meta:
+        verbose_name = _("Compact instantaneous measurement")
+        verbose_name_plural = _("Compact Instantaneous Measurements")
+        ordering = ["-collection_date"]
+        indexes = [
+            models.Index(
+                fields=["transductor", "collection_date"],
+                name="compact_transductor_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.transductor_id} - {self.collection_date}"
@@ -1,7 +1,17 @@
+import json
+from base64 import b64decode, b64encode
 from collections import OrderedDict
+from datetime import datetime
+from urllib import parse
 
-from rest_framework.pagination import BasePagination, PageNumberPagination
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_APPROXIMATE = "approximate"
+COUNT_EXACT = "exact"
 
 
 class MeasurementPagination(PageNumberPagination):
@@ -11,6 +21,160 @@ class MeasurementPagination(PageNumberPagination):
     last_page_strings = ("last",)
 
 
+class MeasurementCursorPagination(BasePagination):
+    """
+    Keyset pagination on (collection_date, id), newest first.
+
+    The cursor keeps the key of the last (or first) row of the page and the next page is read
+    with `WHERE (collection_date, id) < key ORDER BY collection_date DESC, id DESC LIMIT n`:
+    an index range scan whose cost does not depend on the depth of the page, and no COUNT(*).
+    `count=approximate` adds the row estimate of the planner, `count=exact` a COUNT(*).
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-collection_date", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request.query_params.get(self.count_query_param))
+
+        cursor = self.decode_cursor(request)
+        self.reverse = cursor is not None and cursor["reverse"]
+        if cursor is not None:
+            queryset = queryset.filter(self.get_key_condition(cursor))
+
+        ordering = self.ordering if not self.reverse else [field.lstrip("-") for field in self.ordering]
+        rows = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else cursor is not None
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_key_condition(self, cursor):
+        """
+        (collection_date, id) < key, or > key going back. The redundant bound on collection_date
+        is the range of the index scan, the OR only resolves the rows of the same date.
+        """
+        date, pk = cursor["collection_date"], cursor["id"]
+        if cursor["reverse"]:
+            return Q(collection_date__gte=date) & (Q(collection_date__gt=date) | Q(id__gt=pk))
+        return Q(collection_date__lte=date) & (Q(collection_date__lt=date) | Q(id__lt=pk))
+
+    def get_count(self, queryset, mode):
+        if mode == COUNT_EXACT:
+            return queryset.count()
+        if mode == COUNT_APPROXIMATE:
+            plan = json.loads(queryset.order_by().explain(format="json"))
+            return plan[0]["Plan"]["Plan Rows"]
+        return None
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.last_row))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        cursor = self.encode_cursor(self.first_row, reverse=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def encode_cursor(self, row, reverse=False):
+        query = {"d": row.collection_date.isoformat(), "i": row.pk}
+        if reverse:
+            query["r"] = 1
+        return b64encode(parse.urlencode(query).encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            query = parse.parse_qs(b64decode(encoded.encode("ascii")).decode("ascii"), keep_blank_values=True)
+            return {
+                "collection_date": datetime.fromisoformat(query["d"][0]),
+                "id": int(query["i"][0]),
+                "reverse": bool(int(query.get("r", ["0"])[0])),
+            }
+        except (TypeError, KeyError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Adds the total: 'approximate' (planner estimate) or 'exact' (COUNT).",
+                "schema": {"type": "string", "enum": [COUNT_APPROXIMATE, COUNT_EXACT]},
+            },
+        ]
+
+
 class ChartDataPagination(BasePagination):
     def paginate_queryset(self, queryset, request, view=None):
         page_size = request.query_params.get("page_size")
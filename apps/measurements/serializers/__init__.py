@@ -12,9 +12,11 @@ from .graph_report import (
     UferSerializer,
 )
 from .query_params import (
+    CumulativeExportQuerySerializer,
     CumulativeGraphQuerySerializer,
     CumulativeMeasurementQuerySerializer,
     DailyProfileQuerySerializer,
+    InstantExportQuerySerializer,
     InstantGraphQuerySerializer,
     InstantMeasurementQuerySerializer,
     ReportQuerySerializer,
@@ -24,10 +26,12 @@ from .query_params import (
 __all__ = [
     "CumulativeMeasurementSerializer",
     "CumulativeMeasurementQuerySerializer",
+    "CumulativeExportQuerySerializer",
     "CumulativeGraphQuerySerializer",
     "DailyProfileQuerySerializer",
     "DailyProfileSerializer",
     "GraphDataSerializer",
+    "InstantExportQuerySerializer",
     "InstantGraphQuerySerializer",
     "InstantMeasurementSerializer",
     "InstantMeasurementQuerySerializer",
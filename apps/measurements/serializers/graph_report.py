@@ -1,5 +1,6 @@
 import logging
 
+import pandas as pd
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema_serializer
 from rest_framework import serializers
@@ -15,6 +16,11 @@ from apps.transductors.models import Transductor
 logger = logging.getLogger("apps.measurements.serializers.graph_report")
 
 
+def to_json_value(value):
+    """Missing measurements (NULL columns read as NaN) are serialised as null, NaN is not JSON."""
+    return None if pd.isna(value) else value
+
+
 @extend_schema_serializer(examples=[ufer_report_example])
 class UferSerializer(serializers.Serializer):
     total_measurements = serializers.IntegerField()
@@ -126,14 +132,19 @@ class GraphDataSerializer(serializers.Serializer):
         timestamp = instance.collection_date.apply(lambda ts: ts.astimezone(tz))
         rep["timestamp"] = timestamp.tolist()
 
+        # data read from the rollups carries the extremes of the period (the values are averages)
+        max_values = instance.attrs.get("max_values", {})
+        min_values = instance.attrs.get("min_values", {})
+
         traces = []
         for field in rep["information"]["fields"]:
+            values = instance[field]
             field_data = {
                 "field": field,
-                "avg_value": instance[field].mean().round(2),
-                "max_value": instance[field].max(),
-                "min_value": instance[field].min(),
-                "values": instance[field].tolist(),
+                "avg_value": to_json_value(round(values.mean(), 2)),
+                "max_value": to_json_value(max_values.get(field, values.max())),
+                "min_value": to_json_value(min_values.get(field, values.min())),
+                "values": values.astype(object).where(values.notna(), None).tolist(),
             }
             traces.append(field_data)
         rep["traces"] = traces
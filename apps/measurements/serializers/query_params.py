@@ -6,6 +6,7 @@ from rest_framework import serializers
 
 from apps.measurements.models import CumulativeMeasurement, InstantMeasurement
 from apps.measurements.serializers.utils import field_params
+from apps.measurements.services.downsampler import DOWNSAMPLING_METHODS, LTTB, NO_DOWNSAMPLING
 
 logger = logging.getLogger("apps.measurements.serializers.query_params")
 
@@ -72,8 +73,18 @@ class CumulativeMeasurementQuerySerializer(BaseQuerySerializer):
         ]
 
 
+class InstantExportQuerySerializer(InstantMeasurementQuerySerializer):
+    gzip = serializers.BooleanField(required=False, **field_params("gzip"))
+
+
+class CumulativeExportQuerySerializer(CumulativeMeasurementQuerySerializer):
+    gzip = serializers.BooleanField(required=False, **field_params("gzip"))
+
+
 class InstantGraphQuerySerializer(InstantMeasurementQuerySerializer):
     lttb = serializers.BooleanField(required=False, **field_params("lttb"))
+    method = serializers.ChoiceField(choices=DOWNSAMPLING_METHODS, required=False, **field_params("method"))
+    since = serializers.DateTimeField(required=False, **field_params("since"))
     threshold = serializers.IntegerField(min_value=2, required=False, **field_params("threshold"))
     only_day = serializers.BooleanField(required=False, **field_params("only_day"))
 
@@ -86,6 +97,12 @@ class InstantGraphQuerySerializer(InstantMeasurementQuerySerializer):
             raise serializers.ValidationError("Invalid value for 'lttb' parameter. Use 'true' or 'false'.")
         return bool(value)
 
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not attrs.get("method"):
+            attrs["method"] = LTTB if attrs.get("lttb", True) else NO_DOWNSAMPLING
+        return attrs
+
 
 class DailyProfileQuerySerializer(CumulativeMeasurementQuerySerializer):
     detail = serializers.BooleanField(required=False, **field_params("detail_profile"))
@@ -53,6 +53,14 @@ def field_params(field_type):
             "help_text": "Enable or disable the LTTB filter.",
             "default": True,
         },
+        "method": {
+            "help_text": "Downsampling method: 'lttb', 'minmax_lttb', 'm4' or 'none' "
+            "(default 'lttb', 'none' with lttb=false).",
+        },
+        "since": {
+            "help_text": "Only points after this date (last timestamp received), downsampled with M4 over "
+            "buckets anchored to fixed times, so the points already received don't change.",
+        },
         "threshold": {
             "help_text": "Threshold value to filter LTTB.",
             "default": settings.LIMIT_FILTER,
@@ -101,6 +109,10 @@ def field_params(field_type):
             "help_text": "Return the detailed report with the aggregation per transductor.",
             "default": False,
         },
+        "gzip": {
+            "help_text": "Compress the exported file with gzip (.csv.gz).",
+            "default": False,
+        },
     }
 
     msgs = error_msgs(field_type)
@@ -1,5 +1,17 @@
+from .bulk_ingestion import CumulativeMeasurementBulkIngestor  # noqa
+from .bulk_ingestion import InstantMeasurementBulkIngestor  # noqa
+from .arrow_export import ArrowExporter, generate_arrow_response  # noqa
+from .compact_storage import CompactMeasurementReader, copy_to_compact  # noqa
 from .csv_generator import CSVGenerator, generate_csv_response  # noqa
+from .dataframe_loader import QuerysetLoader, queryset_to_dataframe  # noqa
 from .data_aggregator import ReportDataAggregator  # noqa
+from .data_aggregator import ReportRollupAggregator  # noqa
 from .data_aggregator import UferDataAggregator  # noqa
-from .downsampler import LTTBDownSampler  # noqa
+from .downsampler import DOWNSAMPLERS, LTTBDownSampler, M4DownSampler, MinMaxLTTBDownSampler  # noqa
+from .lttb import lttb_indices, lttb_matrix, m4_matrix, minmax_lttb_matrix  # noqa
+from .instant_rollups import InstantRollupBuilder, InstantRollupReader, choose_resolution  # noqa
 from .measurement_manager import CumulativeMeasurementManager  # noqa
+from .partitions import PARTITIONED_MODELS, PartitionManager  # noqa
+from .response_cache import cache_response, etag_response  # noqa
+from .retention import RetentionEngine, RetentionPolicy, get_policies  # noqa
+from .rollups import CumulativeRollup, refresh_rollups  # noqa
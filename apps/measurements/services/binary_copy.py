@@ -0,0 +1,106 @@
+import struct
+
+import numpy as np
+from django.db import connection
+
+# binary COPY: timestamptz are int64 microseconds since 2000-01-01 UTC
+PG_EPOCH = np.datetime64("2000-01-01T00:00:00", "us")
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_HEADER = struct.Struct(">11sii")  # signature, flags, header extension length
+COPY_TRAILER = b"\xff\xff"
+
+# big-endian formats of the fixed size PostgreSQL types
+FLOAT4 = ">f4"
+FLOAT8 = ">f8"
+INT8 = ">i8"
+TIMESTAMP = ">i8"
+BOOL = "u1"
+
+
+def row_dtype(columns):
+    """
+    Structured dtype of a binary COPY row: number of columns, then (length, value) per column.
+    Valid only when no column is NULL (the rows must have a fixed size), use COALESCE.
+    `columns` is a list of (name, format).
+    """
+    items = [("columns", ">i2")]
+    for name, format_ in columns:
+        items.extend([(f"{name}_length", ">i4"), (name, format_)])
+    return np.dtype(items)
+
+
+def to_datetime64(values):
+    """
+    Binary COPY timestamps (PostgreSQL epoch) as datetime64[us] (UTC).
+    """
+    return PG_EPOCH + values.astype(np.int64).astype("timedelta64[us]")
+
+
+class BinaryCopyDecoder:
+    """
+    Incremental decoder of the `COPY ... TO STDOUT (FORMAT BINARY)` output: the data blocks are
+    fed as they arrive and every complete row is returned at once with `np.frombuffer`.
+    """
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.buffer = bytearray()
+        self.header_read = False
+
+    def feed(self, data):
+        self.buffer += data
+        if not self.header_read and not self._read_header():
+            return np.empty(0, dtype=self.dtype)
+
+        size = len(self.buffer) // self.dtype.itemsize * self.dtype.itemsize
+        records = np.frombuffer(bytes(self.buffer[:size]), dtype=self.dtype)
+        del self.buffer[:size]
+        return records
+
+    def close(self):
+        if self.buffer and bytes(self.buffer) != COPY_TRAILER:
+            raise ValueError("Truncated binary COPY payload.")
+
+    def _read_header(self):
+        if len(self.buffer) < COPY_HEADER.size:
+            return False
+
+        signature, _, extension_length = COPY_HEADER.unpack_from(self.buffer)
+        if signature != COPY_SIGNATURE:
+            raise ValueError("Invalid binary COPY payload.")
+        if len(self.buffer) < COPY_HEADER.size + extension_length:
+            return False
+
+        del self.buffer[: COPY_HEADER.size + extension_length]
+        self.header_read = True
+        return True
+
+
+def stream_copy(sql, params, dtype, batch_rows=None):
+    """
+    Runs `sql` with a binary COPY and yields structured arrays of `batch_rows` rows (the last one
+    can be smaller). With batch_rows=None the whole result is returned in a single array.
+    """
+    decoder = BinaryCopyDecoder(dtype)
+    pending, pending_rows = [], 0
+
+    with connection.cursor() as cursor:
+        # psycopg cursor: Django's debug wrapper (DEBUG=True) doesn't accept the COPY params
+        with cursor.cursor.copy(f"COPY ({sql}) TO STDOUT (FORMAT BINARY)", params) as copy:
+            for data in copy:
+                records = decoder.feed(bytes(data))
+                if not len(records):
+                    continue
+
+                pending.append(records)
+                pending_rows += len(records)
+                if batch_rows and pending_rows >= batch_rows:
+                    batch = np.concatenate(pending)
+                    for start in range(0, len(batch) - batch_rows + 1, batch_rows):
+                        yield batch[start : start + batch_rows]
+                    rest = batch[len(batch) // batch_rows * batch_rows :]
+                    pending, pending_rows = ([rest], len(rest)) if len(rest) else ([], 0)
+
+    decoder.close()
+    if pending or batch_rows is None:
+        yield np.concatenate(pending) if pending else np.empty(0, dtype=dtype)
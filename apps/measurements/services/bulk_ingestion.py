@@ -0,0 +1,309 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.measurements.models import (
+    CompactInstantMeasurement,
+    CumulativeMeasurement,
+    InstantMeasurement,
+    ReferenceMeasurement,
+)
+from apps.measurements.services.compact_storage import reads_compact, writes_compact
+from apps.measurements.services.instant_rollups import refresh_late_rollups
+from apps.measurements.services.rollups import refresh_rollups
+from apps.measurements.signals import measurements_created
+from apps.transductors.models import Transductor
+
+logger = logging.getLogger("apps")
+
+MINUTES_INTERVAL = 15
+
+
+class BulkMeasurementIngestor:
+    """
+    Base class to ingest the data of a whole collection sweep at once.
+
+    The rows (dicts returned by the modbus collector) are validated in batch with NumPy, instead
+    of running every DecimalField through a serializer, and written with a single `bulk_create`.
+    `measurements_created` is sent once for the batch so the triggers are evaluated together.
+    Invalid rows are skipped and reported in `errors`.
+    """
+
+    model = None
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.errors = []
+        self.decimal_fields = [
+            field  #
+            for field in self.model._meta.concrete_fields
+            if isinstance(field, models.DecimalField)
+        ]
+
+    def ingest(self, rows, collection_date=None):
+        rows = self.validate(rows, collection_date or timezone.now())
+        if not rows:
+            return []
+
+        with transaction.atomic():
+            created = self.save(rows)
+
+        measurements_created.send(sender=self.model, instances=created)
+        return created
+
+    def save(self, rows):
+        instances = [self.model(**row) for row in rows]
+        return self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+
+    def validate(self, rows, collection_date):
+        """
+        Returns the valid rows, with decimal values rounded, `transductor` resolved to an instance
+        and `collection_date` filled in (the same date for the whole sweep when missing).
+        """
+        if not rows:
+            return []
+
+        transductors = self.get_transductors(rows)
+        values, missing, invalid = self.validate_decimal_fields(rows)
+        field_names = [field.name for field in self.decimal_fields]
+
+        valid_rows = []
+        for row, row_values, row_missing, row_invalid in zip(rows, values, missing, invalid):
+            transductor = transductors.get(row.get("transductor"))
+            errors = {name: "Invalid value." for name, is_invalid in zip(field_names, row_invalid) if is_invalid}
+            if transductor is None:
+                errors["transductor"] = f"Invalid pk \"{row.get('transductor')}\" - object does not exist."
+
+            if errors:
+                self.add_error(errors, row)
+                continue
+
+            data = {
+                name: None if is_missing else value  #
+                for name, value, is_missing in zip(field_names, row_values, row_missing)
+            }
+            data["transductor"] = transductor
+            data["collection_date"] = row.get("collection_date") or collection_date
+            valid_rows.append(data)
+
+        return valid_rows
+
+    def validate_decimal_fields(self, rows):
+        """
+        Vectorised equivalent of the DecimalField validation: values are rounded to the field
+        decimal places and must fit in max_digits. Missing values (None) are allowed (null=True).
+        """
+        field_names = [field.name for field in self.decimal_fields]
+        missing = np.array([[row.get(name) is None for name in field_names] for row in rows], dtype=bool)
+        values = np.array(
+            [[self._to_float(row.get(name)) for name in field_names] for row in rows],
+            dtype=np.float64,
+        )
+
+        decimal_places = np.array([field.decimal_places for field in self.decimal_fields])
+        for places in np.unique(decimal_places):
+            columns = decimal_places == places
+            values[:, columns] = np.round(values[:, columns], int(places))
+
+        limits = np.array([10.0 ** (field.max_digits - field.decimal_places) for field in self.decimal_fields])
+        with np.errstate(invalid="ignore"):
+            invalid = ~missing & ~(np.abs(values) < limits)  # NaN/inf are invalid too
+
+        return values.tolist(), missing.tolist(), invalid.tolist()
+
+    def get_transductors(self, rows):
+        ids = {row.get("transductor") for row in rows if isinstance(row.get("transductor"), int)}
+        return Transductor.objects.in_bulk(ids)
+
+    def add_error(self, errors, row):
+        error_message = {
+            "error": errors,
+            "data": row,
+            "timestamp": timezone.now().isoformat(),
+        }
+        self.errors.append(error_message)
+        logger.error(f"Data validation error: {error_message}")
+
+    @staticmethod
+    def _to_float(value):
+        if value is None:
+            return np.nan
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.inf
+
+
+class InstantMeasurementBulkIngestor(BulkMeasurementIngestor):
+    """
+    The rollups of the recent buckets are refreshed by the `refresh_instant_rollups` cronjob; the
+    ones of late measurements (older than its lookback) after the commit.
+    """
+
+    model = InstantMeasurement
+
+    def ingest(self, rows, collection_date=None):
+        created = super().ingest(rows, collection_date)
+        try:
+            refresh_late_rollups(created)
+        except Exception as e:
+            # the measurements are saved; the rollups are fixed by a backfill
+            logger.error(f"Error refreshing the instant rollups: {e}")
+        return created
+
+    def save(self, rows):
+        """
+        In "compact" storage only the float4 rows are written; the measurements returned (sent to
+        the triggers and the rollups) are then unsaved InstantMeasurement instances.
+        """
+        created = [self.model(**row) for row in rows] if reads_compact() else super().save(rows)
+        if writes_compact():
+            # the validated rows already hold floats, no Decimal is built for the compact copy
+            compact = [CompactInstantMeasurement(**row) for row in rows]
+            CompactInstantMeasurement.objects.bulk_create(compact, batch_size=self.batch_size)
+        return created
+
+
+class CumulativeMeasurementBulkIngestor(BulkMeasurementIngestor):
+    """
+    Batched version of `CumulativeMeasurementSerializer.create` + `CumulativeMeasurementManager`.
+
+    The meters send the accumulated register values; the stored measurement is the delta against
+    the ReferenceMeasurement of the transductor. All the references of the sweep are loaded in one
+    query, the deltas and gap-filled rows are computed with NumPy, and the measurements plus the
+    updated references are written with two bulk statements in the same transaction.
+
+    - New transductor: reference created, the measurement is stored with zeros.
+    - Missed intervals: the delta is split evenly in `is_calculated` rows every 15 minutes,
+      starting at the reference date.
+    - Value lower than the reference (meter reset/replaced): the row is discarded and the
+      reference is kept.
+
+    The hourly/daily rollups of the buckets touched by the batch are refreshed after the commit.
+    """
+
+    model = CumulativeMeasurement
+    cumulative_fields = ["active_consumption", "active_generated", "reactive_inductive", "reactive_capacitive"]
+
+    def ingest(self, rows, collection_date=None):
+        created = super().ingest(rows, collection_date)
+        try:
+            refresh_rollups(created)
+        except Exception as e:
+            # the measurements are saved; the rollups are fixed by the next refresh or a backfill
+            logger.error(f"Error refreshing the cumulative rollups: {e}")
+        return created
+
+    def save(self, rows):
+        transductor_ids = [row["transductor"].id for row in rows]
+        references = ReferenceMeasurement.objects.in_bulk(transductor_ids, field_name="transductor")
+
+        new_values = self._values_array(rows)
+        last_values = np.array(
+            [
+                [self._to_float(getattr(references.get(pk), field, 0)) for field in self.cumulative_fields]
+                for pk in transductor_ids
+            ],
+            dtype=np.float64,
+        )
+        last_values = np.nan_to_num(last_values, nan=0.0)
+        is_new = np.array([pk not in references for pk in transductor_ids], dtype=bool)
+
+        deltas = np.where(is_new[:, None], 0.0, new_values - last_values)
+        with np.errstate(invalid="ignore"):
+            negative = (deltas < 0).any(axis=1)
+
+        for row in (row for row, is_negative in zip(rows, negative) if is_negative):
+            self.add_error({"cumulative": "Value lower than the reference measurement."}, row)
+
+        intervals = self._calculate_intervals_missing(rows, references, is_new)
+
+        keep = ~negative
+        instances = self._build_instances(
+            [row for row, is_kept in zip(rows, keep) if is_kept],
+            [references.get(pk) for pk, is_kept in zip(transductor_ids, keep) if is_kept],
+            deltas[keep],
+            intervals[keep],
+        )
+        updated_references = self._build_references(
+            [row for row, is_kept in zip(rows, keep) if is_kept],
+            [references.get(pk) for pk, is_kept in zip(transductor_ids, keep) if is_kept],
+        )
+
+        created = self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+        ReferenceMeasurement.objects.bulk_create(
+            updated_references,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["transductor"],
+            update_fields=[*self.cumulative_fields, "updated"],
+        )
+        return created
+
+    def _values_array(self, rows):
+        return np.array(
+            [[self._to_float(row.get(field)) for field in self.cumulative_fields] for row in rows],
+            dtype=np.float64,
+        )
+
+    def _calculate_intervals_missing(self, rows, references, is_new):
+        """
+        Number of 15 minutes intervals between the reference update and the new collection.
+        """
+        interval = timedelta(minutes=MINUTES_INTERVAL).total_seconds()
+        elapsed = np.array(
+            [
+                0.0 if new else (row["collection_date"] - references[row["transductor"].id].updated).total_seconds()
+                for row, new in zip(rows, is_new)
+            ],
+            dtype=np.float64,
+        )
+        return np.maximum(elapsed // interval, 0).astype(np.int64)
+
+    def _build_instances(self, rows, references, deltas, intervals):
+        """
+        One measurement per row, or `intervals` calculated rows when collections were missed.
+        """
+        gaps = intervals > 1
+        chunks = np.round(deltas / np.where(gaps, intervals, 1)[:, None], 2)
+        chunks = np.where(gaps[:, None], chunks, np.round(deltas, 2))
+
+        instances = []
+        for row, reference, chunk, count, is_gap in zip(rows, references, chunks.tolist(), intervals, gaps):
+            data = {
+                field: None if np.isnan(value) else value  #
+                for field, value in zip(self.cumulative_fields, chunk)
+            }
+
+            if not is_gap:
+                instances.append(
+                    self.model(transductor=row["transductor"], collection_date=row["collection_date"], **data)
+                )
+                continue
+
+            instances.extend(
+                self.model(
+                    transductor=row["transductor"],
+                    collection_date=reference.updated + timedelta(minutes=MINUTES_INTERVAL * pos),
+                    is_calculated=True,
+                    **data,
+                )
+                for pos in range(count)
+            )
+        return instances
+
+    def _build_references(self, rows, references):
+        """
+        Unsaved references with the new accumulated values; missing values keep the previous one.
+        """
+        updated_references = []
+        for row, reference in zip(rows, references):
+            data = {
+                field: row.get(field) if row.get(field) is not None else getattr(reference, field, None)
+                for field in self.cumulative_fields
+            }
+            updated_references.append(ReferenceMeasurement(transductor=row["transductor"], **data))
+        return updated_references
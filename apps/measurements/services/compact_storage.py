@@ -0,0 +1,124 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.measurements.fields import RealField
+from apps.measurements.models import CompactInstantMeasurement, InstantMeasurement
+from apps.measurements.services.binary_copy import FLOAT4, TIMESTAMP, row_dtype, stream_copy, to_datetime64
+from apps.measurements.services.response_cache import invalidate_all
+
+logger = logging.getLogger("apps")
+
+STORAGE_DECIMAL = "decimal"
+STORAGE_DUAL = "dual"
+STORAGE_COMPACT = "compact"
+
+COMPACT_FIELDS = [
+    field.name  #
+    for field in CompactInstantMeasurement._meta.concrete_fields
+    if isinstance(field, RealField)
+]
+
+ONLY_DAY_HOURS = (6, 19)  # same hours of BaseMeasurementFilter.filter_only_day
+
+
+def writes_compact():
+    return settings.INSTANT_STORAGE_MODE in (STORAGE_DUAL, STORAGE_COMPACT)
+
+
+def reads_compact():
+    return settings.INSTANT_STORAGE_MODE == STORAGE_COMPACT
+
+
+def instant_model():
+    """
+    Model of the stored instant measurements read by the graphs, reports, exports and rollups.
+    """
+    return CompactInstantMeasurement if reads_compact() else InstantMeasurement
+
+
+class CompactMeasurementReader:
+    """
+    Reads the compact instant measurements straight into NumPy arrays.
+
+    The rows are streamed with `COPY ... TO STDOUT (FORMAT BINARY)`; NULLs are sent as NaN, so
+    every row has the same size and the payload is decoded with `np.frombuffer` over a structured
+    (big-endian) dtype (services.binary_copy): no Python object is created per value.
+    """
+
+    def fetch_arrays(self, transductor, fields, start_date=None, end_date=None, only_day=False):
+        """
+        Returns {"collection_date": datetime64[us] (UTC), field: float32 array, ...} ordered by date.
+        """
+        fields = list(fields)
+        sql, params = self.get_sql(transductor, fields, start_date, end_date, only_day)
+        dtype = row_dtype([("collection_date", TIMESTAMP), *((field, FLOAT4) for field in fields)])
+        records = next(stream_copy(sql, params, dtype))
+
+        arrays = {"collection_date": to_datetime64(records["collection_date"])}
+        for field in fields:
+            arrays[field] = records[field].astype(np.float32)
+        return arrays
+
+    def dataframe(self, transductor, fields, start_date=None, end_date=None, only_day=False):
+        """
+        Same columns of the raw graph queryset: `collection_date` (aware, UTC) and the fields.
+        """
+        arrays = self.fetch_arrays(transductor, fields, start_date, end_date, only_day)
+        data = pd.DataFrame({field: arrays[field] for field in fields})
+        data.insert(0, "collection_date", pd.to_datetime(arrays["collection_date"], utc=True))
+        return data
+
+    def get_sql(self, transductor, fields, start_date, end_date, only_day):
+        quote = connection.ops.quote_name
+        columns = ", ".join(f"COALESCE({quote(field)}, 'NaN'::real)" for field in fields)
+
+        conditions = ["transductor_id = %s"]
+        params = [transductor]
+        if start_date:
+            conditions.append("collection_date >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("collection_date <= %s")
+            params.append(end_date)
+        if only_day:
+            conditions.append("extract(hour FROM collection_date AT TIME ZONE %s) >= %s")
+            conditions.append("extract(hour FROM collection_date AT TIME ZONE %s) < %s")
+            params.extend([settings.TIME_ZONE, ONLY_DAY_HOURS[0], settings.TIME_ZONE, ONLY_DAY_HOURS[1]])
+
+        select = (
+            f"SELECT collection_date{', ' if columns else ''}{columns} "
+            f"FROM {quote(CompactInstantMeasurement._meta.db_table)} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY collection_date"
+        )
+        return select, params
+
+
+def copy_to_compact(start_date, end_date):
+    """
+    Copies the instant measurements of [start_date, end_date) to the compact table, replacing the
+    compact rows of the period (the copy can be re-run). Returns the number of rows copied.
+    """
+    quote = connection.ops.quote_name
+    compact_table = quote(CompactInstantMeasurement._meta.db_table)
+    columns = ", ".join(quote(field) for field in COMPACT_FIELDS)
+    values = ", ".join(f"{quote(field)}::real" for field in COMPACT_FIELDS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {compact_table} WHERE collection_date >= %s AND collection_date < %s",
+            [start_date, end_date],
+        )
+        cursor.execute(
+            f"INSERT INTO {compact_table} ({columns}, collection_date, transductor_id) "
+            f"SELECT {values}, collection_date, transductor_id "
+            f"FROM {quote(InstantMeasurement._meta.db_table)} "
+            "WHERE collection_date >= %s AND collection_date < %s",
+            [start_date, end_date],
+        )
+        copied = cursor.rowcount
+    invalidate_all(start_date)
+    return copied
@@ -1,47 +1,81 @@
 import csv
 import logging
+import zlib
 from io import StringIO
+from itertools import islice
 
-from django.http import HttpResponse
+import pandas as pd
+from django.db import models
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
 logger = logging.getLogger("apps.measurements.services.csv_generator")
 
 
 class CSVGenerator:
-    def __init__(self, queryset, fields=None):
+    """
+    Streams a queryset as CSV text chunks, in constant memory.
+
+    Rows are read with `values_list().iterator(chunk_size)` (server side cursor, no model
+    instances) and written chunk by chunk with pandas: the datetimes of a chunk are converted to
+    the current time zone at once and written in ISO 8601 (`isoformat`, offset as -03:00).
+    """
+
+    def __init__(self, queryset, fields=None, chunk_size=5000):
         self.queryset = queryset
-        self.fields = fields
+        self.fields = fields or [field.name for field in queryset.model._meta.concrete_fields]
+        self.chunk_size = chunk_size
+        self.datetime_fields = [
+            name  #
+            for name in self.fields
+            if isinstance(queryset.model._meta.get_field(name), models.DateTimeField)
+        ]
 
-    def generate_csv(self):
-        csv_file = StringIO()
-        csv_writer = csv.writer(csv_file)
+    def iter_csv(self):
+        yield self.header()
+
+        rows = self.queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield self.format_chunk(chunk)
 
-        if not self.fields:
-            self.fields = [field.name for field in self.queryset.model._meta.fields]
+    def header(self):
+        header = StringIO()
+        csv.writer(header, lineterminator="\n").writerow(self.fields)
+        return header.getvalue()
 
-        csv_writer.writerow(self.fields)
+    def format_chunk(self, rows):
+        data = pd.DataFrame.from_records(rows, columns=self.fields)
         tz = timezone.get_current_timezone()
+        for name in self.datetime_fields:
+            dates = pd.to_datetime(data[name], utc=True).dt.tz_convert(tz)
+            data[name] = dates.map(lambda date: date.isoformat(), na_action="ignore")
+        return data.to_csv(header=False, index=False, lineterminator="\n")
+
+    def generate_csv(self):
+        """
+        Whole CSV as a string (small querysets only, the response streams `iter_csv`).
+        """
+        return "".join(self.iter_csv())
 
-        for instance in self.queryset:
-            row = []
-            for field in self.fields:
-                value = getattr(instance, field)
-                if hasattr(value, "isoformat"):
-                    value = value.astimezone(tz).isoformat()
-                elif isinstance(value, str):
-                    value = value.encode("utf-8")
-                row.append(value)
-            csv_writer.writerow(row)
 
-        csv_file.seek(0)
-        return csv_file.getvalue()
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8"))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
 
-def generate_csv_response(queryset, fields=None, filename="data.csv"):
+def generate_csv_response(queryset, fields=None, filename="data.csv", compress=False):
     csv_generator = CSVGenerator(queryset, fields)
-    csv_data = csv_generator.generate_csv()
+    content = csv_generator.iter_csv()
+
+    if compress:
+        response = StreamingHttpResponse(gzip_stream(content), content_type="application/gzip")
+        filename = f"{filename}.gz"
+    else:
+        response = StreamingHttpResponse(content, content_type="text/csv")
 
-    response = HttpResponse(csv_data, content_type="text/csv")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
@@ -1,6 +1,7 @@
-from django.conf import settings
 from django.db.models import Case, Count, Max, Min, Q, Sum, When
 
+from apps.measurements.services.rollups import HOURLY, CumulativeRollup, peak_condition
+
 
 class ReportDataAggregator:
     def __init__(self) -> None:
@@ -14,11 +15,7 @@ class ReportDataAggregator:
         }
 
     def get_filter_condition(self):
-        return (
-            Q(collection_date__time__gte=settings.PEAK_TIME_START)
-            & Q(collection_date__time__lte=settings.PEAK_TIME_END)
-            & Q(collection_date__iso_week_day__lte=5)
-        )
+        return peak_condition()
 
     def perform_aggregation(self, queryset, fields, detail=False):
         filter_conditions = self.get_filter_condition()
@@ -38,6 +35,77 @@ class ReportDataAggregator:
         return annotations
 
 
+class ReportRollupAggregator(ReportDataAggregator):
+    """
+    Same output of ReportDataAggregator, reading the whole hours of the period from the hourly
+    rollups and only the partial hours at its edges from the raw measurements.
+    """
+
+    def setup(self):
+        super().setup()
+        self.rollup = CumulativeRollup(HOURLY)
+        self.rollup_aggregations = {
+            "start_date": Min("first_collection_date"),
+            "end_date": Max("last_collection_date"),
+            "total_measurements": Sum("measurements"),
+        }
+
+    def perform_aggregation(self, transductors, fields, start_date, end_date, detail=False):
+        bucket_range, edges = self.rollup.plan_period(transductors, start_date, end_date)
+
+        results = []
+        if bucket_range is not None:
+            queryset = self.rollup.rollup_queryset(transductors, bucket_range)
+            annotations = self.prepare_annotations(fields, Q(is_peak=True), self.rollup_aggregations)
+            results.append(self._aggregate(queryset, annotations, detail))
+
+        if edges is not None:
+            queryset = self.rollup.raw_queryset(transductors, edges)
+            results.append(super().perform_aggregation(queryset, fields, detail))
+
+        if detail:
+            return self.merge_detail(results)
+        return self.merge_summary(results)
+
+    def _aggregate(self, queryset, annotations, detail):
+        if detail:
+            return list(queryset.values("transductor").annotate(**annotations).order_by())
+        return queryset.aggregate(**annotations)
+
+    def merge_detail(self, results):
+        merged = {}
+        for result in results:
+            for row in result:
+                transductor = row["transductor"]
+                merged[transductor] = self.merge_rows(merged.get(transductor), row)
+        return list(merged.values())
+
+    def merge_summary(self, results):
+        merged = None
+        for result in results:
+            merged = self.merge_rows(merged, result)
+        return merged or {}
+
+    @staticmethod
+    def merge_rows(current, row):
+        if current is None:
+            return dict(row)
+
+        merged = dict(current)
+        for key, value in row.items():
+            if value is None or key == "transductor":
+                continue
+            if merged.get(key) is None:
+                merged[key] = value
+            elif key == "start_date":
+                merged[key] = min(merged[key], value)
+            elif key == "end_date":
+                merged[key] = max(merged[key], value)
+            else:
+                merged[key] += value
+        return merged
+
+
 class UferDataAggregator:
     def __init__(self) -> None:
         self.setup()
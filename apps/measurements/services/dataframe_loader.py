@@ -0,0 +1,75 @@
+import logging
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.db import models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+logger = logging.getLogger("apps")
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class QuerysetLoader:
+    """
+    Loads the `fields` of a queryset into a DataFrame, one NumPy array per column.
+
+    The arrays are allocated once with the `count()` of the queryset and filled chunk by chunk
+    from a server side cursor (`values_list().iterator(chunk_size)`), so the rows are never held
+    as a list of dicts. Decimal and float fields are cast to float8 in SQL: the driver returns
+    floats, stored as NaN when NULL, and no Decimal is created. Datetimes are returned aware, in UTC.
+    """
+
+    def __init__(self, queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.queryset = queryset
+        self.fields = list(fields)
+        self.chunk_size = chunk_size
+        model_fields = [queryset.model._meta.get_field(name) for name in self.fields]
+        self.float_fields = {
+            field.name  #
+            for field in model_fields
+            if isinstance(field, (models.DecimalField, models.FloatField))
+        }
+        self.datetime_fields = {field.name for field in model_fields if isinstance(field, models.DateTimeField)}
+
+    def dataframe(self):
+        total = self.queryset.count()
+        arrays = {name: self.allocate(name, total) for name in self.fields}
+
+        position = 0
+        rows = self.get_queryset().iterator(chunk_size=self.chunk_size)
+        while chunk := list(islice(rows, self.chunk_size)):
+            end = position + len(chunk)
+            if end > total:  # rows inserted after the count
+                arrays = {name: self.grow(array, end) for name, array in arrays.items()}
+                total = end
+
+            for name, values in zip(self.fields, zip(*chunk)):
+                arrays[name][position:end] = values
+            position = end
+
+        data = pd.DataFrame({name: array[:position] for name, array in arrays.items()}, columns=self.fields)
+        for name in self.datetime_fields:
+            data[name] = pd.to_datetime(data[name], utc=True)
+        return data
+
+    def get_queryset(self):
+        annotations = {
+            f"load_{name}": Cast(F(name), FloatField()) if name in self.float_fields else F(name)
+            for name in self.fields
+        }
+        return self.queryset.annotate(**annotations).values_list(*annotations)
+
+    def allocate(self, name, size):
+        return np.empty(size, dtype=np.float64 if name in self.float_fields else object)
+
+    def grow(self, array, size):
+        grown = np.empty(size, dtype=array.dtype)
+        grown[: len(array)] = array
+        return grown
+
+
+def queryset_to_dataframe(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    return QuerysetLoader(queryset, fields, chunk_size).dataframe()
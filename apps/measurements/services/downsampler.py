@@ -1,24 +1,38 @@
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
 
 import numpy as np
 import pandas as pd
 
+from apps.measurements.services.lttb import epoch_seconds, lttb_matrix, m4_matrix, minmax_lttb_matrix
 from apps.utils.helpers import log_service
 
 logger = logging.getLogger("apps.measurements.services.downsampler")
 
+LTTB = "lttb"
+MINMAX_LTTB = "minmax_lttb"
+M4 = "m4"
+NO_DOWNSAMPLING = "none"
+DOWNSAMPLING_METHODS = [LTTB, MINMAX_LTTB, M4, NO_DOWNSAMPLING]
+
+# bucket widths (seconds) of the anchored downsampling: the width stays the same while the
+# period of the chart changes a little (rolling windows), so the buckets don't shift
+ANCHOR_WIDTHS = [1, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400]
+
 
 class LTTBDownSampler:
     """A service class for downsampling time series data using the LTTB algorithm,
-    supporting combined and reference-based indexing."""
+    supporting combined and reference-based indexing.
+
+    All the fields are downsampled in a single pass over a (points, fields) matrix: `apply_lttb`
+    keeps the union of the points of every field (or the points of `ref_column`) and
+    `apply_lttb_per_field` returns the points of each field separately."""
 
-    def __init__(self, n_out, enable_parallel=False):
+    def __init__(self, n_out):
         if n_out <= 2:
             raise ValueError("n_out should be greater than 2.")
 
         self.n_out = n_out
-        self.enable_parallel = enable_parallel
 
     @log_service()
     def apply_lttb(self, data, dt_column="collection_date", ref_column=None):
@@ -31,88 +45,38 @@ class LTTBDownSampler:
             logger.warning(f"Invalid DataFrame: {e}")
             return data
 
-        df_prepared = self._prepare_dataframe(data, dt_column)
-        indices = self._downsample_dataframe(df_prepared, ref_column)
-        return data.loc[indices]
+        fields = [ref_column] if ref_column else list(data.columns[1:])
+        indices = self._downsample_matrix(data, dt_column, fields)
+        if ref_column:
+            return data.iloc[indices[:, 0]]
+        return data.iloc[np.unique(indices)]
 
-    def _prepare_dataframe(self, data, dt_column):
-        df = data.copy()
-        if dt_column not in df.columns:
-            raise ValueError(f"Column '{dt_column}' not found in the DataFrame.")
+    @log_service()
+    def apply_lttb_per_field(self, data, dt_column="collection_date"):
+        """
+        {field: DataFrame of `dt_column` and the field with the points kept for the field}.
+        """
+        self.valid_dataframe(data, dt_column, None)
+        fields = list(data.columns[1:])
+        if self.n_out > data.shape[0]:
+            return {field: data[[dt_column, field]] for field in fields}
 
-        df = df.rename(columns={dt_column: "x"})
-        df["x"] = pd.to_datetime(df["x"]).apply(lambda x: x.timestamp())
-        return df
+        indices = self._downsample_matrix(data, dt_column, fields)
+        return {field: data[[dt_column, field]].iloc[indices[:, i]] for i, field in enumerate(fields)}
 
-    def _downsample_dataframe(self, df, ref_column):
-        if ref_column and ref_column not in df.columns:
-            raise ValueError(f"Column '{ref_column}' not found in DataFrame.")
+    def _downsample_matrix(self, data, dt_column, fields):
+        if dt_column not in data.columns:
+            raise ValueError(f"Column '{dt_column}' not found in the DataFrame.")
+        missing = [field for field in fields if field not in data.columns]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in DataFrame.")
 
-        if self.enable_parallel and ref_column is None:
-            return self._parallel_downsample(df)
+        x = epoch_seconds(data[dt_column])
+        y = data[fields].to_numpy(dtype=np.float64)
+        return self.select(x, y)
 
-        if ref_column:
-            downsample_df = df[["x", ref_column]].rename(columns={ref_column: "y"})
-            return self._downsample_column(downsample_df)
-
-        indices = self._downsample_all_columns(df)
-        return list(np.unique(indices))
-
-    def _parallel_downsample(self, df):
-        indices = []
-
-        num_workers = min(len(df.columns), 8)
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            futures = []
-            for column in df.columns[1:]:
-                df_downsample = df[["x", column]].rename(columns={column: "y"})
-                futures.append(executor.submit(self._downsample_column, df_downsample))
-
-            for future in as_completed(futures):
-                indices.extend(future.result())
-        return np.unique(indices)
-
-    def _downsample_all_columns(self, df):
-        indices_columns = []
-        for column in df.columns[1:]:
-            df_downsample = df[["x", column]].rename(columns={column: "y"})
-            indices = self._downsample_column(df_downsample)
-            indices_columns.extend(indices)
-        return np.unique(indices_columns)
-
-    def _downsample_column(self, df):
-        if df["y"].dtype != float:
-            df["y"] = df["y"].astype(float, errors="ignore")
-
-        data = df[["x", "y"]].to_numpy()
-        return self._lttb_core(data)
-
-    def _lttb_core(self, data):
-        n_bins = self.n_out - 2
-        data_bins = np.array_split(data[1:-1], n_bins)
-        indices = np.zeros(self.n_out, dtype=int)  # Array to store indices
-        indices[0], indices[-1] = 0, len(data) - 1
-        start_indices = self._calculate_start_indices(data_bins)
-
-        for i in range(n_bins):
-            a = data[indices[i]]
-            bs = data_bins[i]
-            next_bin = data_bins[i + 1] if i < n_bins - 1 else data[-1:]
-            c = next_bin.mean(axis=0)
-            areas = self._areas_of_triangles(a, bs, c)
-            max_index = np.argmax(areas)
-            indices[i + 1] = start_indices[i] + max_index
-        return indices
-
-    def _areas_of_triangles(self, a, bs, c):
-        a_to_c = c - a
-        return 0.5 * np.abs(a_to_c[0] * (bs[:, 1] - a[1]) - a_to_c[1] * (bs[:, 0] - a[0]))
-
-    def _calculate_start_indices(self, data_bins):
-        start_indices = [1]
-        for i in range(1, len(data_bins)):
-            start_indices.append(start_indices[-1] + len(data_bins[i - 1]))
-        return start_indices
+    def select(self, x, y):
+        return lttb_matrix(x, y, self.n_out)
 
     def valid_dataframe(self, df, dt_column, ref_column):
         if not isinstance(df, pd.DataFrame):
@@ -123,3 +87,39 @@ class LTTBDownSampler:
 
         if len(df.columns) < 2:
             raise ValueError("Dataframe should have at least 2 columns.")
+
+
+class MinMaxLTTBDownSampler(LTTBDownSampler):
+    """LTTB over a MinMax preselection of n_out * ratio points per field: close to the LTTB
+    result for a fraction of the cost on long series."""
+
+    def __init__(self, n_out, ratio=4):
+        super().__init__(n_out)
+        self.ratio = ratio
+
+    def select(self, x, y):
+        return minmax_lttb_matrix(x, y, self.n_out, self.ratio)
+
+
+class M4DownSampler(LTTBDownSampler):
+    """M4: first, last, min and max points of n_out / 4 equal time buckets per field, the
+    points that draw the same line chart of the raw series at n_out / 4 pixels wide."""
+
+    def select(self, x, y):
+        return m4_matrix(x, y, max(self.n_out // 4, 1))
+
+
+DOWNSAMPLERS = {
+    LTTB: LTTBDownSampler,
+    MINMAX_LTTB: MinMaxLTTBDownSampler,
+    M4: M4DownSampler,
+}
+
+
+def anchor_width(start_date, end_date, n_buckets):
+    """
+    Smallest anchored width that splits [start_date, end_date] in at most `n_buckets` buckets.
+    """
+    seconds = (end_date - start_date).total_seconds() / max(n_buckets, 1)
+    width = next((width for width in ANCHOR_WIDTHS if width >= seconds), ANCHOR_WIDTHS[-1])
+    return timedelta(seconds=width)
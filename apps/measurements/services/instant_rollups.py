@@ -0,0 +1,287 @@
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.db import connection, models, transaction
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from apps.measurements.models import InstantMeasurement, InstantMeasurementRollup
+from apps.measurements.services.compact_storage import instant_model
+from apps.measurements.services.response_cache import invalidate, invalidate_all
+
+logger = logging.getLogger("apps")
+
+Resolution = InstantMeasurementRollup.Resolution
+
+INSTANT_ROLLUP_FIELDS = [
+    field.name  #
+    for field in InstantMeasurement._meta.concrete_fields
+    if isinstance(field, models.DecimalField)
+]
+FIELD_INDEX = {name: index for index, name in enumerate(INSTANT_ROLLUP_FIELDS)}
+
+# finest first: each resolution is built from the previous one, the first from the raw rows
+RESOLUTIONS = [Resolution.FIVE_MINUTES, Resolution.HOURLY, Resolution.DAILY]
+
+ONLY_DAY_HOURS = (6, 19)  # same hours of BaseMeasurementFilter.filter_only_day
+
+# the `refresh_instant_rollups` cronjob runs every REFRESH_INTERVAL over the last REFRESH_LOOKBACK
+REFRESH_INTERVAL = timedelta(minutes=5)
+REFRESH_LOOKBACK = timedelta(minutes=15)
+
+
+def bucket_origin():
+    """
+    Local midnight used as origin of the buckets (date_bin), so daily buckets are local days.
+    """
+    return timezone.make_aware(datetime(2020, 1, 1))
+
+
+def floor_bucket(dt, resolution):
+    stride = timedelta(seconds=resolution)
+    origin = bucket_origin()
+    return origin + ((dt - origin) // stride) * stride
+
+
+def choose_resolution(start_date, end_date, threshold, only_day=False):
+    """
+    Coarsest resolution with at least `threshold` buckets in the period, or None when even the
+    finest one has fewer points (the raw measurements are used).
+    Daily buckets can't be filtered by the hour, so they are skipped with `only_day`.
+    """
+    if start_date is None or threshold is None:
+        return None
+
+    period = (end_date or timezone.now()) - start_date
+    for resolution in reversed(RESOLUTIONS):
+        if only_day and resolution == Resolution.DAILY:
+            continue
+        if period / timedelta(seconds=resolution) >= threshold:
+            return resolution
+    return None
+
+
+class InstantRollupBuilder:
+    """
+    Builds the 5 minutes, hourly and daily rollups of the instant measurements with one
+    INSERT ... SELECT per resolution (date_bin buckets, upsert on the unique bucket).
+
+    The 5 minutes buckets are aggregated from the raw rows and each coarser resolution from the
+    previous one: min of the minimums, max of the maximums and the average weighted by the
+    number of measurements, so refreshing the current day never reads more than its hourly rows.
+    """
+
+    RAW_SQL = """
+        INSERT INTO {table} ({columns})
+        SELECT
+            transductor_id,
+            %(resolution)s,
+            date_bin(%(stride)s, collection_date, %(origin)s) AS bucket_start,
+            count(*),
+            ARRAY[{avg_values}]::double precision[],
+            ARRAY[{min_values}]::double precision[],
+            ARRAY[{max_values}]::double precision[],
+            now()
+        FROM {source}
+        WHERE collection_date >= %(start)s AND collection_date < %(end)s {transductor_filter}
+        GROUP BY transductor_id, bucket_start
+        {upsert}
+    """
+
+    CASCADE_SQL = """
+        WITH items AS (
+            SELECT
+                finer.transductor_id,
+                date_bin(%(stride)s, finer.bucket, %(origin)s) AS bucket_start,
+                finer.measurements,
+                item.avg_value,
+                item.min_value,
+                item.max_value,
+                item.field_index
+            FROM {table} finer
+            CROSS JOIN LATERAL unnest(finer.avg_values, finer.min_values, finer.max_values)
+                WITH ORDINALITY AS item(avg_value, min_value, max_value, field_index)
+            WHERE finer.resolution = %(source_resolution)s
+                AND finer.bucket >= %(start)s AND finer.bucket < %(end)s {transductor_filter}
+        ),
+        by_field AS (
+            SELECT
+                transductor_id,
+                bucket_start,
+                field_index,
+                sum(measurements) AS measurements,
+                sum(avg_value * measurements)
+                    / nullif(sum(measurements) FILTER (WHERE avg_value IS NOT NULL), 0) AS avg_value,
+                min(min_value) AS min_value,
+                max(max_value) AS max_value
+            FROM items
+            GROUP BY transductor_id, bucket_start, field_index
+        )
+        INSERT INTO {table} ({columns})
+        SELECT
+            transductor_id,
+            %(resolution)s,
+            bucket_start,
+            max(measurements),
+            array_agg(avg_value ORDER BY field_index),
+            array_agg(min_value ORDER BY field_index),
+            array_agg(max_value ORDER BY field_index),
+            now()
+        FROM by_field
+        GROUP BY transductor_id, bucket_start
+        {upsert}
+    """
+
+    UPSERT_SQL = """
+        ON CONFLICT (transductor_id, resolution, bucket) DO UPDATE SET
+            measurements = EXCLUDED.measurements,
+            avg_values = EXCLUDED.avg_values,
+            min_values = EXCLUDED.min_values,
+            max_values = EXCLUDED.max_values,
+            updated = EXCLUDED.updated
+    """
+
+    def __init__(self):
+        quote = connection.ops.quote_name
+        self.table = quote(InstantMeasurementRollup._meta.db_table)
+        self.source = quote(instant_model()._meta.db_table)
+        self.columns = "transductor_id, resolution, bucket, measurements, avg_values, min_values, max_values, updated"
+        self.field_columns = [quote(name) for name in INSTANT_ROLLUP_FIELDS]
+
+    TRANSDUCTOR_FILTER_SQL = "AND {column} = ANY(%(transductors)s)"
+
+    def refresh(self, start_date, end_date, transductors=None):
+        """
+        Recomputes every bucket overlapping [start_date, end_date), of all the transductors or
+        only of `transductors` (ids). Returns {resolution: rows}.
+        """
+        refreshed = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            previous = None
+            for resolution in RESOLUTIONS:
+                params = {
+                    "resolution": int(resolution),
+                    "stride": timedelta(seconds=resolution),
+                    "origin": bucket_origin(),
+                    "start": floor_bucket(start_date, resolution),
+                    "end": floor_bucket(end_date, resolution) + timedelta(seconds=resolution),
+                }
+                if previous is not None:
+                    params["source_resolution"] = previous
+                if transductors is not None:
+                    params["transductors"] = list(transductors)
+                cursor.execute(self.get_sql(previous, transductors is not None), params)
+                refreshed[resolution] = cursor.rowcount
+                previous = int(resolution)
+
+        if transductors is None:
+            invalidate_all(start_date)
+        else:
+            invalidate(transductors, start_date)
+        return refreshed
+
+    def get_sql(self, source_resolution, by_transductor=False):
+        def transductor_filter(column):
+            return self.TRANSDUCTOR_FILTER_SQL.format(column=column) if by_transductor else ""
+
+        if source_resolution is None:
+            return self.RAW_SQL.format(
+                table=self.table,
+                columns=self.columns,
+                source=self.source,
+                avg_values=", ".join(f"avg({column})" for column in self.field_columns),
+                min_values=", ".join(f"min({column})" for column in self.field_columns),
+                max_values=", ".join(f"max({column})" for column in self.field_columns),
+                upsert=self.UPSERT_SQL,
+                transductor_filter=transductor_filter("transductor_id"),
+            )
+        return self.CASCADE_SQL.format(
+            table=self.table,
+            columns=self.columns,
+            upsert=self.UPSERT_SQL,
+            transductor_filter=transductor_filter("finer.transductor_id"),
+        )
+
+
+def refresh_late_rollups(instances):
+    """
+    Refreshes the rollups of the new instant measurements the next scheduled refresh won't reach
+    (collection dates older than its lookback: gap filling, meters sending their memory). Only
+    the buckets of each transductor between its own late dates are recomputed.
+    """
+    oldest_refreshed = timezone.now() - (REFRESH_LOOKBACK - REFRESH_INTERVAL)
+    late_periods = {}
+    for instance in instances:
+        if instance.collection_date >= oldest_refreshed:
+            continue
+        start_date, end_date = late_periods.get(instance.transductor_id, (instance.collection_date,) * 2)
+        late_periods[instance.transductor_id] = (
+            min(start_date, instance.collection_date),
+            max(end_date, instance.collection_date),
+        )
+
+    builder = InstantRollupBuilder()
+    for transductor, (start_date, end_date) in late_periods.items():
+        builder.refresh(start_date, end_date, transductors=[transductor])
+
+
+class InstantRollupReader:
+    """
+    Reads the rollups of a transductor as the DataFrame used by the graphs: `collection_date`
+    (bucket start) and the average of each field. The minimums and maximums of the period are
+    in `attrs["min_values"]` / `attrs["max_values"]`, so the extremes are not lost by averaging.
+    """
+
+    def __init__(self, resolution):
+        self.resolution = resolution
+
+    def get_queryset(self, transductor, start_date=None, end_date=None, only_day=False):
+        queryset = InstantMeasurementRollup.objects.filter(transductor=transductor, resolution=self.resolution)
+        if start_date:
+            queryset = queryset.filter(bucket__gte=floor_bucket(start_date, self.resolution))
+        if end_date:
+            queryset = queryset.filter(bucket__lte=end_date)
+        if only_day:
+            start_hour, end_hour = ONLY_DAY_HOURS
+            queryset = queryset.annotate(hour=ExtractHour("bucket")).filter(hour__gte=start_hour, hour__lt=end_hour)
+        return queryset.order_by("bucket")
+
+    def covers(self, transductor, start_date=None, end_date=None):
+        """
+        Whether the rollups reach the first raw measurement of the period: they only exist from
+        the first refresh on, older history needs a `refresh_instant_rollups --start_date` backfill.
+        """
+        raw = instant_model().objects.filter(transductor=transductor)
+        if start_date:
+            raw = raw.filter(collection_date__gte=start_date)
+        if end_date:
+            raw = raw.filter(collection_date__lte=end_date)
+        first_raw = raw.order_by("collection_date").values_list("collection_date", flat=True).first()
+        if first_raw is None:
+            return True
+
+        first_bucket = self.get_queryset(transductor, start_date, end_date).values_list("bucket", flat=True).first()
+        return first_bucket is not None and first_bucket <= floor_bucket(first_raw, self.resolution)
+
+    def dataframe(self, transductor, fields, start_date=None, end_date=None, only_day=False):
+        rows = list(
+            self.get_queryset(transductor, start_date, end_date, only_day).values_list(
+                "bucket", "avg_values", "min_values", "max_values"
+            )
+        )
+        if not rows:
+            return pd.DataFrame(columns=["collection_date", *fields])
+
+        buckets, avg_values, min_values, max_values = zip(*rows)
+        indexes = [FIELD_INDEX[field] for field in fields]
+
+        data = pd.DataFrame(np.array(avg_values, dtype=np.float64)[:, indexes].round(2), columns=fields)
+        data.insert(0, "collection_date", pd.to_datetime(buckets, utc=True))
+
+        minimums = pd.DataFrame(np.array(min_values, dtype=np.float64)[:, indexes], columns=fields).min()
+        maximums = pd.DataFrame(np.array(max_values, dtype=np.float64)[:, indexes], columns=fields).max()
+        data.attrs["min_values"] = minimums.to_dict()
+        data.attrs["max_values"] = maximums.to_dict()
+        return data
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:  # optional: compiled LTTB kernel
+    numba = None
+
+
+def epoch_seconds(values):
+    """
+    Datetimes as float64 seconds since the epoch (naive values are taken as UTC), the x of the
+    reference implementation (`Timestamp.timestamp()`): the same floats give the same areas.
+    """
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).asi8 / 1e9
+
+
+def split_bounds(n_points, n_bins, offset=0):
+    """
+    Start and end (exclusive) of `n_bins` contiguous bins of `n_points` points starting at
+    `offset`, the same bins of `np.array_split` (the first bins get the remainder).
+    """
+    sizes = np.full(n_bins, n_points // n_bins, dtype=np.int64)
+    sizes[: n_points % n_bins] += 1
+    ends = offset + np.cumsum(sizes)
+    return ends - sizes, ends
+
+
+def bin_bounds(n_points, n_out):
+    """
+    Bins of LTTB: the n_out - 2 bins of the points 1..n_points - 2.
+    """
+    return split_bounds(n_points - 2, n_out - 2, offset=1)
+
+
+def next_bin_means(x, y, starts, ends):
+    """
+    Mean point of the bin after each bin (one row per bin, one column per field of `y`); after
+    the last bin it is the last point. Bins of the same size are contiguous (at most two sizes)
+    and summed as a block along contiguous rows, the pairwise sums of `ndarray.mean`.
+    """
+    columns = np.ascontiguousarray(np.column_stack([x, y]).T)
+    means = np.empty((len(starts), len(columns)), dtype=np.float64)
+    sizes = (ends - starts)[1:]
+    for size in np.unique(sizes).tolist():
+        bins = np.flatnonzero(sizes == size)
+        first = starts[bins[0] + 1]
+        block = columns[:, first : first + size * len(bins)].reshape(len(columns), len(bins), size)
+        means[bins] = (block.sum(axis=2) / size).T
+    means[-1] = columns[:, -1]
+    return means[:, 0], np.ascontiguousarray(means[:, 1:])
+
+
+def select_numpy(x, y, starts, ends, mean_x, mean_y, indices):
+    """
+    One step per bin for all the fields at once, over views of the arrays: the areas of a bin
+    are a (bin size, fields) block computed in two buffers allocated once, with the operations of
+    the reference implementation (same floats, same argmax per field).
+    """
+    width = int((ends - starts).max())
+    areas, term = np.empty((width, y.shape[1])), np.empty((width, y.shape[1]))
+    fields = np.arange(y.shape[1])
+
+    selected = np.zeros(y.shape[1], dtype=np.int64)
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        size = end - start
+        ax, ay = x[selected], y[selected, fields]
+        dx, dy = mean_x[i] - ax, mean_y[i] - ay
+        np.subtract(y[start:end], ay, out=areas[:size])
+        areas[:size] *= dx
+        np.subtract(x[start:end, None], ax, out=term[:size])
+        term[:size] *= dy
+        areas[:size] -= term[:size]
+        np.abs(areas[:size], out=areas[:size])
+        selected = start + np.argmax(areas[:size], axis=0)
+        indices[i + 1] = selected
+
+
+def select_loop(x, y, starts, ends, mean_x, mean_y, indices):
+    """
+    Scalar version of `select_numpy`, compiled with numba when available. A NaN area is selected
+    at once, as `np.argmax` does.
+    """
+    for field in range(y.shape[1]):
+        selected = 0
+        for i in range(starts.shape[0]):
+            ax, ay = x[selected], y[selected, field]
+            dx, dy = mean_x[i] - ax, mean_y[i, field] - ay
+            best, best_area = starts[i], -1.0
+            for j in range(starts[i], ends[i]):
+                area = abs(dx * (y[j, field] - ay) - dy * (x[j] - ax))
+                if area != area:
+                    best = j
+                    break
+                if area > best_area:
+                    best, best_area = j, area
+            selected = best
+            indices[i + 1, field] = selected
+
+
+select_compiled = numba.njit(cache=True, nogil=True)(select_loop) if numba is not None else None
+
+
+def lttb_matrix(x, y, n_out, accelerated=None):
+    """
+    LTTB of every column of the (n_points, n_fields) matrix `y` over the shared `x`, in a single
+    pass over the bins. Returns the (n_out, n_fields) positions kept for each field.
+    `accelerated` selects the numba kernel (default: when numba is installed); the NumPy kernel
+    gives the same points.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64).reshape(len(x), -1)
+    n_points, n_fields = y.shape
+    if n_out >= n_points:
+        return np.repeat(np.arange(n_points)[:, None], n_fields, axis=1)
+
+    starts, ends = bin_bounds(n_points, n_out)
+    mean_x, mean_y = next_bin_means(x, y, starts, ends)
+    indices = np.empty((n_out, n_fields), dtype=np.int64)
+    indices[0], indices[-1] = 0, n_points - 1
+
+    if accelerated is None:
+        accelerated = select_compiled is not None
+    select = select_compiled if accelerated and select_compiled is not None else select_numpy
+    select(x, y, starts, ends, mean_x, mean_y, indices)
+    return indices
+
+
+def lttb_indices(x, y, n_out, accelerated=None):
+    """
+    Positions of the n_out points kept by LTTB for a single series.
+    """
+    return lttb_matrix(x, np.asarray(y).reshape(-1, 1), n_out, accelerated)[:, 0]
+
+
+def extreme_positions(y, starts, sizes):
+    """
+    First position of the minimum and of the maximum of each segment, per column. NaN is
+    ignored; a segment with only NaN gives its first position.
+    """
+    positions = np.arange(len(y))[:, None]
+    missing = np.isnan(y)
+    low, high = np.where(missing, np.inf, y), np.where(missing, -np.inf, y)
+    minimum = np.repeat(np.minimum.reduceat(low, starts, axis=0), sizes, axis=0)
+    maximum = np.repeat(np.maximum.reduceat(high, starts, axis=0), sizes, axis=0)
+    first_min = np.minimum.reduceat(np.where(low == minimum, positions, len(y)), starts, axis=0)
+    first_max = np.minimum.reduceat(np.where(high == maximum, positions, len(y)), starts, axis=0)
+    return first_min, first_max
+
+
+def minmax_lttb_matrix(x, y, n_out, ratio=4, accelerated=None):
+    """
+    MinMaxLTTB: the min and max of n_out * ratio / 2 equal buckets (plus the first and last
+    points) are preselected, then LTTB picks the n_out points among them. Same result shape of
+    `lttb_matrix`; LTTB only runs over n_out * ratio points per field.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64).reshape(len(x), -1)
+    n_points, n_fields = y.shape
+    n_buckets = (n_out - 2) * ratio // 2
+    if 2 * n_buckets + 2 >= n_points:
+        return lttb_matrix(x, y, n_out, accelerated)
+
+    # buckets of the inner points 1..n_points - 2, positions shifted back after the extremes
+    starts, ends = split_bounds(n_points - 2, n_buckets)
+    first_min, first_max = extreme_positions(y[1:-1], starts, ends - starts)
+    candidates = np.sort(
+        np.concatenate(
+            [
+                np.zeros((1, n_fields), dtype=np.int64),
+                first_min + 1,
+                first_max + 1,
+                np.full((1, n_fields), n_points - 1, dtype=np.int64),
+            ]
+        ),
+        axis=0,
+    )
+
+    indices = np.empty((n_out, n_fields), dtype=np.int64)
+    for field in range(n_fields):
+        column = candidates[:, field]
+        indices[:, field] = column[lttb_matrix(x[column], y[column, field], n_out, accelerated)[:, 0]]
+    return indices
+
+
+def m4_matrix(x, y, n_buckets):
+    """
+    M4: first, last, min and max positions of each of `n_buckets` equal time buckets (a pixel
+    column of the chart) that has points. Returns (4 * buckets with points, n_fields) positions,
+    sorted per field.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64).reshape(len(x), -1)
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], y[order]
+
+    span = x[-1] - x[0]
+    if span > 0:
+        buckets = np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    else:
+        buckets = np.zeros(len(x), dtype=np.int64)
+
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    ends = np.append(starts[1:], len(x))
+    first_min, first_max = extreme_positions(y, starts, ends - starts)
+    first = np.repeat(starts[:, None], y.shape[1], axis=1)
+    last = np.repeat((ends - 1)[:, None], y.shape[1], axis=1)
+    return order[np.sort(np.concatenate([first, first_min, first_max, last]), axis=0)]
@@ -0,0 +1,146 @@
+import logging
+import re
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+from apps.measurements.models import (
+    CompactInstantMeasurement,
+    CumulativeMeasurement,
+    InstantMeasurement,
+)
+
+logger = logging.getLogger("apps")
+
+PARTITIONED_MODELS = [InstantMeasurement, CumulativeMeasurement, CompactInstantMeasurement]
+PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(year: int, month: int) -> datetime:
+    """
+    Normalizes (year, month) overflow, e.g. (2024, 13) => 2025-01-01 UTC.
+    """
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+class PartitionManager:
+    """
+    Manages the monthly partitions (UTC months, by collection_date) of a measurement table,
+    created by the `0002_partition_measurements` (and `0005_compact_instant_measurements`) migration.
+
+    Partitions are named `<table>_pYYYYMM`. Rows outside every monthly partition go to
+    `<table>_default`; when a partition is created for a range that already has rows in the
+    default partition, those rows are moved into it.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.table = model._meta.db_table
+        self.default_partition = f"{self.table}_default"
+
+    def partition_name(self, start: datetime) -> str:
+        return f"{self.table}_p{start:%Y%m}"
+
+    def list_partitions(self) -> dict[str, datetime]:
+        """
+        Returns the monthly partitions attached to the table: {name: month start}.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = %s
+                """,
+                [self.table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        partitions = {}
+        for name in names:
+            match = PARTITION_SUFFIX.search(name)
+            if match:
+                partitions[name] = month_start(int(match[1]), int(match[2]))
+        return dict(sorted(partitions.items(), key=lambda item: item[1]))
+
+    def create_partition(self, start: datetime) -> bool:
+        """
+        Creates the partition of the month starting at `start`. Returns False if it exists.
+        """
+        name = self.partition_name(start)
+        if name in self.list_partitions():
+            return False
+
+        end = month_start(start.year, start.month + 1)
+        quote = connection.ops.quote_name
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {quote(self.default_partition)} "
+                "WHERE collection_date >= %s AND collection_date < %s)",
+                [start, end],
+            )
+            has_default_rows = cursor.fetchone()[0]
+
+            if has_default_rows:
+                # a new partition can't overlap rows of the default partition
+                cursor.execute(f"ALTER TABLE {quote(self.table)} DETACH PARTITION {quote(self.default_partition)}")
+
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} PARTITION OF {quote(self.table)} FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+
+            if has_default_rows:
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {quote(self.default_partition)} "
+                    "WHERE collection_date >= %s AND collection_date < %s RETURNING *) "
+                    f"INSERT INTO {quote(self.table)} SELECT * FROM moved",
+                    [start, end],
+                )
+                cursor.execute(
+                    f"ALTER TABLE {quote(self.table)} ATTACH PARTITION {quote(self.default_partition)} DEFAULT"
+                )
+
+        logger.info(f"Partition created: {name} [{start:%Y-%m-%d}, {end:%Y-%m-%d})")
+        return True
+
+    def create_upcoming(self, months_ahead: int = 3, now=None) -> list[str]:
+        now = now or datetime.now(timezone.utc)
+        created = []
+        for offset in range(months_ahead + 1):
+            start = month_start(now.year, now.month + offset)
+            if self.create_partition(start):
+                created.append(self.partition_name(start))
+        return created
+
+    def detach_older_than(self, months: int, drop: bool = False, now=None) -> list[str]:
+        """
+        Detaches (and optionally drops) the partitions entirely older than `months` months.
+        A detached partition is a regular table: it can still be archived (pg_dump) or dropped.
+        """
+        now = now or datetime.now(timezone.utc)
+        return self.detach_before(month_start(now.year, now.month - months), drop=drop)
+
+    def detach_before(self, cutoff: datetime, drop: bool = False) -> list[str]:
+        """
+        Detaches (and optionally drops) the partitions whose whole month is before `cutoff`.
+        """
+        quote = connection.ops.quote_name
+
+        detached = []
+        for name, start in self.list_partitions().items():
+            if month_start(start.year, start.month + 1) > cutoff:
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {quote(self.table)} DETACH PARTITION {quote(name)}")
+                if drop:
+                    cursor.execute(f"DROP TABLE {quote(name)}")
+
+            logger.info(f"Partition {'dropped' if drop else 'detached'}: {name}")
+            detached.append(name)
+        return detached
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.response import Response
+
+from apps.measurements.models import CumulativeMeasurement, InstantMeasurement
+from apps.measurements.signals import measurements_created
+
+logger = logging.getLogger("apps")
+
+ALL_TRANSDUCTORS = "all"
+# counter of every key: bumped when rollups, compact copies or the retention change stored data
+STORED_DATA = "stored"
+CACHED_STATUS = (200, 204)
+
+# version counters: "latest" changes with every new measurement, "history" only with late ones
+LATEST = "latest"
+HISTORY = "history"
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE["alias"]]
+
+
+def version_key(kind, transductor):
+    return f"measurements:{kind}:{transductor}"
+
+
+def is_closed(params):
+    """
+    Intervals that ended before the lateness window of the collection can only change with late
+    measurements (backfills, gap filling).
+    """
+    end_date = params.get("end_date")
+    closed_after = timedelta(seconds=settings.RESPONSE_CACHE["closed_after"])
+    return end_date is not None and end_date < timezone.now() - closed_after
+
+
+def normalize(value):
+    if isinstance(value, datetime):
+        return value.astimezone(dt_timezone.utc).isoformat()
+    return str(value)
+
+
+def get_key(view_name, params):
+    """
+    Key of a response and its timeout. The key carries the version of the transductor of the
+    query (or of all of them) and the version of the stored data: new measurements or rebuilt
+    tables change a version and the old entries are never read again.
+    """
+    kind = HISTORY if is_closed(params) else LATEST
+    transductor_version = get_version(kind, params.get("transductor") or ALL_TRANSDUCTORS)
+    version = f"{get_version(kind, STORED_DATA)}.{transductor_version}"
+
+    payload = json.dumps(params, sort_keys=True, default=normalize)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    timeout = settings.RESPONSE_CACHE["closed_timeout" if kind == HISTORY else "open_timeout"]
+    return f"response:{view_name}:{kind}:{version}:{digest}", timeout
+
+
+def get_version(kind, transductor):
+    """
+    Counters start from the current time in nanoseconds, not 0: a counter lost by the cache
+    (culled, restarted) starts above every value it had, so old keys and ETags never match.
+    """
+    cache = get_cache()
+    key = version_key(kind, transductor)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(kind, transductors):
+    cache = get_cache()
+    for transductor in transductors:
+        key = version_key(kind, transductor)
+        cache.add(key, time.time_ns(), timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted between add and incr
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(transductor_ids, oldest_date):
+    transductors = {*transductor_ids, ALL_TRANSDUCTORS}
+    try:
+        bump_versions(LATEST, transductors)
+        if is_closed({"end_date": oldest_date}):
+            bump_versions(HISTORY, transductors)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed: {e}")
+
+
+def invalidate_all(oldest_date):
+    """
+    Invalidates the responses of every transductor from `oldest_date` on, for the jobs that
+    rewrite stored data in bulk (instant rollups, compact copy, retention).
+    """
+    invalidate({STORED_DATA}, oldest_date)
+
+
+@receiver(measurements_created)
+def invalidate_bulk_measurements(sender, instances, **kwargs):
+    if instances:
+        invalidate(
+            {instance.transductor_id for instance in instances},
+            min(instance.collection_date for instance in instances),
+        )
+
+
+@receiver(post_save, sender=InstantMeasurement)
+@receiver(post_save, sender=CumulativeMeasurement)
+def invalidate_measurement(sender, instance, created, **kwargs):
+    if created:
+        invalidate({instance.transductor_id}, instance.collection_date)
+
+
+def cache_response(method):
+    """
+    Caches the response of a viewset `list` by its validated query params (`_validate_params`)
+    in the response cache. Closed intervals are kept for RESPONSE_CACHE["closed_timeout"], open
+    ones for "open_timeout" or until new measurements of the transductor arrive.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        params = self._validate_params(request, raise_exception=True)
+        try:
+            key, timeout = get_key(type(self).__name__, params)
+            cached = get_cache().get(key)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            return method(self, request, *args, **kwargs)
+
+        if cached is not None:
+            data, status_code = cached
+            return Response(data, status=status_code)
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code in CACHED_STATUS:
+            try:
+                get_cache().set(key, (response.data, response.status_code), timeout)
+            except Exception as e:
+                logger.warning(f"Response cache unavailable: {e}")
+        return response
+
+    return wrapper
+
+
+def get_etag(view_name, params):
+    key, _ = get_key(view_name, params)
+    return f'"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+
+
+def etag_response(method):
+    """
+    ETag of a viewset `list` response: the version of the transductor and the validated params.
+    A request with a matching If-None-Match gets a 304 without querying the measurements.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        params = self._validate_params(request, raise_exception=True)
+        try:
+            etag = get_etag(type(self).__name__, params)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            return method(self, request, *args, **kwargs)
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [value.strip().removeprefix("W/") for value in if_none_match.split(",")]:
+            response = Response(status=304)
+            response["ETag"] = etag
+            return response
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code in CACHED_STATUS:
+            response["ETag"] = etag
+        return response
+
+    return wrapper
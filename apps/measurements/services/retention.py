@@ -0,0 +1,185 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.measurements.models import (
+    CompactInstantMeasurement,
+    CumulativeMeasurement,
+    InstantMeasurement,
+    InstantMeasurementRollup,
+)
+from apps.measurements.services.compact_storage import reads_compact
+from apps.measurements.services.instant_rollups import InstantRollupBuilder
+from apps.measurements.services.partitions import PARTITIONED_MODELS, PartitionManager
+from apps.measurements.services.response_cache import invalidate_all
+from apps.measurements.services.rollups import DAILY, HOURLY, CumulativeRollup
+from apps.transductors.models import Transductor
+
+logger = logging.getLogger("apps")
+
+
+def rollup_instant(start_date, end_date):
+    InstantRollupBuilder().refresh(start_date, end_date)
+
+
+def rollup_cumulative(start_date, end_date):
+    transductors = list(Transductor.objects.values_list("id", flat=True))
+    last_date = end_date - timedelta(microseconds=1)  # refresh takes an inclusive end
+    for resolution in (HOURLY, DAILY):
+        CumulativeRollup(resolution).refresh(transductors, start_date, last_date)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    Rows of `model` older than `days` (by `date_field`) are deleted. `condition` restricts the
+    rows (SQL, params) and `rollup(start, end)` is called for each day before it is deleted.
+    """
+
+    name: str
+    model: type
+    days: Optional[int]
+    date_field: str = "collection_date"
+    condition: Optional[tuple] = None
+    rollup: Optional[Callable] = field(default=None, compare=False)
+
+
+def get_policies():
+    """
+    The instant rollups are built from the table read by the storage mode (compact or numeric),
+    so that table is rolled up before its days are deleted.
+    """
+    retention_days = settings.MEASUREMENT_RETENTION_DAYS
+    compact = reads_compact()
+    return [
+        RetentionPolicy(
+            "instant",
+            InstantMeasurement,
+            retention_days["instant"],
+            rollup=None if compact else rollup_instant,
+        ),
+        RetentionPolicy(
+            "compact_instant",
+            CompactInstantMeasurement,
+            retention_days["instant"],
+            rollup=rollup_instant if compact else None,
+        ),
+        RetentionPolicy("cumulative", CumulativeMeasurement, retention_days["cumulative"], rollup=rollup_cumulative),
+        RetentionPolicy(
+            "instant_rollup",
+            InstantMeasurementRollup,
+            retention_days["instant_rollup"],
+            date_field="bucket",
+            condition=("resolution = %s", [InstantMeasurementRollup.Resolution.FIVE_MINUTES.value]),
+        ),
+    ]
+
+
+class RetentionEngine:
+    """
+    Applies the retention policies without long locks or a big transaction:
+
+    - the cutoff is a local midnight, so the hourly/daily rollups never lose part of a bucket;
+    - the days to be deleted are rolled up first (when the policy has a rollup);
+    - whole monthly partitions before the cutoff are dropped (instant, no dead rows);
+    - the remaining rows are deleted by primary key ranges of `chunk_size` ids, each range in its
+      own short transaction, pausing `pause` seconds between them so the collection keeps going.
+
+    The deletes are plain SQL: no model references the measurements, so Django's collector
+    (which loads every row in Python to cascade) is not needed.
+    """
+
+    def __init__(self, chunk_size=10000, pause=0.1, dry_run=False):
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.dry_run = dry_run
+
+    def cutoff(self, policy, now=None):
+        now = timezone.localtime(now or timezone.now())
+        return (now - timedelta(days=policy.days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def apply(self, policy, now=None):
+        """
+        Returns {"cutoff", "rolled_up" (days), "partitions" (dropped), "deleted" (rows)}.
+        """
+        result = {"cutoff": None, "rolled_up": 0, "partitions": [], "deleted": 0}
+        if policy.days is None:
+            logger.info(f"Retention {policy.name}: disabled")
+            return result
+
+        result["cutoff"] = cutoff = self.cutoff(policy, now)
+        first_id, last_id, first_date = self.get_bounds(policy, cutoff)
+        if first_id is None:
+            logger.info(f"Retention {policy.name}: nothing older than {cutoff:%Y-%m-%d}")
+            return result
+
+        if self.dry_run:
+            logger.info(f"Retention {policy.name}: ids {first_id}-{last_id} before {cutoff:%Y-%m-%d} (dry run)")
+            return result
+
+        if policy.rollup is not None:
+            result["rolled_up"] = self.rollup(policy, first_date, cutoff)
+
+        if policy.model in PARTITIONED_MODELS and policy.date_field == "collection_date":
+            result["partitions"] = PartitionManager(policy.model).detach_before(cutoff, drop=True)
+            first_id, last_id, _ = self.get_bounds(policy, cutoff)
+
+        if first_id is not None:
+            result["deleted"] = self.delete_chunks(policy, cutoff, first_id, last_id)
+        invalidate_all(first_date)
+        logger.info(
+            f"Retention {policy.name}: {result['deleted']} rows and {len(result['partitions'])} partitions "
+            f"deleted before {cutoff:%Y-%m-%d}"
+        )
+        return result
+
+    def rollup(self, policy, first_date, cutoff):
+        day = timezone.localtime(first_date).replace(hour=0, minute=0, second=0, microsecond=0)
+        days = 0
+        while day < cutoff:
+            next_day = timezone.localtime(day + timedelta(days=1))
+            policy.rollup(day, min(next_day, cutoff))
+            day = next_day
+            days += 1
+        return days
+
+    def get_bounds(self, policy, cutoff):
+        where, params = self.get_where(policy, cutoff)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT MIN(id), MAX(id), MIN({connection.ops.quote_name(policy.date_field)}) "
+                f"FROM {connection.ops.quote_name(policy.model._meta.db_table)} WHERE {where}",
+                params,
+            )
+            return cursor.fetchone()
+
+    def delete_chunks(self, policy, cutoff, first_id, last_id):
+        where, params = self.get_where(policy, cutoff)
+        sql = (
+            f"DELETE FROM {connection.ops.quote_name(policy.model._meta.db_table)} "
+            f"WHERE id >= %s AND id < %s AND {where}"
+        )
+
+        deleted = 0
+        for start_id in range(first_id, last_id + 1, self.chunk_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [start_id, start_id + self.chunk_size, *params])
+                deleted += cursor.rowcount
+            if self.pause:
+                time.sleep(self.pause)
+        return deleted
+
+    def get_where(self, policy, cutoff):
+        where = f"{connection.ops.quote_name(policy.date_field)} < %s"
+        params = [cutoff]
+        if policy.condition is not None:
+            condition, condition_params = policy.condition
+            where = f"{where} AND {condition}"
+            params.extend(condition_params)
+        return where, params
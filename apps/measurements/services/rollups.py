@@ -0,0 +1,330 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from apps.measurements.models import (
+    CumulativeMeasurement,
+    DailyCumulativeMeasurement,
+    HourlyCumulativeMeasurement,
+)
+from apps.measurements.services.response_cache import invalidate
+from apps.transductors.models import Transductor
+
+logger = logging.getLogger("apps")
+
+ROLLUP_FIELDS = ["active_consumption", "active_generated", "reactive_inductive", "reactive_capacitive"]
+
+HOURLY = "hourly"
+DAILY = "daily"
+
+
+def peak_condition():
+    """
+    Peak time rule by `collection_date` (local time): weekdays, between PEAK_TIME_START and
+    PEAK_TIME_END. The measurement at the end of an interval accounts for that interval.
+    """
+    return (
+        Q(collection_date__time__gte=settings.PEAK_TIME_START)
+        & Q(collection_date__time__lte=settings.PEAK_TIME_END)
+        & Q(collection_date__iso_week_day__lte=5)
+    )
+
+
+class CumulativeRollup:
+    """
+    Hourly and daily rollups of the cumulative measurements.
+
+    The buckets are the local hour/day of `collection_date` (the same buckets of TruncHour/TruncDay
+    and of a pandas resample over the raw rows), with one row for the peak and one for the
+    off-peak measurements. A period is read from the rollups for its whole buckets and from the
+    raw measurements for the partial buckets at its edges, so the result is the same as
+    aggregating the raw rows. Whole buckets older than the first rollup of a transductor (history
+    not yet backfilled with `backfill_rollups`) are read from the raw measurements as well.
+    """
+
+    RESOLUTIONS = {
+        HOURLY: (HourlyCumulativeMeasurement, TruncHour),
+        DAILY: (DailyCumulativeMeasurement, TruncDay),
+    }
+
+    def __init__(self, resolution=HOURLY):
+        self.resolution = resolution
+        self.model, self.trunc_function = self.RESOLUTIONS[resolution]
+
+    # --- Buckets ----------------------------------------------------------------------------
+
+    def floor_bucket(self, dt):
+        local_dt = timezone.localtime(dt)
+        if self.resolution == HOURLY:
+            return local_dt.replace(minute=0, second=0, microsecond=0)
+        return local_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def ceil_bucket(self, dt):
+        bucket = self.floor_bucket(dt)
+        return bucket if bucket == dt else self.next_bucket(bucket)
+
+    def next_bucket(self, bucket):
+        step = timedelta(hours=1) if self.resolution == HOURLY else timedelta(days=1)
+        return timezone.localtime(bucket + step)
+
+    def split_period(self, start_date=None, end_date=None):
+        """
+        Splits [start_date, end_date] into the whole buckets read from the rollups, as a
+        (first, last) range (None when there is no whole bucket; open ends are None), and the
+        partial buckets read from the raw measurements, as a Q filter (None without edges).
+        """
+        first_bucket = self.ceil_bucket(start_date) if start_date else None
+        last_bucket = self.floor_bucket(end_date) if end_date else None
+
+        if first_bucket and last_bucket and first_bucket >= last_bucket:
+            return None, Q(collection_date__gte=start_date, collection_date__lte=end_date)
+
+        edges = Q()
+        if start_date and start_date < first_bucket:
+            edges |= Q(collection_date__gte=start_date, collection_date__lt=first_bucket)
+        if end_date:
+            edges |= Q(collection_date__gte=last_bucket, collection_date__lte=end_date)
+        return (first_bucket, last_bucket), edges or None
+
+    def plan_period(self, transductors, start_date=None, end_date=None):
+        """
+        `split_period` with the whole buckets not covered by the rollups of the transductors
+        moved to the raw filter.
+        """
+        bucket_range, edges = self.split_period(start_date, end_date)
+        if bucket_range is None:
+            return bucket_range, edges
+
+        uncovered_until = self.uncovered_until(transductors, bucket_range)
+        if uncovered_until is None:
+            return bucket_range, edges
+
+        first_bucket, last_bucket = bucket_range
+        uncovered = Q(collection_date__lt=uncovered_until)
+        if first_bucket:
+            uncovered &= Q(collection_date__gte=first_bucket)
+        edges = uncovered if edges is None else uncovered | edges
+
+        if last_bucket and uncovered_until >= last_bucket:
+            return None, edges
+        return (uncovered_until, last_bucket), edges
+
+    def uncovered_until(self, transductors, bucket_range):
+        """
+        None when the rollups cover every transductor with raw measurements in the bucket range,
+        otherwise the bucket before which the range has to be read from the raw measurements.
+        Rollups are only missing before the first one of a transductor (they are refreshed by
+        every ingestion), so the first and last dates are enough: index lookups, no scan.
+        """
+        first_bucket, last_bucket = bucket_range
+        raw = CumulativeMeasurement.objects.filter(transductor=OuterRef("pk"))
+        rollups = self.model.objects.filter(transductor=OuterRef("pk"))
+        if first_bucket:
+            raw = raw.filter(collection_date__gte=first_bucket)
+            rollups = rollups.filter(bucket__gte=first_bucket)
+        if last_bucket:
+            raw = raw.filter(collection_date__lt=last_bucket)
+            rollups = rollups.filter(bucket__lt=last_bucket)
+
+        bounds = (
+            Transductor.objects.filter(id__in=transductors)
+            .annotate(
+                first_raw=Subquery(raw.order_by("collection_date").values("collection_date")[:1]),
+                last_raw=Subquery(raw.order_by("-collection_date").values("collection_date")[:1]),
+                first_rollup=Subquery(rollups.order_by("bucket").values("bucket")[:1]),
+            )
+            .values_list("first_raw", "last_raw", "first_rollup")
+        )
+
+        uncovered_until = None
+        for first_raw, last_raw, first_rollup in bounds:
+            if first_raw is None or (first_rollup is not None and self.floor_bucket(first_raw) >= first_rollup):
+                continue
+            until = first_rollup or last_bucket or self.next_bucket(self.floor_bucket(last_raw))
+            uncovered_until = until if uncovered_until is None else max(uncovered_until, until)
+        return uncovered_until
+
+    # --- Reading ----------------------------------------------------------------------------
+
+    def rollup_queryset(self, transductors, bucket_range):
+        first_bucket, last_bucket = bucket_range
+        queryset = self.model.objects.filter(transductor__in=transductors)
+        if first_bucket:
+            queryset = queryset.filter(bucket__gte=first_bucket)
+        if last_bucket:
+            queryset = queryset.filter(bucket__lt=last_bucket)
+        return queryset
+
+    def has_rollups(self, transductors, start_date=None, end_date=None):
+        """
+        Whether the rollups hold measurements of the period, also after the retention deleted
+        the raw ones.
+        """
+        queryset = self.model.objects.filter(transductor__in=transductors)
+        if start_date:
+            queryset = queryset.filter(bucket__gte=self.floor_bucket(start_date), last_collection_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(bucket__lte=end_date, first_collection_date__lte=end_date)
+        return queryset.exists()
+
+    def raw_queryset(self, transductors, edges):
+        return CumulativeMeasurement.objects.filter(transductor__in=transductors).filter(edges)
+
+    def series(self, transductors, fields, start_date=None, end_date=None):
+        """
+        Sums of `fields` by (transductor, bucket, is_peak) in the period, rollups and raw edges
+        merged, ordered by bucket.
+        """
+        bucket_range, edges = self.plan_period(transductors, start_date, end_date)
+
+        rows = []
+        if bucket_range is not None:
+            rollup_queryset = self.rollup_queryset(transductors, bucket_range)
+            rows.extend(rollup_queryset.values("transductor", "bucket", "is_peak", "measurements", *fields))
+        if edges is not None:
+            rows.extend(self.aggregate_raw(self.raw_queryset(transductors, edges), fields))
+
+        return sorted(rows, key=lambda row: row["bucket"])
+
+    def aggregate_raw(self, queryset, fields):
+        return (
+            queryset.annotate(
+                bucket=self.trunc_function("collection_date"),
+                is_peak=ExpressionWrapper(peak_condition(), output_field=BooleanField()),
+            )
+            .values("transductor", "bucket", "is_peak")
+            .annotate(
+                measurements=Count("id"),
+                first_collection_date=Min("collection_date"),
+                last_collection_date=Max("collection_date"),
+                **{field: Sum(field) for field in fields},
+            )
+            .order_by()
+        )
+
+    # --- Maintenance ------------------------------------------------------------------------
+
+    def refresh(self, transductors, start_date, end_date):
+        """
+        Recomputes the buckets of the transductors between start_date and end_date (both
+        rounded out to whole buckets). Hourly buckets are built from the raw measurements,
+        daily buckets from the hourly rollups. Buckets of the range left without measurements
+        are deleted.
+        """
+        first_bucket = self.floor_bucket(start_date)
+        last_bucket = self.next_bucket(self.floor_bucket(end_date))
+
+        if self.resolution == HOURLY:
+            queryset = CumulativeMeasurement.objects.filter(
+                transductor__in=transductors,
+                collection_date__gte=first_bucket,
+                collection_date__lt=last_bucket,
+            )
+            rows = self.aggregate_raw(queryset, ROLLUP_FIELDS)
+        else:
+            rows = self.aggregate_hourly(transductors, first_bucket, last_bucket)
+
+        instances = [
+            self.model(
+                transductor_id=row["transductor"],
+                bucket=row["bucket"],
+                is_peak=row["is_peak"],
+                measurements=row["measurements"],
+                first_collection_date=row["first_collection_date"],
+                last_collection_date=row["last_collection_date"],
+                **{field: row[field] for field in ROLLUP_FIELDS},
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            retained_since = self.retained_since()
+            self.model.objects.filter(
+                transductor__in=transductors,
+                bucket__gte=max(first_bucket, retained_since) if retained_since else first_bucket,
+                bucket__lt=last_bucket,
+            ).delete()
+            self.model.objects.bulk_create(
+                instances,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["transductor", "bucket", "is_peak"],
+                update_fields=[
+                    *ROLLUP_FIELDS,
+                    "measurements",
+                    "first_collection_date",
+                    "last_collection_date",
+                    "updated",
+                ],
+            )
+        invalidate(transductors, start_date)
+        return len(instances)
+
+    def retained_since(self):
+        """
+        First bucket the retention of the cumulative measurements keeps (its local midnight cutoff),
+        None without retention.
+        """
+        days = settings.MEASUREMENT_RETENTION_DAYS["cumulative"]
+        if days is None:
+            return None
+        return self.floor_bucket(timezone.now() - timedelta(days=days)).replace(hour=0)
+
+    def aggregate_hourly(self, transductors, first_bucket, last_bucket):
+        rows = (
+            HourlyCumulativeMeasurement.objects.filter(
+                transductor__in=transductors,
+                bucket__gte=first_bucket,
+                bucket__lt=last_bucket,
+            )
+            .annotate(day=TruncDay("bucket"))
+            .values("transductor", "day", "is_peak")
+            .annotate(
+                total_measurements=Sum("measurements"),
+                first_date=Min("first_collection_date"),
+                last_date=Max("last_collection_date"),
+                **{field: Sum(field) for field in ROLLUP_FIELDS},
+            )
+            .order_by()
+        )
+        return [
+            {
+                "transductor": row["transductor"],
+                "bucket": row["day"],
+                "is_peak": row["is_peak"],
+                "measurements": row["total_measurements"],
+                "first_collection_date": row["first_date"],
+                "last_collection_date": row["last_date"],
+                **{field: row[field] for field in ROLLUP_FIELDS},
+            }
+            for row in rows
+        ]
+
+
+def refresh_rollups(instances):
+    """
+    Refreshes the hourly and daily rollups touched by the new cumulative measurements, over the
+    period of each transductor: the ones with the same period (a whole sweep, usually) are
+    refreshed together, a gap-filled transductor alone.
+    """
+    periods = {}
+    for instance in instances:
+        start_date, end_date = periods.get(instance.transductor_id, (instance.collection_date,) * 2)
+        periods[instance.transductor_id] = (
+            min(start_date, instance.collection_date),
+            max(end_date, instance.collection_date),
+        )
+
+    transductors_by_period = defaultdict(list)
+    for transductor, period in periods.items():
+        transductors_by_period[period].append(transductor)
+
+    for (start_date, end_date), transductors in transductors_by_period.items():
+        for resolution in (HOURLY, DAILY):
+            CumulativeRollup(resolution).refresh(transductors, start_date, end_date)
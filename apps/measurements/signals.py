@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent once per batch by the bulk ingestion services (bulk_create doesn't send post_save).
+# Arguments: sender (measurement model class), instances (list of created measurements).
+measurements_created = Signal()
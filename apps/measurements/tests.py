@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from apps.measurements.services.lttb import epoch_seconds, lttb_matrix, minmax_lttb_matrix, split_bounds
+
+
+def reference_lttb(data, n_out):
+    """
+    LTTB of the (x, y) rows of `data` as computed by the former `LTTBDownSampler._lttb_core`.
+    """
+    n_bins = n_out - 2
+    data_bins = np.array_split(data[1:-1], n_bins)
+    indices = np.zeros(n_out, dtype=int)
+    indices[0], indices[-1] = 0, len(data) - 1
+    start_indices = [1]
+    for i in range(1, len(data_bins)):
+        start_indices.append(start_indices[-1] + len(data_bins[i - 1]))
+
+    for i in range(n_bins):
+        a = data[indices[i]]
+        bs = data_bins[i]
+        next_bin = data_bins[i + 1] if i < n_bins - 1 else data[-1:]
+        c = next_bin.mean(axis=0)
+        a_to_c = c - a
+        areas = 0.5 * np.abs(a_to_c[0] * (bs[:, 1] - a[1]) - a_to_c[1] * (bs[:, 0] - a[0]))
+        indices[i + 1] = start_indices[i] + np.argmax(areas)
+    return indices
+
+
+class LTTBTests(SimpleTestCase):
+    def random_series(self, rng, n_points, n_fields=1):
+        dates = pd.Series(pd.date_range("2026-01-01", periods=n_points, freq="1min", tz="UTC"))
+        values = np.round(rng.normal(220, 5, (n_points, n_fields)), 2)
+        return dates, values
+
+    def test_epoch_seconds_matches_timestamps(self):
+        dates, _ = self.random_series(np.random.default_rng(0), 100)
+        expected = dates.apply(lambda date: date.timestamp()).to_numpy()
+        np.testing.assert_array_equal(epoch_seconds(dates), expected)
+
+    def test_same_points_as_reference(self):
+        rng = np.random.default_rng(0)
+        for _ in range(300):
+            n_points = int(rng.integers(50, 3000))
+            n_out = int(rng.integers(3, min(n_points, 500)))
+            dates, values = self.random_series(rng, n_points, n_fields=2)
+            x = epoch_seconds(dates)
+            indices = lttb_matrix(x, values, n_out)
+            for field in range(values.shape[1]):
+                expected = reference_lttb(np.column_stack([x, values[:, field]]), n_out)
+                np.testing.assert_array_equal(indices[:, field], expected)
+
+
+class MinMaxLTTBTests(SimpleTestCase):
+    def test_selects_bucket_extremes(self):
+        rng = np.random.default_rng(0)
+        for n_points, n_out in [(100, 10), (5000, 500), (20159, 500)]:
+            x = epoch_seconds(pd.Series(pd.date_range("2026-01-01", periods=n_points, freq="1min", tz="UTC")))
+            values = np.round(rng.normal(220, 5, (n_points, 2)), 2)
+            values[rng.integers(0, n_points, n_points // 10), 1] = np.nan
+
+            indices = minmax_lttb_matrix(x, values, n_out)
+
+            self.assertEqual(indices.shape, (n_out, 2))
+            starts, ends = split_bounds(n_points - 2, (n_out - 2) * 2, offset=1)
+            for field in range(values.shape[1]):
+                selected = indices[:, field]
+                self.assertEqual((selected[0], selected[-1]), (0, n_points - 1))
+                self.assertTrue((np.diff(selected) >= 0).all())
+                for position in selected[1:-1]:
+                    bucket = np.searchsorted(ends, position, side="right")
+                    segment = values[starts[bucket] : ends[bucket], field]
+                    self.assertIn(values[position, field], (np.nanmin(segment), np.nanmax(segment)))
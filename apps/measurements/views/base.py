@@ -1,6 +1,6 @@
 import logging
 
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import viewsets
 from rest_framework.decorators import action
 
@@ -9,53 +9,112 @@ from apps.measurements.filters import (
     InstantMeasurementFilter,
 )
 from apps.measurements.models import CumulativeMeasurement, InstantMeasurement
-from apps.measurements.pagination import MeasurementPagination
+from apps.measurements.pagination import MeasurementCursorPagination
 from apps.measurements.serializers import (
-    CumulativeMeasurementQuerySerializer,
+    CumulativeExportQuerySerializer,
     CumulativeMeasurementSerializer,
-    InstantMeasurementQuerySerializer,
+    InstantExportQuerySerializer,
     InstantMeasurementSerializer,
 )
+from apps.measurements.services.arrow_export import ARROW, PARQUET, generate_arrow_response
+from apps.measurements.services.compact_storage import instant_model
 from apps.measurements.services.csv_generator import generate_csv_response
 
 logger = logging.getLogger("apps.measurements.views.base")
 
+KEY_FIELDS = ["collection_date", "transductor"]
 
-class InstantMeasurementViewSet(viewsets.ReadOnlyModelViewSet):
+
+class InstantStorageMixin:
+    """
+    Reads the instant measurements from the table of settings.INSTANT_STORAGE_MODE.
+    """
+
+    def get_queryset(self):
+        return instant_model().objects.all()
+
+
+class ColumnarExportMixin:
+    """
+    Parquet and Arrow IPC stream exports of the filtered measurements. The key fields are always
+    exported, followed by the requested `fields` (all by default).
+    """
+
+    export_filename = "measurements"
+
+    @action(detail=False, methods=["get"], url_path="export-parquet")
+    def export_parquet(self, request):
+        return self._export_columnar(request, PARQUET)
+
+    @action(detail=False, methods=["get"], url_path="export-arrow")
+    def export_arrow(self, request):
+        return self._export_columnar(request, ARROW)
+
+    def _export_columnar(self, request, file_format):
+        validated_params = self._validate_params(request, raise_exception=True)
+        fields = validated_params.get("fields")
+        if fields:
+            fields = KEY_FIELDS + [field for field in fields if field not in KEY_FIELDS]
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by("transductor_id", "collection_date")
+        return generate_arrow_response(queryset, fields, filename=self.export_filename, file_format=file_format)
+
+
+@extend_schema_view(
+    export_parquet=extend_schema(parameters=[InstantExportQuerySerializer]),
+    export_arrow=extend_schema(parameters=[InstantExportQuerySerializer]),
+)
+class InstantMeasurementViewSet(InstantStorageMixin, ColumnarExportMixin, viewsets.ReadOnlyModelViewSet):
     queryset = InstantMeasurement.objects.all()
     serializer_class = InstantMeasurementSerializer
     filterset_class = InstantMeasurementFilter
-    pagination_class = MeasurementPagination
+    pagination_class = MeasurementCursorPagination
+    export_filename = "instant_measurements"
 
-    @extend_schema(parameters=[InstantMeasurementQuerySerializer])
+    @extend_schema(parameters=[InstantExportQuerySerializer])
     @action(detail=False, methods=["get"], url_path="export-csv")
     def export_csv(self, request):
         validated_params = self._validate_params(request, raise_exception=True)
         fields = validated_params.get("fields")
         queryset = self.filter_queryset(self.get_queryset())
-        return generate_csv_response(queryset, fields=fields, filename="instant_measurements.csv")
+        return generate_csv_response(
+            queryset,
+            fields=fields,
+            filename="instant_measurements.csv",
+            compress=validated_params.get("gzip", False),
+        )
 
     def _validate_params(self, request, raise_exception=True):
-        params_serializer = InstantMeasurementQuerySerializer(data=request.query_params)
+        params_serializer = InstantExportQuerySerializer(data=request.query_params)
         params_serializer.is_valid(raise_exception=raise_exception)
         return params_serializer.validated_data
 
 
-class CumulativeMeasurementViewSet(viewsets.ReadOnlyModelViewSet):
+@extend_schema_view(
+    export_parquet=extend_schema(parameters=[CumulativeExportQuerySerializer]),
+    export_arrow=extend_schema(parameters=[CumulativeExportQuerySerializer]),
+)
+class CumulativeMeasurementViewSet(ColumnarExportMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = CumulativeMeasurementSerializer
     queryset = CumulativeMeasurement.objects.all()
     filterset_class = CumulativeMeasurementFilter
-    pagination_class = MeasurementPagination
+    pagination_class = MeasurementCursorPagination
+    export_filename = "cumulative_measurements"
 
-    @extend_schema(parameters=[CumulativeMeasurementQuerySerializer])
+    @extend_schema(parameters=[CumulativeExportQuerySerializer])
     @action(detail=False, methods=["get"], url_path="export-csv")
     def export_csv(self, request):
         validated_params = self._validate_params(request, raise_exception=True)
         queryset = self.filter_queryset(self.get_queryset())
         fields = validated_params.get("fields")
-        return generate_csv_response(queryset, fields=fields, filename="cumulative_measurements.csv")
+        return generate_csv_response(
+            queryset,
+            fields=fields,
+            filename="cumulative_measurements.csv",
+            compress=validated_params.get("gzip", False),
+        )
 
     def _validate_params(self, request, raise_exception=True):
-        params_serializer = CumulativeMeasurementQuerySerializer(data=request.query_params)
+        params_serializer = CumulativeExportQuerySerializer(data=request.query_params)
         params_serializer.is_valid(raise_exception=raise_exception)
         return params_serializer.validated_data
@@ -1,6 +1,8 @@
 import logging
 
 import pandas as pd
+from django.db.models import Max, Min
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
@@ -22,31 +24,96 @@ from apps.measurements.serializers import (
     GraphDataSerializer,
     InstantGraphQuerySerializer,
 )
-from apps.measurements.services.downsampler import LTTBDownSampler
+from apps.measurements.services.compact_storage import CompactMeasurementReader, reads_compact
+from apps.measurements.services.dataframe_loader import queryset_to_dataframe
+from apps.measurements.services.downsampler import (
+    DOWNSAMPLERS,
+    LTTB,
+    M4,
+    MINMAX_LTTB,
+    NO_DOWNSAMPLING,
+    anchor_width,
+)
+from apps.measurements.services.instant_rollups import (
+    InstantRollupReader,
+    bucket_origin,
+    choose_resolution,
+)
+from apps.measurements.services.response_cache import cache_response, etag_response
+from apps.measurements.services.rollups import HOURLY, CumulativeRollup
+from apps.measurements.views.base import InstantStorageMixin
 
 logger = logging.getLogger("apps.measurements.views.graph")
 
 
 @extend_schema(parameters=[InstantGraphQuerySerializer])
-class InstantGraphViewSet(ListModelMixin, GenericViewSet):
+class InstantGraphViewSet(InstantStorageMixin, ListModelMixin, GenericViewSet):
     queryset = InstantMeasurement.objects.all()
     serializer_class = GraphDataSerializer
     filterset_class = InstantMeasurementFilter
 
+    @etag_response
+    @cache_response
     def list(self, request, *args, **kwargs):
         self.validated_params = self._validate_params(request, raise_exception=True)
-        lttb = self.validated_params["lttb"]
+        method = self.validated_params["method"]
         threshold = self.validated_params["threshold"]
+        since = self.validated_params.get("since")
 
-        queryset = self.get_queryset()
-        if not queryset:
+        resolution = self._get_resolution(threshold) if method in (LTTB, MINMAX_LTTB) and not since else None
+        if resolution is not None and not self._rollups_cover(resolution):
+            resolution = None  # history not rolled up yet, downsampled from the measurements
+        if since is not None:
+            data = self._get_incremental_data(since, method, threshold)
+            method = NO_DOWNSAMPLING  # already reduced in SQL
+        elif resolution is not None:
+            data = self._get_rollup_data(resolution)
+        elif reads_compact():
+            data = self._get_compact_data()
+        elif method == M4:
+            data = self._get_m4_data(threshold)
+            method = NO_DOWNSAMPLING  # already reduced in SQL
+        else:
+            fields = ["collection_date", *self.validated_params.get("fields", [])]
+            data = queryset_to_dataframe(self.get_queryset(), fields)
+
+        if data.empty:
             return Response({"detail": "No data found."}, status=status.HTTP_204_NO_CONTENT)
 
-        data = pd.DataFrame(list(queryset))
-        response = self._apply_lttb(data, threshold) if lttb else data
+        response = self._downsample(data, method, threshold) if method != NO_DOWNSAMPLING else data
+        response.attrs.update(data.attrs)
         serializer = self.get_serializer(response)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _get_resolution(self, threshold):
+        """
+        Coarsest rollup resolution that still gives `threshold` points in the period (None: raw).
+        """
+        return choose_resolution(
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+            threshold,
+            only_day=self.validated_params.get("only_day", False),
+        )
+
+    def _rollups_cover(self, resolution):
+        reader = InstantRollupReader(resolution)
+        return reader.covers(
+            self.validated_params["transductor"],
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+        )
+
+    def _get_rollup_data(self, resolution):
+        reader = InstantRollupReader(resolution)
+        return reader.dataframe(
+            self.validated_params["transductor"],
+            self.validated_params.get("fields", []),
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+            only_day=self.validated_params.get("only_day", False),
+        )
+
     def get_queryset(self, *args, **kwargs):
         validated_params = getattr(self, "validated_params", None)
         try:
@@ -57,12 +124,60 @@ class InstantGraphViewSet(ListModelMixin, GenericViewSet):
         filterset = self.filterset_class(self.validated_params, queryset=queryset)
         return filterset.qs
 
-    def _apply_lttb(self, df, threshold):
+    def _get_compact_data(self):
+        reader = CompactMeasurementReader()
+        return reader.dataframe(
+            self.validated_params["transductor"],
+            self.validated_params.get("fields", []),
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+            only_day=self.validated_params.get("only_day", False),
+        )
+
+    def _get_m4_data(self, threshold):
+        """
+        M4 of the raw measurements computed by the database: only about threshold / 4 buckets of
+        at most 4 rows per field are fetched. The buckets are the anchored grid of the incremental
+        requests (`since`), so the points appended later continue the same buckets.
+        """
+        fields = self.validated_params.get("fields", [])
+        queryset = self.get_queryset()
+        start_date = self.validated_params.get("start_date")
+        end_date = self.validated_params.get("end_date")
+        if start_date is None or end_date is None:
+            bounds = queryset.order_by().aggregate(first=Min("collection_date"), last=Max("collection_date"))
+            start_date = start_date or bounds["first"]
+            end_date = end_date or bounds["last"]
+        if start_date is None or end_date is None:
+            return pd.DataFrame(columns=["collection_date", *fields])
+
+        width = anchor_width(start_date, end_date, max(threshold // 4, 1))
+        queryset = queryset.m4_grid(fields, width, bucket_origin())
+        return queryset_to_dataframe(queryset, ["collection_date", *fields])
+
+    def _get_incremental_data(self, since, method, threshold):
+        """
+        Points after `since` (the last timestamp of the client). Downsampled with M4 over buckets
+        of an anchored width aligned to `bucket_origin()`, the grid of the full-window M4: the
+        rows of the bucket of `since` after it and of the open bucket are included, so the latest
+        measurements are returned as soon as they arrive and the client just appends them.
+        """
+        fields = self.validated_params.get("fields", [])
+        queryset = self.get_queryset().filter(collection_date__gt=since)
+        if method == NO_DOWNSAMPLING:
+            return queryset_to_dataframe(queryset, ["collection_date", *fields])
+
+        end_date = self.validated_params.get("end_date") or timezone.now()
+        start_date = self.validated_params.get("start_date") or since
+        width = anchor_width(start_date, end_date, max(threshold // 4, 1))
+        return queryset_to_dataframe(queryset.m4_grid(fields, width, bucket_origin()), ["collection_date", *fields])
+
+    def _downsample(self, df, method, threshold):
         try:
-            downsampler = LTTBDownSampler(threshold, enable_parallel=True)
+            downsampler = DOWNSAMPLERS[method](threshold)
             return downsampler.apply_lttb(df, dt_column="collection_date")
         except Exception as e:
-            logger.error(f"Error in apply_lttb: {e}")
+            logger.error(f"Error in downsampling ({method}): {e}")
             raise ValidationError({"error": str(e)})
 
     def _validate_params(self, request, raise_exception=True):
@@ -78,18 +193,63 @@ class CumulativeGraphViewSet(ListModelMixin, GenericViewSet):
     query_params_class = CumulativeGraphQuerySerializer
     filterset_class = CumulativeMeasurementFilter
 
+    @cache_response
     def list(self, request, *args, **kwargs):
         self.validated_params = self._validate_params(request, raise_exception=True)
 
         queryset = self.get_queryset()
-        if not queryset:
+        if not queryset.exists() and not (self.use_rollups() and self.has_rollups()):
             return Response({"detail": "No data found."}, status=status.HTTP_204_NO_CONTENT)
 
-        data = pd.DataFrame(list(queryset))
+        if self.use_rollups():
+            data = self.get_rollup_dataframe(self.validated_params.get("fields"))
+        else:
+            fields = ["collection_date", *self.validated_params.get("fields", [])]
+            data = queryset_to_dataframe(queryset, fields)
         response = self.apply_resample(data) if self.validated_params.get("freq") else data
         serializer = self.get_serializer(response)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def use_rollups(self):
+        """
+        Sums by whole hours are resampled from the hourly rollups (the bins of the resample are
+        unions of whole hours). `only_day` filters the raw measurements.
+        """
+        freq = self.validated_params.get("freq")
+        if freq is None or self.validated_params.get("agg") != "sum" or self.validated_params.get("only_day"):
+            return False
+        return freq % pd.Timedelta(hours=1) == pd.Timedelta(0)
+
+    def has_rollups(self):
+        """
+        Measurements deleted by the retention are still in the hourly rollups.
+        """
+        return CumulativeRollup(HOURLY).has_rollups(
+            [self.validated_params["transductor"]],
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+        )
+
+    def get_rollup_dataframe(self, fields):
+        """
+        Hourly sums of the transductor in the period (peak and off-peak rows added), with the
+        bucket as `collection_date`.
+        """
+        rows = CumulativeRollup(HOURLY).series(
+            [self.validated_params["transductor"]],
+            fields,
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+        )
+        if not rows:
+            return pd.DataFrame(columns=["collection_date", *fields])
+
+        data = pd.DataFrame(rows, columns=["bucket", *fields])
+        data["bucket"] = pd.to_datetime(data["bucket"], utc=True)
+        data[fields] = data[fields].astype(float)
+        data = data.groupby("bucket", as_index=False)[fields].sum()
+        return data.rename(columns={"bucket": "collection_date"})
+
     def get_queryset(self, *args, **kwargs):
         validated_params = getattr(self, "validated_params", None)
 
@@ -125,6 +285,7 @@ class DailyProfileViewSet(CumulativeGraphViewSet):
     query_params_class = DailyProfileQuerySerializer
     filterset_class = DailyProfileFilter
 
+    @cache_response
     def list(self, request, *args, **kwargs):
         self.validated_params = self._validate_params(request, raise_exception=True)
         fields = self.validated_params.get("fields")
@@ -140,11 +301,16 @@ class DailyProfileViewSet(CumulativeGraphViewSet):
         if detail:
             return queryset.quarter_hourly_avg(fields)
 
-        aggregate_qs = queryset.aggregate_hourly("sum", fields, adjust_hour=False)
-        if not aggregate_qs:
+        data = self.get_rollup_dataframe(fields)
+        if data.empty:
             return []
 
-        data = pd.DataFrame(list(aggregate_qs))
+        data["hour"] = [timezone.localtime(bucket).hour for bucket in data["collection_date"]]
+        if self.validated_params.get("peak_hours"):
+            data = data[data["hour"].between(18, 20)]
+        elif self.validated_params.get("off_peak_hours"):
+            data = data[~data["hour"].between(18, 20)]
+
         grouped_data = data.groupby("hour")[fields].mean().reset_index()
         grouped_data[fields] = grouped_data[fields].astype(float).round(4)
         return grouped_data.to_dict(orient="records")
@@ -20,7 +20,14 @@ from apps.measurements.serializers import (
     UferQuerySerializer,
     UferSerializer,
 )
-from apps.measurements.services import ReportDataAggregator, UferDataAggregator
+from apps.measurements.services import (
+    ReportDataAggregator,
+    ReportRollupAggregator,
+    UferDataAggregator,
+)
+from apps.measurements.services.response_cache import cache_response
+from apps.measurements.services.rollups import HOURLY, CumulativeRollup
+from apps.measurements.views.base import InstantStorageMixin
 from apps.organizations.models import Entity
 from apps.transductors.models import Transductor
 
@@ -46,6 +53,7 @@ class ReportViewSet(ListModelMixin, GenericViewSet):
         filterset = self.filterset_class(self.validated_params, queryset=queryset)
         return filterset.qs
 
+    @cache_response
     def list(self, request, *args, **kwargs):
         self.validated_params = self._validate_params(request, raise_exception=True)
         fields = self.validated_params.get("fields")
@@ -59,10 +67,11 @@ class ReportViewSet(ListModelMixin, GenericViewSet):
         )
 
         queryset = self._get_filtered_queryset(transductors_entity)
-        if not queryset:
+        if not queryset.exists() and not self._has_rollups(transductors_entity):
             return Response({"detail": "No data found."}, status=status.HTTP_204_NO_CONTENT)
 
-        response_data = self._aggregate_data(queryset, fields, detail)
+        response_data = self._aggregate_data(queryset, fields, detail, transductors_entity)
+        total_measurements = self._get_total_measurements(response_data, detail)
         agg_fields = self._get_agg_fields(fields)
 
         if detail:
@@ -72,7 +81,7 @@ class ReportViewSet(ListModelMixin, GenericViewSet):
 
         serializer.is_valid(raise_exception=True)
 
-        response_data = self._build_response_data(queryset, serializer.data, root_entity)
+        response_data = self._build_response_data(total_measurements, serializer.data, root_entity)
         return Response(response_data, status=status.HTTP_200_OK)
 
     def _get_entity(self):
@@ -99,19 +108,53 @@ class ReportViewSet(ListModelMixin, GenericViewSet):
             agg_fields.extend([f"{field}_peak", f"{field}_off_peak"])
         return agg_fields
 
-    def _aggregate_data(self, queryset, fields, detail):
-        aggregator = ReportDataAggregator()
-        return aggregator.perform_aggregation(queryset, fields, detail)
+    def _get_transductor_ids(self, transductors):
+        transductor = self.validated_params.get("transductor")
+        return [transductor] if transductor is not None else list(transductors.values_list("id", flat=True))
+
+    def _has_rollups(self, transductors):
+        """
+        Measurements deleted by the retention are still in the hourly rollups (not read with `only_day`).
+        """
+        if self.validated_params.get("only_day"):
+            return False
+        return CumulativeRollup(HOURLY).has_rollups(
+            self._get_transductor_ids(transductors),
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+        )
+
+    def _aggregate_data(self, queryset, fields, detail, transductors):
+        """
+        The hourly rollups are used unless `only_day` is set, its hours don't match the buckets.
+        """
+        if self.validated_params.get("only_day"):
+            aggregator = ReportDataAggregator()
+            return aggregator.perform_aggregation(queryset, fields, detail)
+
+        aggregator = ReportRollupAggregator()
+        return aggregator.perform_aggregation(
+            self._get_transductor_ids(transductors),
+            fields,
+            self.validated_params.get("start_date"),
+            self.validated_params.get("end_date"),
+            detail,
+        )
+
+    def _get_total_measurements(self, response_data, detail):
+        if detail:
+            return sum(row.get("total_measurements") or 0 for row in response_data)
+        return response_data.get("total_measurements") or 0
 
     def _validate_params(self, request, raise_exception=True):
         params_serializer = ReportQuerySerializer(data=request.query_params)
         params_serializer.is_valid(raise_exception=raise_exception)
         return params_serializer.validated_data
 
-    def _build_response_data(self, queryset, data, entity):
+    def _build_response_data(self, total_measurements, data, entity):
         return {
             "Entity": f"{entity.acronym} - {entity.name}",
-            "total_measurements": queryset.count(),
+            "total_measurements": total_measurements,
             "tariff_peak": settings.TARIFF_PEAK,
             "tariff_off_peak": settings.TARIFF_OFF_PEAK,
             "results": data,
@@ -120,7 +163,7 @@ class ReportViewSet(ListModelMixin, GenericViewSet):
 
 
 @extend_schema(parameters=[UferQuerySerializer])
-class UferViewSet(ListModelMixin, GenericViewSet):
+class UferViewSet(InstantStorageMixin, ListModelMixin, GenericViewSet):
     queryset = InstantMeasurement.objects.all()
     serializer_class = UferSerializer
     filterset_class = InstantMeasurementFilter
@@ -141,6 +184,7 @@ class UferViewSet(ListModelMixin, GenericViewSet):
         filterset = self.filterset_class(self.validated_params, queryset=queryset)
         return filterset.qs
 
+    @cache_response
     def list(self, request, *args, **kwargs):
         self.validated_params = self._validate_params(request, raise_exception=True)
         fields = self.validated_params.get("fields")
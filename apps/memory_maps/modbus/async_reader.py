@@ -0,0 +1,65 @@
+import logging
+
+from apps.memory_maps.modbus.data_reader import ModbusClientFactory, ModbusResponseError
+
+logger = logging.getLogger("apps")
+
+
+class AsyncModbusClientFactory(ModbusClientFactory):
+    """
+    Asyncio version of the ModbusClientFactory. It uses the pymodbus async TCP/UDP clients, so a
+    single event loop can poll thousands of transductors without holding one thread per meter.
+
+    The output of `read_datagroup_blocks` is the same dictionary returned by the blocking reader.
+    The `pool` must be an AsyncModbusConnectionPool created in the running event loop.
+    """
+
+    def __init__(self, ip_address, port, slave_id, method, pool):
+        super().__init__(ip_address, port, slave_id, method, pool=pool)
+
+    async def read_datagroup_blocks(self, read_requests):
+        """
+        Reads the requests of a read plan using Modbus protocol, decodes the data of each block.
+        """
+        collected_data = {}
+
+        async with self.pool.connection(self.ip_address, self.port, self.method) as client:
+            self.client = client
+            for read_request in read_requests:
+                try:
+                    collected_data |= await self._read_request(read_request)
+                except ModbusResponseError:
+                    if len(read_request.segments) == 1:
+                        raise
+                    self._log_split(read_request)
+                    for block_request in read_request.split():
+                        collected_data |= await self._read_request(block_request)
+
+        return collected_data
+
+    async def _read_request(self, read_request):
+        payload = await self._read_registers_block(read_request)
+        if payload is None:
+            return {}
+        return self._decode_request(payload, read_request)
+
+    async def _read_registers_block(self, read_request):
+        """
+        Reads the contents of a contiguous block of registers from modbus device
+        """
+        if read_request.read_method is None:
+            logger.error(f"Invalid function modbus: {read_request.function}")
+            raise NotImplementedError(f"function modbus: {read_request.function} not implemented!")
+
+        read_function = getattr(self.client, read_request.read_method)
+        response = await read_function(
+            address=read_request.start_address,
+            count=read_request.size,
+            slave=self.slave_id,
+        )
+
+        if response.isError():
+            logger.error(f"{self.ip_address} => Error reading holding registers")
+            raise ModbusResponseError(f"{self.ip_address} => Error reading holding registers")
+
+        return response.registers
@@ -0,0 +1,125 @@
+import logging
+import threading
+from dataclasses import dataclass
+
+from apps.memory_maps.modbus.decoder import BlockDecoder, get_block_decoder
+from apps.memory_maps.modbus.read_planner import ReadRequest, plan_reads, requests_saved
+from apps.memory_maps.modbus.settings import DATA_GROUPS, MODBUS_READ_FUNCTIONS
+from apps.memory_maps.models import MemoryMap
+
+logger = logging.getLogger("apps")
+
+
+@dataclass(frozen=True)
+class CompiledBlock:
+    start_address: int
+    size: int
+    type: str
+    byteorder: str
+    function: str
+    read_method: str | None  # pymodbus client method, None when the function is not supported
+    attributes: tuple[str, ...]
+    decoder: BlockDecoder | None  # None for types decoded with BinaryPayloadDecoder (bits)
+
+    @classmethod
+    def from_register_block(cls, register_block: dict):
+        attributes = tuple(register_block["attributes"])
+        return cls(
+            start_address=register_block["start_address"],
+            size=register_block["size"],
+            type=register_block["type"],
+            byteorder=register_block["byteorder"],
+            function=register_block["function"],
+            read_method=MODBUS_READ_FUNCTIONS.get(register_block["function"]),
+            attributes=attributes,
+            decoder=get_block_decoder(register_block["type"], register_block["byteorder"], len(attributes)),
+        )
+
+
+class CompiledMemoryMap:
+    """
+    Read plan of a TransductorModel: register blocks of each data group with the read method
+    and the decoder already resolved, merged into as few Modbus requests as possible.
+    Built once from the MemoryMap JSON and reused every cycle.
+    """
+
+    def __init__(self, memory_map: MemoryMap):
+        self.model_id = memory_map.model_id
+        self.version = (memory_map.updated_at, memory_map.model.max_block_size)
+        self.blocks = {
+            data_group: tuple(
+                CompiledBlock.from_register_block(register_block)
+                for register_block in memory_map.get_memory_map_by_type(data_group)
+            )
+            for data_group in DATA_GROUPS
+        }
+        self.read_plans = {
+            data_group: plan_reads(blocks, memory_map.model.max_block_size)  #
+            for data_group, blocks in self.blocks.items()
+        }
+
+    def get_blocks(self, data_group: str) -> tuple[CompiledBlock, ...]:
+        return self.blocks.get(data_group, ())
+
+    def get_read_plan(self, data_group: str) -> tuple[ReadRequest, ...]:
+        return self.read_plans.get(data_group, ())
+
+    def requests_saved(self, data_group: str) -> int:
+        return requests_saved(self.get_blocks(data_group), self.get_read_plan(data_group))
+
+
+class MemoryMapCache:
+    """
+    In-process cache of CompiledMemoryMap by TransductorModel id.
+
+    `refresh` runs one light query (model_id, updated_at, max_block_size) and only loads the JSON
+    of the memory maps that are new or were updated since they were compiled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compiled: dict[int, CompiledMemoryMap] = {}
+
+    def refresh(self):
+        versions = {
+            model_id: (updated_at, max_block_size)
+            for model_id, updated_at, max_block_size in MemoryMap.objects.values_list(
+                "model_id", "updated_at", "model__max_block_size"
+            )
+        }
+
+        with self._lock:
+            for model_id in set(self._compiled) - set(versions):
+                del self._compiled[model_id]
+
+            stale = [
+                model_id
+                for model_id, version in versions.items()
+                if model_id not in self._compiled or self._compiled[model_id].version != version
+            ]
+            for memory_map in MemoryMap.objects.filter(model_id__in=stale).select_related("model"):
+                compiled = CompiledMemoryMap(memory_map)
+                self._compiled[memory_map.model_id] = compiled
+                for data_group in DATA_GROUPS:
+                    logger.debug(
+                        f"Memory map compiled: {memory_map.model.name} - {data_group}: "
+                        f"{len(compiled.get_blocks(data_group))} blocks in "
+                        f"{len(compiled.get_read_plan(data_group))} requests "
+                        f"({compiled.requests_saved(data_group)} saved)"
+                    )
+
+    def get(self, model_id: int) -> CompiledMemoryMap:
+        """
+        No database access (safe inside the event loop): `refresh` must run before the collection.
+        """
+        compiled = self._compiled.get(model_id)
+        if compiled is None:
+            raise MemoryMap.DoesNotExist(f"No memory map for transductor model: {model_id}")
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._compiled.clear()
+
+
+memory_map_cache = MemoryMapCache()
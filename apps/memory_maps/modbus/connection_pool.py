@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import select
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+
+from pymodbus.client import (
+    AsyncModbusTcpClient,
+    AsyncModbusUdpClient,
+    ModbusTcpClient,
+    ModbusUdpClient,
+)
+from pymodbus.exceptions import ModbusException
+
+from apps.memory_maps.modbus.settings import (
+    MODBUS_POOL_BACKOFF_BASE,
+    MODBUS_POOL_BACKOFF_MAX,
+    MODBUS_POOL_MAX_IDLE,
+    MODBUS_POOL_TIMEOUT,
+    Protocol,
+)
+
+logger = logging.getLogger("apps")
+
+
+@dataclass
+class PooledConnection:
+    client: object
+    last_used: float
+    in_use: bool = False
+
+
+@dataclass
+class BackoffState:
+    failures: int = 0
+    retry_at: float = 0.0
+
+
+class BaseModbusConnectionPool:
+    """
+    Keeps one open Modbus connection per (ip, port, protocol), so the collector and check_trans
+    don't open a new socket on every read. Meters with limited connection slots (Kron Konect, MD30)
+    are not churned every cycle.
+
+    - Health check: a pooled connection is checked before being reused, dead ones are replaced.
+    - Idle eviction: connections unused for more than `max_idle` seconds are closed.
+    - Backoff: after a failed connect, new attempts wait `backoff_base * 2^(failures-1)` seconds.
+    """
+
+    CLIENT_CLASSES: dict = {}
+    CLIENT_KWARGS: dict = {}
+
+    def __init__(
+        self,
+        max_idle=MODBUS_POOL_MAX_IDLE,
+        backoff_base=MODBUS_POOL_BACKOFF_BASE,
+        backoff_max=MODBUS_POOL_BACKOFF_MAX,
+        timeout=MODBUS_POOL_TIMEOUT,
+    ):
+        self.max_idle = max_idle
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.connections: dict[tuple, PooledConnection] = {}
+        self.backoff: dict[tuple, BackoffState] = {}
+
+    @staticmethod
+    def make_key(ip_address, port, protocol):
+        return (ip_address, int(port), int(protocol))
+
+    def evict_idle(self):
+        now = time.monotonic()
+        expired = [
+            key
+            for key, conn in self.connections.items()
+            if not conn.in_use and now - conn.last_used > self.max_idle  #
+        ]
+        for key in expired:
+            logger.debug(f"Evicting idle modbus connection: {key[0]}:{key[1]}")
+            self.discard(key)
+
+    def discard(self, key):
+        conn = self.connections.pop(key, None)
+        if conn is not None:
+            conn.client.close()
+
+    def close_all(self):
+        for key in list(self.connections):
+            self.discard(key)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "connections": len(self.connections),
+            "in_use": sum(conn.in_use for conn in self.connections.values()),
+            "backing_off": sum(state.retry_at > now for state in self.backoff.values()),
+        }
+
+    def _check_backoff(self, key):
+        state = self.backoff.get(key)
+        if state is None:
+            return
+
+        remaining = state.retry_at - time.monotonic()
+        if remaining > 0:
+            raise ConnectionError(
+                f"Connection to {key[0]}:{key[1]} in backoff "
+                f"({state.failures} failures, retry in {remaining:.0f}s)"
+            )
+
+    def _register_failure(self, key):
+        state = self.backoff.setdefault(key, BackoffState())
+        state.failures += 1
+        delay = min(self.backoff_base * 2 ** (state.failures - 1), self.backoff_max)
+        state.retry_at = time.monotonic() + delay
+        logger.warning(f"Connection failure with {key[0]}:{key[1]} ({state.failures}x) - next retry in {delay}s")
+
+    def _register_success(self, key):
+        self.backoff.pop(key, None)
+
+    def _reuse(self, key):
+        conn = self.connections.get(key)
+        if conn is None:
+            return None
+
+        if self._is_healthy(conn.client):
+            conn.in_use = True
+            return conn.client
+
+        logger.debug(f"Discarding unhealthy modbus connection: {key[0]}:{key[1]}")
+        self.discard(key)
+        return None
+
+    def _add(self, key, client):
+        self.connections[key] = PooledConnection(client=client, last_used=time.monotonic(), in_use=True)
+
+    def _release(self, key):
+        conn = self.connections.get(key)
+        if conn is not None:
+            conn.in_use = False
+            conn.last_used = time.monotonic()
+
+    def _is_healthy(self, client):
+        return client.connected
+
+    def _create_client(self, key):
+        ip_address, port, protocol = key
+        client_class = self.CLIENT_CLASSES.get(protocol)
+
+        if client_class is None:
+            logger.error(f"Invalid protocol Modbus Client: {protocol}")
+            raise ModbusException(f"Invalid protocol Modbus Client: {protocol}")
+        return client_class(ip_address, port=port, timeout=self.timeout, **self.CLIENT_KWARGS)
+
+
+class ModbusConnectionPool(BaseModbusConnectionPool):
+    """Thread-safe pool of blocking pymodbus clients."""
+
+    CLIENT_CLASSES = {
+        Protocol.TCP.value: ModbusTcpClient,
+        Protocol.UDP.value: ModbusUdpClient,
+    }
+    # a read that times out is retried by the collector (with the default timeout), not by pymodbus
+    CLIENT_KWARGS = {"retries": 0}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple, threading.Lock] = {}
+
+    @contextmanager
+    def connection(self, ip_address, port, protocol):
+        """
+        Yields a connected client for exclusive use. The connection goes back to the pool when the
+        block succeeds and is closed when it raises (the socket state is unknown after an error).
+        """
+        key = self.make_key(ip_address, port, protocol)
+
+        with self._get_key_lock(key):
+            client = self._acquire(key)
+            try:
+                yield client
+            except BaseException:
+                with self._lock:
+                    self.discard(key)
+                raise
+            else:
+                with self._lock:
+                    self._release(key)
+
+    def _get_key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _acquire(self, key):
+        with self._lock:
+            self.evict_idle()
+            client = self._reuse(key)
+            if client is not None:
+                return client
+            self._check_backoff(key)
+
+        client = self._create_client(key)
+        client.connect()
+        logger.info(f"Starting modbus client: connected to {key[0]}:{key[1]}")
+
+        with self._lock:
+            if not client.connected:
+                client.close()
+                self._register_failure(key)
+                logger.error(f"Connection failure with client: {key[0]}:{key[1]}")
+                raise ConnectionError(f"Connection failure with client: {key[0]}:{key[1]}")
+
+            self._register_success(key)
+            self._add(key, client)
+        return client
+
+    def _is_healthy(self, client):
+        """
+        An idle Modbus socket must have nothing to read: readable means the peer closed it (EOF)
+        or left a stale response behind. Either way the connection can't be reused.
+        """
+        if not client.connected:
+            return False
+
+        try:
+            readable, _, _ = select.select([client.socket], [], [], 0)
+        except (OSError, ValueError, TypeError):
+            return False
+        return not readable
+
+    def close_all(self):
+        with self._lock:
+            super().close_all()
+
+
+class AsyncModbusConnectionPool(BaseModbusConnectionPool):
+    """
+    Pool of asyncio pymodbus clients. The clients are bound to the event loop where they were
+    connected, so each loop must have its own pool.
+    """
+
+    CLIENT_CLASSES = {
+        Protocol.TCP.value: AsyncModbusTcpClient,
+        Protocol.UDP.value: AsyncModbusUdpClient,
+    }
+    # reconnects are handled by the pool (with backoff), not by pymodbus
+    CLIENT_KWARGS = {"reconnect_delay": 0}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._key_locks: dict[tuple, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def connection(self, ip_address, port, protocol):
+        key = self.make_key(ip_address, port, protocol)
+
+        async with self._key_locks.setdefault(key, asyncio.Lock()):
+            client = await self._acquire(key)
+            try:
+                yield client
+            except BaseException:
+                self.discard(key)
+                raise
+            else:
+                self._release(key)
+
+    async def _acquire(self, key):
+        self.evict_idle()
+        client = self._reuse(key)
+        if client is not None:
+            return client
+        self._check_backoff(key)
+
+        client = self._create_client(key)
+        try:
+            await client.connect()
+        except asyncio.CancelledError:
+            client.close()
+            raise
+
+        if not client.connected:
+            client.close()
+            self._register_failure(key)
+            logger.error(f"Connection failure with client: {key[0]}:{key[1]}")
+            raise ConnectionError(f"Connection failure with client: {key[0]}:{key[1]}")
+
+        logger.info(f"Starting async modbus client: connected to {key[0]}:{key[1]}")
+        self._register_success(key)
+        self._add(key, client)
+        return client
+
+
+# Shared by the collector and check_trans within the same process.
+connection_pool = ModbusConnectionPool()
@@ -1,118 +1,123 @@
 import logging
-from enum import Enum
 
-from pymodbus.client.tcp import ModbusTcpClient
-from pymodbus.client.udp import ModbusUdpClient
 from pymodbus.constants import Endian
 from pymodbus.exceptions import ModbusException
 from pymodbus.payload import BinaryPayloadDecoder
 
+from apps.memory_maps.modbus.connection_pool import connection_pool
 from apps.memory_maps.modbus.helpers import (
     ModbusTypeDecoder,
     apply_sign_transformations,
 )
+from apps.memory_maps.modbus.settings import Protocol  # noqa
 
 logger = logging.getLogger("apps")
 
 
-class Protocol(Enum):
-    TCP = 1
-    UDP = 2
-    RTU = 3
-    TLS = 4
+class ModbusResponseError(ModbusException):
+    """
+    Exception response of the device (e.g. ILLEGAL DATA ADDRESS), the connection is still usable.
+    """
 
 
 class ModbusClientFactory:
-    def __init__(self, ip_address, port, slave_id, method):
+    def __init__(self, ip_address, port, slave_id, method, pool=None, timeout=None):
         self.ip_address = ip_address
         self.port = port
         self.method = method
         self.slave_id = slave_id
+        self.pool = pool or connection_pool
+        self.timeout = timeout  # per-read timeout (adaptive), the pool timeout when None
         self.client = None
 
-    def read_datagroup_blocks(self, register_blocks):
+    def read_datagroup_blocks(self, read_requests):
         """
-        Reads data from multiple register blocks using Modbus protocol, decodes the data.
+        Reads the requests of a read plan using Modbus protocol, decodes the data of each block.
+        The connection is taken from the pool and kept open for the next cycles.
         """
-        self._start_modbus_client()
         collected_data = {}
 
-        for register_block in register_blocks:
-            # TODO - Refatorar a forma de identificar a ordem dos bytes (byte_order) e das palavras (wordorder)
-            byte_order = Endian.LITTLE if register_block["byteorder"].startswith(("msb", "f2")) else Endian.BIG
+        with self.pool.connection(self.ip_address, self.port, self.method) as client:
+            self.client = client
+            client.comm_params.timeout_connect = self.timeout or self.pool.timeout
+            for read_request in read_requests:
+                try:
+                    collected_data |= self._read_request(read_request)
+                except ModbusResponseError:
+                    if len(read_request.segments) == 1:
+                        raise
+                    self._log_split(read_request)
+                    for block_request in read_request.split():
+                        collected_data |= self._read_request(block_request)
 
-            payload = self._read_registers_block(register_block)
-            if payload is None:
-                continue
-
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                registers=payload,
-                byteorder=byte_order,
-                wordorder=Endian.LITTLE,
-            )
+        return collected_data
 
-            decoded_data = self._decode_response_message(decoder, register_block)
-            collected_data |= decoded_data
+    def _read_request(self, read_request):
+        payload = self._read_registers_block(read_request)
+        if payload is None:
+            return {}
+        return self._decode_request(payload, read_request)
 
-        self._stop_client()
+    def _decode_request(self, payload, read_request):
+        collected_data = {}
+        for offset, register_block in read_request.segments:
+            segment = payload[offset : offset + register_block.size]
+            collected_data |= self._decode_block(segment, register_block)
         return collected_data
 
-    def _setup_client(self):
-        """Create a client instance"""
+    def _log_split(self, read_request):
+        logger.warning(
+            f"{self.ip_address} => merged read of {read_request.size} registers at "
+            f"{read_request.start_address} rejected, reading its {len(read_request.segments)} blocks"
+        )
 
-        if self.method == Protocol.TCP.value:
-            client = ModbusTcpClient(self.ip_address, self.port)
-        elif self.method == Protocol.UDP.value:
-            client = ModbusUdpClient(self.ip_address, self.port)
-        else:
-            logger.error(f"Invalid protocol Modbus Client: {self.method}")
-            raise ModbusException(f"Invalid protocol Modbus Client: {self.method}")
-        return client
+    def _decode_block(self, payload, register_block):
+        """
+        Decode the registers of a compiled block read from the device. Shared by the blocking and
+        the asyncio readers so both return the same output.
+        """
+        if register_block.decoder is None:
+            return self._decode_payload_block(payload, register_block)
 
-    def _start_modbus_client(self):
-        self.client = self._setup_client()
-        self.client.connect()
-        logger.info(f"Starting modbus client: connected to {self.ip_address}:{self.port}")
+        return {
+            attribute: apply_sign_transformations(attribute, round(value, 2))
+            for attribute, value in zip(register_block.attributes, register_block.decoder.decode(payload))
+        }
 
-        if not self.client.connected:
-            logger.error(f"Connection failure with client: {self.ip_address}:{self.port}")
-            raise ConnectionError(f"Connection failure with client: {self.ip_address}:{self.port}")
+    def _decode_payload_block(self, payload, register_block):
+        """
+        Decode with the pymodbus BinaryPayloadDecoder, for the types without a struct format.
+        """
+        # TODO - Refatorar a forma de identificar a ordem dos bytes (byte_order) e das palavras (wordorder)
+        byte_order = Endian.LITTLE if register_block.byteorder.startswith(("msb", "f2")) else Endian.BIG
 
-    def _stop_client(self):
-        self.client.close()
+        decoder = BinaryPayloadDecoder.fromRegisters(
+            registers=payload,
+            byteorder=byte_order,
+            wordorder=Endian.LITTLE,
+        )
+        return self._decode_response_message(decoder, register_block)
 
-    def _read_registers_block(self, register_block):
+    def _read_registers_block(self, read_request):
         """
         Reads the contents of a contiguous block of registers from modbus device
         """
-
-        starting_address = register_block["start_address"]
-        size = register_block["size"]
-
         # TODO - Pegar o tipo de função de leitura Modbus a partir do datamodel ModelTransductor
         # Simplificar o mapa de memória para nao precisar informar a função de leitura
-        _function = register_block["function"]
-        if _function == "read_input_register":
-            response = self.client.read_input_registers(
-                address=starting_address,
-                count=size,
-                slave=self.slave_id,
-            )
-
-        elif _function == "read_holding_register":
-            response = self.client.read_holding_registers(
-                address=starting_address,
-                count=size,
-                slave=self.slave_id,
-            )
-
-        else:
-            logger.error(f"Invalid function modbus: {register_block['datamodel']}")
-            raise NotImplementedError(f"function modbus: {register_block['datamodel']} not implemented!")
+        if read_request.read_method is None:
+            logger.error(f"Invalid function modbus: {read_request.function}")
+            raise NotImplementedError(f"function modbus: {read_request.function} not implemented!")
+
+        read_function = getattr(self.client, read_request.read_method)
+        response = read_function(
+            address=read_request.start_address,
+            count=read_request.size,
+            slave=self.slave_id,
+        )
 
         if response.isError():
             logger.error(f"{self.ip_address} => Error reading holding registers")
-            raise ModbusException(f"{self.ip_address} => Error reading holding registers")
+            raise ModbusResponseError(f"{self.ip_address} => Error reading holding registers")
 
         return response.registers
 
@@ -125,9 +130,9 @@ class ModbusClientFactory:
         medidores Kron Konect e Embrasul MD30, além das normas ANEEL Prodist e IEC 61000-4-7..
         """
 
-        parse_function = ModbusTypeDecoder().parsers[register_block["type"]]
+        parse_function = ModbusTypeDecoder().parsers[register_block.type]
         decoded_value = {}
-        for attribute in register_block["attributes"]:
+        for attribute in register_block.attributes:
             value = round(parse_function(decoder), 2)
             if isinstance(value, float):
                 value = round(value, 2)
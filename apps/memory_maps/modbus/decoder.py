@@ -0,0 +1,53 @@
+import struct
+from functools import lru_cache
+from operator import itemgetter
+
+from apps.memory_maps.modbus.settings import DATATYPE, MODBUS_REGISTER_SIZE
+
+
+class BlockDecoder:
+    """
+    Decodes a whole register block in a single `struct.unpack_from` call.
+
+    Same result as decoding the block value by value with `BinaryPayloadDecoder` (registers
+    packed with `byteorder` and words of each value in little wordorder), but the word
+    permutation and the struct format are compiled once per (type, byteorder, attributes).
+    """
+
+    def __init__(self, data_type: str, byteorder: str, n_values: int):
+        value_format, value_size = DATATYPE[data_type.upper()].value
+
+        # TODO - Refatorar a forma de identificar a ordem dos bytes (byte_order) e das palavras (wordorder)
+        little_endian = byteorder.startswith(("msb", "f2"))
+        words = value_size // MODBUS_REGISTER_SIZE
+
+        self.n_values = n_values
+        self.n_registers = -(-n_values * value_size // MODBUS_REGISTER_SIZE)
+        self.values_struct = struct.Struct(">" + value_format * n_values)
+
+        # 8-bit values are read byte by byte from the payload in network order (no byteorder)
+        self.register_order = "<" if little_endian and words else ">"
+
+        # wordorder LITTLE: the words of each value are reversed before unpacking
+        self.permutation = None
+        if words > 1:
+            indexes = [value * words + word for value in range(n_values) for word in reversed(range(words))]
+            self.permutation = itemgetter(*indexes)
+
+    def decode(self, registers) -> tuple:
+        registers = registers[: self.n_registers]
+        if self.permutation is not None:
+            registers = self.permutation(registers)
+
+        payload = struct.pack(f"{self.register_order}{len(registers)}H", *registers)
+        return self.values_struct.unpack_from(payload)
+
+
+@lru_cache(maxsize=1024)
+def get_block_decoder(data_type: str, byteorder: str, n_values: int):
+    """
+    Returns the compiled decoder of a block, or None when the type has no fixed struct format.
+    """
+    if data_type.upper() not in DATATYPE.__members__:
+        return None
+    return BlockDecoder(data_type, byteorder, n_values)
@@ -0,0 +1,60 @@
+import threading
+
+from apps.memory_maps.modbus.settings import MODBUS_TIMEOUT_MAX, MODBUS_TIMEOUT_MIN
+
+
+class LatencyTracker:
+    """
+    Per-meter read latency, smoothed as in the TCP retransmission timer (RFC 6298):
+    `srtt` is the EWMA of the latency and `rttvar` the EWMA of its deviation. The timeout of a
+    meter is `srtt + 4 * rttvar`, so a fast meter that hangs is given up in a fraction of the
+    fixed timeout, while slow links keep the time they need.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, min_timeout=MODBUS_TIMEOUT_MIN, max_timeout=MODBUS_TIMEOUT_MAX):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._lock = threading.Lock()
+        self._samples: dict[int, tuple[float, float]] = {}
+
+    def observe(self, key, latency: float):
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                self._samples[key] = (latency, latency / 2)
+                return
+
+            srtt, rttvar = sample
+            rttvar = (1 - self.BETA) * rttvar + self.BETA * abs(srtt - latency)
+            srtt = (1 - self.ALPHA) * srtt + self.ALPHA * latency
+            self._samples[key] = (srtt, rttvar)
+
+    def reset(self, key):
+        with self._lock:
+            self._samples.pop(key, None)
+
+    def timeout(self, key, default: float) -> float:
+        """
+        Timeout for the next read, or `default` while the meter has no latency samples.
+        """
+        sample = self._samples.get(key)
+        if sample is None:
+            return default
+
+        srtt, rttvar = sample
+        return min(max(srtt + 4 * rttvar, self.min_timeout), self.max_timeout)
+
+    def stats(self):
+        with self._lock:
+            timeouts = [self.timeout(key, self.max_timeout) for key in self._samples]
+        return {
+            "meters": len(timeouts),
+            "avg_timeout": round(sum(timeouts) / len(timeouts), 3) if timeouts else None,
+        }
+
+
+# Shared by the collector engines within the same process.
+latency_tracker = LatencyTracker()
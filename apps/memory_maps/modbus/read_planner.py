@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+
+from apps.memory_maps.modbus.settings import MODBUS_MAX_READ_GAP, MODBUS_READ_MAX
+
+
+@dataclass(frozen=True)
+class ReadRequest:
+    """
+    One Modbus read covering one or more register blocks. `segments` holds the offset of each
+    block inside the response registers, used to slice the values back out on decode.
+    """
+
+    start_address: int
+    size: int
+    function: str
+    read_method: str | None
+    segments: tuple  # ((offset, CompiledBlock), ...)
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        start_address = blocks[0].start_address
+        end_address = max(block.start_address + block.size for block in blocks)
+        return cls(
+            start_address=start_address,
+            size=end_address - start_address,
+            function=blocks[0].function,
+            read_method=blocks[0].read_method,
+            segments=tuple((block.start_address - start_address, block) for block in blocks),
+        )
+
+    def split(self):
+        """
+        One request per block, read when the device rejects the merged request.
+        """
+        return tuple(ReadRequest.from_blocks([block]) for _, block in self.segments)
+
+
+def plan_reads(blocks, max_block_size=MODBUS_READ_MAX, max_gap=MODBUS_MAX_READ_GAP) -> tuple[ReadRequest, ...]:
+    """
+    Merges the register blocks (any type) read with the same function into as few requests as
+    possible. Blocks are merged when the address gap between them is at most `max_gap` registers
+    and the request stays within `max_block_size` (limited to MODBUS_READ_MAX) registers.
+
+    Blocks larger than the limit are kept in their own request, as before.
+    """
+    max_size = min(max_block_size or MODBUS_READ_MAX, MODBUS_READ_MAX)
+    ordered = sorted(blocks, key=lambda block: (block.function, block.start_address))
+
+    requests = []
+    current = []
+    for block in ordered:
+        if current:
+            start_address = current[0].start_address
+            end_address = max(item.start_address + item.size for item in current)
+            mergeable = all(
+                [
+                    block.function == current[0].function,
+                    block.start_address - end_address <= max_gap,
+                    max(end_address, block.start_address + block.size) - start_address <= max_size,
+                ]
+            )
+            if mergeable:
+                current.append(block)
+                continue
+
+            requests.append(ReadRequest.from_blocks(current))
+        current = [block]
+
+    if current:
+        requests.append(ReadRequest.from_blocks(current))
+    return tuple(requests)
+
+
+def requests_saved(blocks, requests) -> int:
+    """
+    Number of Modbus round trips saved per poll by the plan.
+    """
+    return len(blocks) - len(requests)
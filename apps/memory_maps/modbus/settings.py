@@ -34,9 +34,44 @@ CONFIG_TRANSDUCTOR = {
 }
 
 
-# Modbus reads and writes in "registers". Our registers have 16 bytes
+class Protocol(Enum):
+    TCP = 1
+    UDP = 2
+    RTU = 3
+    TLS = 4
+
+
+# Modbus reads and writes in "registers". Our registers have 16 bits (2 bytes)
 MODBUS_REGISTER_SIZE: int = 2
 MODBUS_READ_MAX: int = 125
+# Largest address gap (registers) read and discarded to merge two blocks into one request.
+# A device that rejects the unmapped registers (ILLEGAL DATA ADDRESS) gets the blocks of the
+# merged request read one by one instead.
+MODBUS_MAX_READ_GAP: int = 8
+
+# Function column of the CSV map => pymodbus client method
+MODBUS_READ_FUNCTIONS: dict[str, str] = {
+    "read_input_register": "read_input_registers",
+    "read_holding_register": "read_holding_registers",
+}
+
+# Persistent connections (seconds): idle connections are closed after MAX_IDLE, failed
+# reconnects wait BACKOFF_BASE * 2^(failures - 1), limited to BACKOFF_MAX.
+MODBUS_POOL_MAX_IDLE: int = 300
+MODBUS_POOL_BACKOFF_BASE: int = 5
+MODBUS_POOL_BACKOFF_MAX: int = 600
+MODBUS_POOL_TIMEOUT: int = 3
+
+# Adaptive timeout (seconds): smoothed read latency + 4 * latency deviation, within [MIN, MAX].
+# The minimum also has to cover a reconnect (RFC 6298 uses 1s); a read that times out is retried
+# once with the default timeout before the meter is marked broken.
+MODBUS_TIMEOUT_MIN: float = 2.0
+MODBUS_TIMEOUT_MAX: float = 10.0
+
+# Circuit breaker (seconds): broken meters are probed after BREAKER_BASE, then at doubling
+# intervals limited to BREAKER_MAX, counted from the start of the BROKEN status.
+MODBUS_BREAKER_BASE: int = 60
+MODBUS_BREAKER_MAX: int = 3600
 
 
 # type - format - size
@@ -51,7 +86,7 @@ class DATATYPE(Enum):
     INT64 = ("q", 8)
     FLOAT16 = ("e", 2)
     FLOAT32 = ("f", 4)
-    FLOAT64 = ("d", 4)
+    FLOAT64 = ("d", 8)
 
 
 TABLE_EXCEPTION_CODE: dict[str, str] = {
@@ -3,10 +3,11 @@ import multiprocessing
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.core.management.base import BaseCommand, CommandParser
-from pymodbus.client.tcp import ModbusTcpClient
-from pymodbus.exceptions import ConnectionException
+from pymodbus.exceptions import ModbusException
 
+from apps.memory_maps.modbus.connection_pool import connection_pool
 from apps.transductors.models import Status, Transductor
+from apps.transductors.services import CircuitBreaker
 from apps.utils.helpers import log_execution_time
 
 logger = logging.getLogger("tasks")
@@ -17,19 +18,30 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument("--max_workers", type=int, default=8)
+        parser.add_argument("--all", action="store_true", help="Probe every broken transductor (no circuit breaker).")
 
     @log_execution_time(logger, level=logging.INFO)
     def handle(self, *args, **options) -> None:
         max_workers = options["max_workers"]
-        transductors = Transductor.objects.broken_and_non_status()
+        transductors = Transductor.objects.broken_and_non_status().select_related("model")
         self.log_start(transductors, max_workers)
 
         if transductors.exists():
-            self.process_broken_transductors(transductors, options["max_workers"])
+            self.process_broken_transductors(transductors, options["max_workers"], use_breaker=not options["all"])
+            connection_pool.close_all()
         else:
             logger.info("Halted. No broken transducers found.")
 
-    def process_broken_transductors(self, transductors, max_workers):
+    def process_broken_transductors(self, transductors, max_workers, use_breaker=True):
+        """
+        Probes the broken transductors. With the circuit breaker, only the meters whose backoff
+        interval expired are probed; the others are skipped until their next probe time.
+        """
+        if use_breaker:
+            total = len(transductors)
+            transductors = CircuitBreaker().filter_due(transductors)
+            logger.info(f"Circuit breaker: {len(transductors)} of {total} broken transductors due for probing")
+
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_list = []
             for transductor in transductors:
@@ -43,22 +55,22 @@ class Command(BaseCommand):
                     logger.error(f"Error processing transductor: {e}")
 
     def check_transductor(self, transductor):
-        """Tests the connection to a transducer."""
-
-        client = ModbusTcpClient(transductor.ip_address, transductor.port)
+        """
+        Tests the connection to a transducer. The connection is taken from the shared pool, so
+        when it succeeds the collector reuses the same socket instead of opening a new one.
+        """
+        address = f"{transductor.ip_address}:{transductor.port}"
         try:
-            if client.connect():
-                logger.info(f"Connection SUCCESS to transducer at: {transductor.ip_address}:{transductor.port}")
+            with connection_pool.connection(transductor.ip_address, transductor.port, transductor.model.protocol):
+                logger.info(f"Connection SUCCESS to transducer at: {address}")
                 self.activate_transductor(transductor)
-            else:
-                logger.error(f"Connection FAILED to transducer at: {transductor.ip_address}:{transductor.port}")
-                self.deactivate_transductor(transductor)
 
-        except ConnectionException as e:
-            logger.error(f"Connection Error to transducer at: {transductor.ip_address}:{transductor.port} - {str(e)}")
+        except ConnectionError as e:
+            logger.error(f"Connection FAILED to transducer at: {address} - {str(e)}")
+            self.deactivate_transductor(transductor)
 
-        finally:
-            client.close()
+        except ModbusException as e:
+            logger.error(f"Connection Error to transducer at: {address} - {str(e)}")
 
     def activate_transductor(self, transductor: Transductor) -> None:
         logger.info(f"Activated transducer: {transductor.ip_address}:{transductor.port}.")
@@ -1,27 +1,40 @@
+import asyncio
 import logging
 import multiprocessing
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.core.management import BaseCommand
 from django.core.management.base import CommandError, CommandParser
 from django.utils import timezone
 
-from apps.measurements.serializers import (
-    CumulativeMeasurementSerializer,
-    InstantMeasurementSerializer,
+from apps.measurements.services import (
+    CumulativeMeasurementBulkIngestor,
+    InstantMeasurementBulkIngestor,
+)
+from apps.memory_maps.modbus.async_reader import AsyncModbusClientFactory
+from apps.memory_maps.modbus.compiled_map import memory_map_cache
+from apps.memory_maps.modbus.connection_pool import (
+    AsyncModbusConnectionPool,
+    connection_pool,
 )
 from apps.memory_maps.modbus.data_reader import ModbusClientFactory
 from apps.memory_maps.modbus.helpers import get_now
+from apps.memory_maps.modbus.latency import latency_tracker
 from apps.memory_maps.modbus.settings import (
     DATA_GROUPS,
     DATA_GROUP_CUMULATIVE,
     DATA_GROUP_INSTANT,
 )
 from apps.transductors.models import Transductor
+from apps.transductors.scheduler import nominal_collection_date, poll_offset, staggered
 from apps.utils.helpers import log_execution_time
 
 logger = logging.getLogger("tasks")
 
+ENGINE_THREAD = "thread"
+ENGINE_ASYNC = "async"
+
 
 class Command(BaseCommand):
     """
@@ -34,14 +47,23 @@ class Command(BaseCommand):
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument("data_group", type=str)
         parser.add_argument("--max_workers", type=int, default=16)
+        parser.add_argument("--engine", type=str, choices=[ENGINE_THREAD, ENGINE_ASYNC], default=ENGINE_THREAD)
+        parser.add_argument("--max_concurrency", type=int, default=512)
+        parser.add_argument("--timeout", type=float, default=10.0, help="Per-meter timeout in seconds (async).")
+        parser.add_argument("--spread", type=float, default=0, help="Seconds to spread the polls over.")
 
     @log_execution_time(logger, level=logging.INFO)
     def handle(self, *args, **options):
         data_group = options["data_group"].lower().strip()
         max_workers = options["max_workers"]
+        self.engine = options["engine"]
+        self.max_concurrency = options["max_concurrency"]
+        self.timeout = options["timeout"]
+        self.spread = options["spread"]
+        self.collection_date = nominal_collection_date(data_group, timezone.now())
         self.log_start(data_group, max_workers)
 
-        active_transductors = Transductor.objects.active().select_related("model__memory_map")
+        active_transductors = Transductor.objects.active().select_related("model")
         self.log_active_transductor(active_transductors)
 
         if data_group not in DATA_GROUPS:
@@ -49,14 +71,27 @@ class Command(BaseCommand):
             raise CommandError(f"Unknown data_group: {data_group}")
 
         if active_transductors.exists():
-            modbus_data = self.process_collection(active_transductors, data_group, max_workers)
+            try:
+                modbus_data = self.process_collection(active_transductors, data_group, max_workers)
+            finally:
+                self.close_connections()
             self.save_data_to_database(modbus_data, data_group)
         else:
             logger.warning(f"No data was collected for the group {data_group}. Halting collect...")
 
     def process_collection(self, transductors, data_group, max_workers):
         """
-        Collect data from each transductor in parallel.
+        Collect data from each transductor in parallel, using the engine selected in the options.
+        The compiled memory maps are refreshed once per collection (only changed maps are rebuilt).
+        """
+        memory_map_cache.refresh()
+        if self.engine == ENGINE_ASYNC:
+            return self.process_collection_async(transductors, data_group)
+        return self.process_collection_threads(transductors, data_group, max_workers)
+
+    def process_collection_threads(self, transductors, data_group, max_workers):
+        """
+        Collect data from each transductor in a ThreadPoolExecutor (blocking Modbus clients).
         """
         if max_workers is None:
             max_workers = multiprocessing.cpu_count() * 4
@@ -67,7 +102,11 @@ class Command(BaseCommand):
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_list = []
             logger.debug("Starting data collection in parallel:")
-            for transductor in transductors:
+            start_time = time.monotonic()
+            for offset, transductor in staggered(transductors, self.spread):
+                delay = start_time + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
                 future = executor.submit(self.collect_transductor_data, transductor, data_group)
                 future_list.append(future)
 
@@ -87,19 +126,66 @@ class Command(BaseCommand):
 
         return modbus_data
 
-    def collect_transductor_data(self, transductor, data_group) -> int:
+    def process_collection_async(self, transductors, data_group):
         """
-        Collect data from active transductors and save it to the database.
+        Collect data from all transductors in a single event loop. The concurrency is limited by a
+        global semaphore and every meter has its own adaptive timeout (observed latency), so dead
+        meters don't hold the sweep.
+        Database writes (set_broken) are done after the loop, the ORM is not async safe.
         """
+        transductors = list(transductors)
+        loop = self.get_event_loop()
+        results = loop.run_until_complete(self._gather_transductors_data(transductors, data_group))
 
-        memory_map = transductor.model.memory_map
-        register_blocks = memory_map.get_memory_map_by_type(data_group)
+        modbus_data = []
+        for transductor, result in zip(transductors, results):
+            if result["broken"]:
+                logger.error(f"{result['errors']} - changes status to BROKEN")
+                transductor.set_broken(notes=result["errors"])
+                logger.info(f"Deactivating transductor: {transductor.current_status}")
+            else:
+                logger.debug(f"Transductor: {result['collected']['transductor']}")
+                modbus_data.append(result["collected"])
+        return modbus_data
 
-        modbus_collector = ModbusClientFactory(
+    def get_event_loop(self):
+        """
+        Event loop (and its connection pool) used by the async engine. It is kept between calls, so
+        a long-lived process reuses the open connections on every collection.
+        """
+        if getattr(self, "loop", None) is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+            self.async_pool = AsyncModbusConnectionPool(timeout=self.timeout)
+        return self.loop
+
+    def close_connections(self):
+        connection_pool.close_all()
+
+        if getattr(self, "loop", None) is not None and not self.loop.is_closed():
+            self.async_pool.close_all()
+            self.loop.run_until_complete(asyncio.sleep(0))  # let the transports finish closing
+            self.loop.close()
+
+    async def _gather_transductors_data(self, transductors, data_group):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            self.collect_transductor_data_async(transductor, data_group, semaphore)  #
+            for transductor in transductors
+        ]
+        return await asyncio.gather(*tasks)
+
+    async def collect_transductor_data_async(self, transductor, data_group, semaphore) -> dict:
+        """
+        Async version of `collect_transductor_data`, returns the same result dictionary.
+        """
+        read_requests = memory_map_cache.get(transductor.model_id).get_read_plan(data_group)
+
+        modbus_collector = AsyncModbusClientFactory(
             ip_address=transductor.ip_address,
             port=transductor.port,
             slave_id=transductor.model.modbus_addr_id,
             method=transductor.model.protocol,
+            pool=self.async_pool,
         )
 
         modbus_data = {
@@ -108,13 +194,74 @@ class Command(BaseCommand):
             "broken": False,  # Indica se houve falha no medidor
         }
 
+        # the poll slot is waited for outside the semaphore, it doesn't hold a concurrency slot
+        await asyncio.sleep(poll_offset(transductor.id, self.spread))
+
+        async with semaphore:
+            timeout = latency_tracker.timeout(transductor.id, default=self.timeout)
+            try:
+                try:
+                    collected_data = await self.read_blocks_async(transductor, modbus_collector, read_requests, timeout)
+                except Exception as e:
+                    if timeout >= self.timeout:
+                        raise
+                    # the adaptive timeout can be short for a reconnect or a slow reply: one more try
+                    # with the default timeout before the meter is marked broken
+                    logger.debug(f"Retrying {transductor.ip_address} after {type(e).__name__} ({timeout:.2f}s)")
+                    timeout = self.timeout
+                    collected_data = await self.read_blocks_async(transductor, modbus_collector, read_requests, timeout)
+                collected_data["transductor"] = transductor.id
+                modbus_data["collected"] = collected_data
+                logger.debug(f"Collected data from {transductor.model.name}")
+
+            except asyncio.TimeoutError:
+                latency_tracker.reset(transductor.id)
+                modbus_data["broken"] = True
+                modbus_data["errors"] = f"Timeout ({timeout:.2f}s) reading {transductor.ip_address}"
+
+            except Exception as e:
+                latency_tracker.reset(transductor.id)
+                modbus_data["broken"] = True
+                modbus_data["errors"] = str(e) or type(e).__name__
+
+        return modbus_data
+
+    async def read_blocks_async(self, transductor, modbus_collector, read_requests, timeout):
+        start_time = time.perf_counter()
+        read_blocks = modbus_collector.read_datagroup_blocks(read_requests)
+        collected_data = await asyncio.wait_for(read_blocks, timeout=timeout)
+        latency_tracker.observe(transductor.id, time.perf_counter() - start_time)
+        return collected_data
+
+    def collect_transductor_data(self, transductor, data_group) -> int:
+        """
+        Collect data from active transductors and save it to the database.
+        """
+
+        read_requests = memory_map_cache.get(transductor.model_id).get_read_plan(data_group)
+        timeout = latency_tracker.timeout(transductor.id, default=None)
+
+        modbus_data = {
+            "collected": {},  # Dados coletados a partir do Modbus
+            "errors": "",  # Mensagens de erro durante a coleta
+            "broken": False,  # Indica se houve falha no medidor
+        }
+
         try:
-            collected_data = modbus_collector.read_datagroup_blocks(register_blocks)
+            try:
+                collected_data = self.read_blocks(transductor, read_requests, timeout)
+            except Exception as e:
+                if timeout is None:
+                    raise
+                # one more try with the pool timeout before the meter is marked broken
+                logger.debug(f"Retrying {transductor.ip_address} after {type(e).__name__} ({timeout:.2f}s)")
+                collected_data = self.read_blocks(transductor, read_requests, None)
             collected_data["transductor"] = transductor.id
             modbus_data["collected"] = collected_data
             logger.debug(f"Collected data from {transductor.model.name}")
 
         except Exception as e:
+            latency_tracker.reset(transductor.id)
             modbus_data["broken"] = True
             modbus_data["errors"] = str(e)
             logger.error(f"Errors: {modbus_data['errors']}")
@@ -122,59 +269,51 @@ class Command(BaseCommand):
             logger.info(f"Deactivating transductor: {transductor.current_status}")
         return modbus_data
 
+    def read_blocks(self, transductor, read_requests, timeout):
+        modbus_collector = ModbusClientFactory(
+            ip_address=transductor.ip_address,
+            port=transductor.port,
+            slave_id=transductor.model.modbus_addr_id,
+            method=transductor.model.protocol,
+            timeout=timeout,
+        )
+
+        start_time = time.perf_counter()
+        collected_data = modbus_collector.read_datagroup_blocks(read_requests)
+        latency_tracker.observe(transductor.id, time.perf_counter() - start_time)
+        return collected_data
+
     def save_data_to_database(self, modbus_data, data_group) -> None:
         """
-        Save the provided modbus_data to the database using the provided serializer class.
+        Save the provided modbus_data to the database using the bulk ingestor of the data group:
+        one validation pass and one INSERT for the whole sweep.
         """
-        serializer_class = self.get_serializer_class(data_group)
-        serializer = serializer_class(data=modbus_data, many=True)
+        ingestor_class = self.get_ingestor_class(data_group)
+        ingestor = ingestor_class()
+        created = ingestor.ingest(modbus_data, collection_date=self.collection_date)
 
-        try:
-            serializer.is_valid(raise_exception=True)
-        except Exception:
-            valid_data = self.partition_valid_and_error_data(serializer)
+        if not created:
+            logger.warning(f"{get_now()} - No valid data to save in the database")
+            return
 
-            if not valid_data:
-                logger.warning(f"{get_now()} - No valid data to save in the database")
-                return
+        self.log_report(created, ingestor, data_group)
 
-            serializer = serializer_class(data=valid_data, many=True)
-            serializer.is_valid(raise_exception=True)
-
-        serializer.save()
-        self.log_report(serializer, data_group)
-
-    def get_serializer_class(self, data_group: str):
-        serializer_class = {
-            DATA_GROUP_INSTANT: InstantMeasurementSerializer,
-            DATA_GROUP_CUMULATIVE: CumulativeMeasurementSerializer,
+    def get_ingestor_class(self, data_group: str):
+        ingestor_class = {
+            DATA_GROUP_INSTANT: InstantMeasurementBulkIngestor,
+            DATA_GROUP_CUMULATIVE: CumulativeMeasurementBulkIngestor,
         }
-        return serializer_class.get(data_group)
-
-    def partition_valid_and_error_data(self, serializer):
-        """
-        Partition data into valid entries and error details based on serializer validation.
-        More detailed error contexts and structured error handling.
-        """
-        valid_data = []
-        for error, data in zip(serializer.errors, serializer.initial_data):
-            if not error:
-                valid_data.append(data)
-            else:
-                error_message = {
-                    "error": error,
-                    "data": data,
-                    "timestamp": timezone.now().isoformat(),
-                }
-
-                logger.error(f"Data validation error: {error_message}")
-
-        return valid_data
+        return ingestor_class.get(data_group)
 
     def log_start(self, data_group, max_workers):
         logger.info(f"   Data collector - {data_group.upper()}")
-        logger.debug(f"   MultiThread - Cores: {multiprocessing.cpu_count()}")
-        logger.debug(f"   MultiThread - Max workers: {max_workers}")
+        logger.debug(f"   Collection date: {self.collection_date} - polls spread over {self.spread}s")
+        if self.engine == ENGINE_ASYNC:
+            logger.debug(f"   Asyncio - Max concurrency: {self.max_concurrency}")
+            logger.debug(f"   Asyncio - Timeout per meter: {self.timeout}s")
+        else:
+            logger.debug(f"   MultiThread - Cores: {multiprocessing.cpu_count()}")
+            logger.debug(f"   MultiThread - Max workers: {max_workers}")
         logger.debug("-" * 85)
 
     def log_active_transductor(self, transductor):
@@ -183,9 +322,10 @@ class Command(BaseCommand):
         else:
             logger.warning("No active Transductors in database")
 
-    def log_report(self, serializer, data_group):
+    def log_report(self, created, ingestor, data_group):
+        logger.info(f"[{len(created)}] {data_group.capitalize()} collects completed and saved database.")
+        if ingestor.errors:
+            logger.warning(f"[{len(ingestor.errors)}] collects discarded by validation errors.")
         if logger.level == logging.DEBUG:
-            data_group = data_group.capitalize()
-            logger.info(f"[{len(serializer.data)}] Collects completed and saved database.")
-            for data in serializer.data:
-                logger.debug(f"transductor: {data['transductor']} - {data_group} Measurement: {data['id']}")
+            for measurement in created:
+                logger.debug(f"transductor: {measurement.transductor_id} - Measurement: {measurement.id}")
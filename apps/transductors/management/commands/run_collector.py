@@ -0,0 +1,199 @@
+import json
+import logging
+import signal
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import CommandParser
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.memory_maps.modbus.connection_pool import connection_pool
+from apps.memory_maps.modbus.latency import latency_tracker
+from apps.memory_maps.modbus.settings import DATA_GROUP_CUMULATIVE, DATA_GROUP_INSTANT
+from apps.transductors.management.commands.check_trans import Command as CheckTransCommand
+from apps.transductors.management.commands.collect_data import ENGINE_ASYNC, ENGINE_THREAD
+from apps.transductors.management.commands.collect_data import Command as CollectDataCommand
+from apps.transductors.models import Transductor
+from apps.transductors.scheduler import nominal_collection_date
+
+logger = logging.getLogger("tasks")
+
+STATUS_FILE_PATH = settings.LOG_PATH / "tasks" / "collector_status.json"
+CHECK_BROKEN = "check_broken"
+
+# ticks run one after the other: a spread longer than this delays the minutely tick after a quarter-hour
+MAX_SPREAD = 30
+
+
+class Command(CollectDataCommand):
+    """
+    Long-lived data collector. Replaces the `collect_data` process spawned by the cronjob every
+    minute/quarter: both data groups are scheduled internally on aligned wall-clock ticks, so Django
+    startup, DB connection setup and imports are paid only once.
+    """
+
+    help = "Runs the data collector as a daemon, scheduling minutely and quarterly collections."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--max_workers", type=int, default=16)
+        parser.add_argument("--engine", type=str, choices=[ENGINE_THREAD, ENGINE_ASYNC], default=ENGINE_ASYNC)
+        parser.add_argument("--max_concurrency", type=int, default=512)
+        parser.add_argument("--timeout", type=float, default=10.0, help="Per-meter timeout in seconds (async).")
+        parser.add_argument("--minutely_offset", type=int, default=15, help="Seconds after each minute.")
+        parser.add_argument("--quarterly_offset", type=int, default=30, help="Seconds after each quarter-hour.")
+        parser.add_argument("--minutely_spread", type=float, default=30, help="Seconds to spread the polls over.")
+        parser.add_argument("--quarterly_spread", type=float, default=30, help="Seconds to spread the polls over.")
+        parser.add_argument("--check_workers", type=int, default=8, help="Workers to test broken transductors.")
+
+    def handle(self, *args, **options):
+        self.max_workers = options["max_workers"]
+        self.check_workers = options["check_workers"]
+        self.engine = options["engine"]
+        self.max_concurrency = options["max_concurrency"]
+        self.timeout = options["timeout"]
+        self.running = True
+        self.tick_stats = {}
+        self.spreads = {
+            DATA_GROUP_INSTANT: options["minutely_spread"],
+            DATA_GROUP_CUMULATIVE: options["quarterly_spread"],
+        }
+        for data_group, spread in self.spreads.items():
+            if spread > MAX_SPREAD:
+                logger.warning(f"{data_group.upper()} spread of {spread}s limited to {MAX_SPREAD}s.")
+                self.spreads[data_group] = MAX_SPREAD
+
+        # job: (interval in seconds, offset in seconds)
+        # Broken transductors are tested here (not by a check_trans process) to share the connection pool.
+        self.schedule = {
+            CHECK_BROKEN: (60, 0),
+            DATA_GROUP_INSTANT: (60, options["minutely_offset"]),
+            DATA_GROUP_CUMULATIVE: (15 * 60, options["quarterly_offset"]),
+        }
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        logger.info("-" * 85)
+        logger.info(f"=> Starting collector daemon - engine: {self.engine}")
+        for data_group, (interval, offset) in self.schedule.items():
+            spread = self.spreads.get(data_group, 0)
+            logger.info(f"   {data_group.upper()}: every {interval}s (+{offset}s, spread over {spread}s)")
+
+        next_ticks = {data_group: self.next_tick(*params) for data_group, params in self.schedule.items()}
+
+        while self.running:
+            data_group = min(next_ticks, key=next_ticks.get)
+            tick = next_ticks[data_group]
+
+            self.sleep_until(tick)
+            if not self.running:
+                break
+
+            if data_group == CHECK_BROKEN:
+                self.check_broken_transductors()
+            else:
+                self.run_tick(data_group, tick)
+            next_ticks[data_group] = self.next_tick(*self.schedule[data_group], after=tick)
+
+        self.close_connections()
+        logger.info("=> Collector daemon stopped.")
+
+    def stop(self, signum, frame):
+        logger.info(f"Received signal {signum}, stopping collector after the current tick...")
+        self.running = False
+
+    def next_tick(self, interval, offset, after=None):
+        """
+        Returns the next epoch time aligned to `interval` (plus `offset`), skipping ticks that have
+        already passed if a previous collection overran its window.
+        """
+        now = time.time()
+        reference = max(now, after or now)
+        tick = (reference - offset) // interval * interval + offset
+        while tick <= reference:
+            tick += interval
+
+        if after is not None and tick - after > interval:
+            logger.warning(f"Collector overran, skipped {int((tick - after) // interval) - 1} tick(s).")
+        return tick
+
+    def sleep_until(self, tick):
+        while self.running:
+            remaining = tick - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 1.0))
+
+    def check_broken_transductors(self):
+        close_old_connections()
+        try:
+            transductors = Transductor.objects.broken_and_non_status().select_related("model")
+            if transductors.exists():
+                CheckTransCommand().process_broken_transductors(transductors, self.check_workers)
+        except Exception as e:
+            logger.error(f"Check of broken transductors failed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+    def run_tick(self, data_group, tick):
+        """
+        Runs one collection, timing each stage. Errors are logged and never stop the daemon.
+        """
+        close_old_connections()
+        tick_date = datetime.fromtimestamp(tick, tz=timezone.get_current_timezone())
+        self.spread = self.spreads[data_group]
+        self.collection_date = nominal_collection_date(data_group, tick_date)
+        stats = {
+            "data_group": data_group,
+            "tick": tick_date.isoformat(),
+            "lag": round(time.time() - tick, 3),
+        }
+
+        try:
+            start_time = time.perf_counter()
+            transductors = list(Transductor.objects.active().select_related("model"))
+            stats["transductors"] = len(transductors)
+            stats["query_time"] = round(time.perf_counter() - start_time, 3)
+
+            if transductors:
+                start_time = time.perf_counter()
+                modbus_data = self.process_collection(transductors, data_group, self.max_workers)
+                stats["collect_time"] = round(time.perf_counter() - start_time, 3)
+                stats["collected"] = len(modbus_data)
+                stats["failed"] = len(transductors) - len(modbus_data)
+
+                start_time = time.perf_counter()
+                self.save_data_to_database(modbus_data, data_group)
+                stats["save_time"] = round(time.perf_counter() - start_time, 3)
+            else:
+                logger.warning(f"No active Transductors, skipping {data_group} tick.")
+
+        except Exception as e:
+            stats["error"] = str(e)
+            logger.error(f"Collector tick {data_group} failed: {e}", exc_info=True)
+
+        finally:
+            close_old_connections()
+
+        stats["total_time"] = round(time.time() - tick - stats["lag"], 3)
+        stats["connections"] = connection_pool.stats()
+        stats["latency"] = latency_tracker.stats()
+        if getattr(self, "async_pool", None) is not None:
+            stats["async_connections"] = self.async_pool.stats()
+        self.log_tick(stats)
+
+    def log_tick(self, stats):
+        self.tick_stats[stats["data_group"]] = stats
+        logger.info(
+            f"[{stats['data_group'].upper()}] tick {stats['tick']} - lag: {stats['lag']}s, "
+            f"meters: {stats.get('collected', 0)}/{stats.get('transductors', 0)}, "
+            f"collect: {stats.get('collect_time', 0)}s, save: {stats.get('save_time', 0)}s, "
+            f"total: {stats['total_time']}s"
+        )
+
+        try:
+            STATUS_FILE_PATH.write_text(json.dumps(self.tick_stats, indent=2))
+        except OSError as e:
+            logger.warning(f"Unable to write collector status file: {e}")
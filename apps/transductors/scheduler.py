@@ -0,0 +1,37 @@
+import zlib
+
+from apps.memory_maps.modbus.settings import DATA_GROUP_CUMULATIVE, DATA_GROUP_INSTANT
+from apps.utils.helpers import floor_datetime_minutes
+
+COLLECTION_INTERVAL_MINUTES = {
+    DATA_GROUP_INSTANT: 1,
+    DATA_GROUP_CUMULATIVE: 15,
+}
+
+
+def poll_offset(transductor_id: int, spread: float) -> float:
+    """
+    Deterministic offset (seconds) of a transductor inside the collection window [0, spread).
+    The hash spreads the fleet evenly and keeps each meter in the same slot on every cycle, so
+    its readings stay equally spaced.
+    """
+    if spread <= 0:
+        return 0.0
+    return zlib.crc32(str(transductor_id).encode()) / 2**32 * spread
+
+
+def staggered(transductors, spread: float) -> list[tuple[float, object]]:
+    """
+    Returns (offset, transductor) pairs ordered by offset.
+    """
+    return sorted(
+        ((poll_offset(transductor.id, spread), transductor) for transductor in transductors),
+        key=lambda item: item[0],
+    )
+
+
+def nominal_collection_date(data_group: str, reference):
+    """
+    Collection date of a sweep: the nominal tick, not the moment each meter was polled.
+    """
+    return floor_datetime_minutes(reference, COLLECTION_INTERVAL_MINUTES.get(data_group, 1))
@@ -1,6 +1,10 @@
+import math
+
 from django.db.models import Count, Q, Sum
+from django.utils import timezone
 
-from apps.transductors.models import Status
+from apps.memory_maps.modbus.settings import MODBUS_BREAKER_BASE, MODBUS_BREAKER_MAX
+from apps.transductors.models import Status, StatusHistory
 
 
 def calculate_aggregation_status(queryset, transductor):
@@ -39,3 +43,70 @@ def calculate_aggregation_status(queryset, transductor):
             "notes": transductor.current_status.notes,
         },
     }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of the broken transductors, with the state kept in StatusHistory: the open
+    BROKEN status is the open circuit and its `start_time` the moment it opened.
+
+    Broken meters are probed (half-open) after `base` seconds, then at doubling intervals limited
+    to `max_delay` (base=60: 1, 3, 7, 15 min ...), so a meter that stays dead costs fewer and
+    fewer connection attempts. A successful probe sets the status ACTIVE, closing the circuit.
+    `window` is the interval between two checks: a probe is due when its time passed within it.
+    """
+
+    def __init__(self, base=MODBUS_BREAKER_BASE, max_delay=MODBUS_BREAKER_MAX, window=60):
+        self.base = base
+        self.max_delay = max_delay
+        self.window = window
+        # number of doubling intervals before reaching max_delay
+        self.doublings = int(math.log2(max_delay / base)) + 1 if max_delay >= base else 0
+
+    def failures(self, elapsed: float) -> int:
+        """
+        Consecutive failed probes expected after `elapsed` seconds in the BROKEN status.
+        """
+        if elapsed < self.base:
+            return 0
+
+        failures = int(math.log2(elapsed / self.base + 1))
+        if failures <= self.doublings:
+            return failures
+        return self.doublings + int((elapsed - self.probe_offset(self.doublings)) // self.max_delay)
+
+    def probe_offset(self, failures: int) -> float:
+        """
+        Seconds from the start of the BROKEN status to the probe number `failures`.
+        """
+        if failures <= self.doublings:
+            return self.base * (2**failures - 1)
+        return self.base * (2**self.doublings - 1) + (failures - self.doublings) * self.max_delay
+
+    def is_due(self, broken_since, now=None) -> bool:
+        if broken_since is None:
+            return True
+
+        elapsed = ((now or timezone.now()) - broken_since).total_seconds()
+        failures = self.failures(elapsed)
+        return failures > 0 and elapsed - self.probe_offset(failures) < self.window
+
+    def filter_due(self, transductors):
+        """
+        Returns the transductors whose probe is due. Transductors without status are always due.
+        """
+        transductors = list(transductors)
+        broken_since = dict(
+            StatusHistory.objects.filter(
+                transductor__in=transductors,
+                status=Status.BROKEN,
+                end_time__isnull=True,
+            ).values_list("transductor_id", "start_time")
+        )
+
+        now = timezone.now()
+        return [
+            transductor  #
+            for transductor in transductors
+            if self.is_due(broken_since.get(transductor.id), now)
+        ]
@@ -94,7 +94,18 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "unique-snowflake",
-    }
+    },
+    # shared by the processes: redis://host:6379/1 in production, files by default
+    "responses": env.cache_url("RESPONSE_CACHE_URL", default="filecache:///tmp/sige_master/responses"),
+}
+
+# Cache of the graph/report responses (see apps.measurements.services.response_cache), in seconds.
+# Intervals ending more than "closed_after" ago are closed: they change only with late measurements.
+RESPONSE_CACHE = {
+    "alias": "responses",
+    "open_timeout": env.int("RESPONSE_CACHE_OPEN_TIMEOUT", default=300),
+    "closed_timeout": env.int("RESPONSE_CACHE_CLOSED_TIMEOUT", default=7 * 24 * 3600),
+    "closed_after": env.int("RESPONSE_CACHE_CLOSED_AFTER", default=3600),
 }
 
 
@@ -170,6 +181,20 @@ USE_TZ = True
 # ------------------------------------------------------------------------------------------------
 LIMIT_FILTER = env("LIMIT_FILTER", default=500)
 
+# Storage of the instant measurements (see apps.measurements.services.compact_storage):
+# "decimal" - numeric columns only; "dual" - float4 copy written too; "compact" - only the float4 table
+# is written and read. Switch from "dual" to "compact" after `copy_compact_measurements`; the numeric
+# table then stops growing and is retired by the instant retention (RETENTION_INSTANT_DAYS).
+INSTANT_STORAGE_MODE = env("INSTANT_STORAGE_MODE", default="decimal")
+
+# Days kept by the retention job (`delete_old_measurements`), None (default) keeps everything.
+# Deleted days are rolled up first: instant -> 5 min/hourly/daily rollups, cumulative -> hourly/daily.
+MEASUREMENT_RETENTION_DAYS = {
+    "instant": env.int("RETENTION_INSTANT_DAYS", default=None),
+    "cumulative": env.int("RETENTION_CUMULATIVE_DAYS", default=None),
+    "instant_rollup": env.int("RETENTION_INSTANT_ROLLUP_DAYS", default=None),  # 5 minutes buckets
+}
+
 ROOT_URLCONF = "sige_master.urls"
 WSGI_APPLICATION = "sige_master.wsgi.application"
 